@@ -0,0 +1,69 @@
+"""Size and speed of embedding messages as JSON versus ``shared.codec`` frames.
+
+Builds an express-style message (uuid, content, timestamp and a float32
+embedding) and measures the bytes on the wire plus the time to encode it
+and to decode it back to a dict, for JSON and for the binary frame. Frames
+are decoded both to lists (what consumers get by default) and to numpy
+arrays. Usage:
+
+    python benchmarks/bench_codec.py [dim] [iterations]
+"""
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from shared.codec import decode_message, default_serializer, encode_message  # noqa: E402
+
+
+def timed(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main() -> None:
+    dim = int(sys.argv[1]) if len(sys.argv) > 1 else 384
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    vector = np.random.default_rng(0).standard_normal(dim).astype(np.float32)
+    message = {
+        "uuid": "2f1c6f7e-5b7a-4f0e-9c39-8f9d0d3b6a11",
+        "embedding": vector,
+        "timestamp": "2024-05-01T12:00:00",
+        "content": "Pressure dropped to 1450 psi after the choke change on well 12.",
+    }
+    as_list = {**message, "embedding": vector.tolist()}
+
+    json_data = json.dumps(as_list, default=default_serializer)
+    frame = encode_message(message)
+
+    rows = [
+        ("json", len(json_data.encode()),
+         timed(lambda: json.dumps(as_list, default=default_serializer), iterations),
+         timed(lambda: json.loads(json_data), iterations)),
+        ("frame", len(frame),
+         timed(lambda: encode_message(message), iterations),
+         timed(lambda: decode_message(frame), iterations)),
+        ("frame, lists/np", len(encode_message(as_list)),
+         timed(lambda: encode_message(as_list), iterations),
+         timed(lambda: decode_message(frame, arrays=True), iterations)),
+    ]
+
+    print(f"{dim}-dim embedding, {iterations} iterations")
+    print(f"{'format':<18} {'bytes':>7} {'encode us':>10} {'decode us':>10}")
+    for name, size, enc, dec in rows:
+        print(f"{name:<18} {size:>7} {enc:>10.1f} {dec:>10.1f}")
+    print("frame: encoded from a numpy array, decoded to lists")
+    print("frame, lists/np: encoded from a list, decoded to numpy arrays")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Throughput and latency of /encode-style traffic with and without batching.
+
+A fake model stands in for ``SentenceTransformer.encode``. Each call costs
+a fixed overhead plus a per-token cost for every text, padded to the
+longest text in the call, and the calls run one at a time like a single
+model. ``clients`` coroutines each send single-text requests back to back.
+The unbatched path calls the model once per request; ``EmbeddingBatcher``
+merges them (``EMBED_MAX_WAIT_MS`` and ``EMBED_MAX_BATCH`` apply). Usage:
+
+    python benchmarks/bench_embedding_batcher.py [requests_per_client] [overhead_ms] [per_token_us]
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from shared.batching import EmbeddingBatcher  # noqa: E402
+
+
+def fake_model(overhead: float, per_token: float):
+    lock = threading.Lock()
+
+    def encode(texts):
+        longest = max(len(t.split()) for t in texts)
+        with lock:
+            time.sleep(overhead + per_token * longest * len(texts))
+        return np.zeros((len(texts), 384), dtype=np.float32)
+
+    return encode
+
+
+async def drive(clients: int, requests: int, texts, call) -> tuple[float, list[float]]:
+    latencies: list[float] = []
+
+    async def client(offset: int) -> None:
+        for i in range(requests):
+            text = texts[(offset * requests + i) % len(texts)]
+            start = time.perf_counter()
+            await call(text)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(c) for c in range(clients)))
+    return time.perf_counter() - start, latencies
+
+
+async def main(requests: int, overhead_ms: float, per_token_us: float) -> None:
+    rng = random.Random(0)
+    texts = [" ".join(["word"] * rng.choice([8, 12, 20, 60])) for _ in range(1000)]
+    encode = fake_model(overhead_ms / 1000, per_token_us / 1e6)
+
+    async def unbatched(text):
+        return (await asyncio.to_thread(encode, [text]))[0]
+
+    print(f"{requests} requests per client, {overhead_ms} ms per call + {per_token_us} us per token")
+    print(f"{'clients':>7} {'mode':>9} {'texts/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for clients in (1, 4, 16, 64):
+        batcher = EmbeddingBatcher(encode)
+        for mode, call in (("unbatched", unbatched), ("batcher", lambda t: batcher.encode([t]))):
+            elapsed, latencies = await drive(clients, requests, texts, call)
+            p95 = statistics.quantiles(latencies, n=20)[18] if len(latencies) > 1 else latencies[0]
+            print(
+                f"{clients:>7} {mode:>9} {clients * requests / elapsed:9,.0f} "
+                f"{statistics.median(latencies) * 1000:8.1f} {p95 * 1000:8.1f}"
+            )
+        await batcher.stop()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    overhead = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    token = float(sys.argv[3]) if len(sys.argv) > 3 else 20
+    asyncio.run(main(count, overhead, token))
@@ -0,0 +1,127 @@
+"""Sentences/sec for noun-phrase extraction: per-sentence nlp() vs nlp.pipe.
+
+Compares the old path (full pipeline, one ``nlp(text)`` call per sentence)
+with ``extract_noun_phrases_batch``'s approach (``nlp.pipe`` with NER and
+the lemmatizer disabled) on a synthetic corpus, then times SCADA sentences
+through ``TemplatePhraseCache`` against piping them all. Usage:
+
+    python benchmarks/bench_noun_phrases.py [sentences] [batch_size] [n_process] [model]
+
+If the model (default ``en_core_web_sm``) is not installed, an untrained
+tok2vec/tagger/parser/ner pipeline stands in for it. Absolute numbers then
+differ from the real model, but the two paths can still be compared.
+"""
+
+import os
+import random
+import sys
+import time
+
+import spacy
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from interpret_service.interpret_worker import SCADA_TEMPLATE, TemplatePhraseCache  # noqa: E402
+
+DISABLE = ["ner", "lemmatizer"]
+
+TEMPLATES = [
+    "At {h:02d}:00 on May {d:02d}, pressure was {p} psi and flow rate was {f} bbl/hr.",
+    "The operator inspected the wellhead and replaced the {part} on pad {n}.",
+    "Lease permit {n} was renewed after the state inspection of the {part}.",
+    "Tubing pressure dropped to {p} psi while the compressor was offline.",
+]
+PARTS = ["choke valve", "separator", "flow line", "pump jack", "casing head"]
+
+
+def make_corpus(n: int) -> list[str]:
+    rng = random.Random(0)
+    return [
+        rng.choice(TEMPLATES).format(
+            h=rng.randrange(24),
+            d=rng.randrange(1, 31),
+            p=rng.randrange(50, 3000),
+            f=round(rng.uniform(0, 500), 1),
+            part=rng.choice(PARTS),
+            n=rng.randrange(1000),
+        )
+        for _ in range(n)
+    ]
+
+
+def load(model: str, disable: list[str]):
+    try:
+        return spacy.load(model, disable=disable), model
+    except OSError:
+        nlp = spacy.blank("en")
+        # No lemmatizer: its lookup tables ship with the trained model
+        for name in ("tok2vec", "tagger", "attribute_ruler", "parser", "ner"):
+            nlp.add_pipe(name)
+        nlp.get_pipe("tagger").add_label("NN")
+        nlp.get_pipe("parser").add_label("nsubj")
+        nlp.get_pipe("ner").add_label("ORG")
+        nlp.initialize()
+        for name in disable:
+            if name in nlp.pipe_names:
+                nlp.disable_pipe(name)
+        return nlp, "untrained stand-in for " + model
+
+
+def main(n: int, batch_size: int, n_process: int, model: str) -> None:
+    corpus = make_corpus(n)
+
+    full, label = load(model, [])
+    start = time.perf_counter()
+    for text in corpus:
+        [c.text for c in full(text).noun_chunks]
+    single = time.perf_counter() - start
+
+    lean, _ = load(model, DISABLE)
+    start = time.perf_counter()
+    for doc in lean.pipe(corpus, batch_size=batch_size, n_process=n_process):
+        [c.text for c in doc.noun_chunks]
+    piped = time.perf_counter() - start
+
+    print(f"{n} sentences, model: {label}")
+    print(f"nlp(text) full pipeline  {n / single:10,.0f} sentences/sec")
+    print(f"nlp.pipe  ner/lemma off  {n / piped:10,.0f} sentences/sec  "
+          f"(batch_size={batch_size}, n_process={n_process})")
+    print(f"speedup                  {single / piped:10.1f}x")
+
+    rng = random.Random(1)
+    rows = [
+        {
+            "ts": f"{rng.randrange(24):02d}:{rng.randrange(60):02d} on May {rng.randrange(1, 31):02d}",
+            "pressure": round(rng.uniform(50, 3000), 1),
+            "flow_rate": round(rng.uniform(0, 500), 1),
+        }
+        for _ in range(n)
+    ]
+
+    def extract_batch(texts):
+        docs = lean.pipe(texts, batch_size=batch_size, n_process=n_process)
+        return [[c.text for c in doc.noun_chunks] for doc in docs]
+
+    cache = TemplatePhraseCache(SCADA_TEMPLATE, extract_batch)
+    texts = [cache.render(row)[0] for row in rows]
+    start = time.perf_counter()
+    extract_batch(texts)
+    scada_piped = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(0, n, 200):
+        cache.extract(rows[i : i + 200])
+    cached = time.perf_counter() - start
+
+    print(f"SCADA nlp.pipe           {n / scada_piped:10,.0f} sentences/sec")
+    print(f"SCADA template cache     {n / cached:10,.0f} sentences/sec  "
+          f"({cache.misses} parsed, {cache.hits} from cache)")
+    print(f"speedup                  {scada_piped / cached:10.1f}x")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    procs = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    name = sys.argv[4] if len(sys.argv) > 4 else "en_core_web_sm"
+    main(count, size, procs, name)
@@ -0,0 +1,75 @@
+"""Embeddings/sec for pruning: the old list-recursion path vs NumPy masks.
+
+The old path is reproduced inline (a list comprehension per recursion level
+over Python floats). It is compared with ``prune_embedding`` one embedding
+at a time and with ``prune_batch`` over the whole set, given either the
+JSON-style lists or a float32 matrix. ``prune_mask`` alone shows the
+NumPy kernel without the cost of building Python lists for the response.
+Usage:
+
+    python benchmarks/bench_prune.py [embeddings] [dim] [threshold]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from loguru import logger  # noqa: E402
+
+from interpret_service.pruning import prune_batch, prune_embedding, prune_mask  # noqa: E402
+
+
+def old_recursive_prune(values, threshold, depth=0):
+    if depth >= 10:
+        return values
+    filtered = [v for v in values if abs(v) >= threshold]
+    if len(filtered) == len(values):
+        return filtered
+    return old_recursive_prune(filtered, threshold, depth + 1)
+
+
+def main(n: int, dim: int, threshold: float) -> None:
+    logger.remove()
+    embeddings = np.random.default_rng(0).normal(scale=0.1, size=(n, dim)).tolist()
+
+    results = {}
+    start = time.perf_counter()
+    for e in embeddings:
+        old_recursive_prune(e, threshold)
+    results["list recursion"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for e in embeddings:
+        prune_embedding(e, threshold)
+    results["prune_embedding"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    prune_batch(embeddings, threshold)
+    results["prune_batch"] = time.perf_counter() - start
+
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    start = time.perf_counter()
+    prune_batch(matrix, threshold)
+    results["prune_batch f32"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    prune_mask(matrix, threshold).sum(axis=1)
+    results["prune_mask f32"] = time.perf_counter() - start
+
+    print(f"{n} embeddings of dim {dim}, threshold {threshold}")
+    for name, elapsed in results.items():
+        print(f"{name:16s} {n / elapsed:12,.0f} embeddings/sec")
+    for name in ("prune_batch", "prune_batch f32", "prune_mask f32"):
+        print(f"speedup {name:16s} {results['list recursion'] / results[name]:6.1f}x")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 384
+    cutoff = float(sys.argv[3]) if len(sys.argv) > 3 else 0.1
+    main(count, size, cutoff)
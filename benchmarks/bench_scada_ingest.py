@@ -0,0 +1,54 @@
+"""Compare per-row and columnar SCADA conversion throughput.
+
+Usage: python benchmarks/bench_scada_ingest.py [rows]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from shared.scada_utils import SIGNAL_COLUMNS, frame_to_memories, row_to_memory
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    """Return a synthetic SCADA export with ``rows`` one-minute readings."""
+    start = pd.Timestamp("2024-01-01")
+    stamps = pd.date_range(start, periods=rows, freq="min")
+    rng = np.random.default_rng(0)
+    data = {
+        "DateTime": [
+            f"{ts:%m/%d/%Y %H:%M}-{(ts + pd.Timedelta(minutes=1)):%H:%M}"
+            for ts in stamps
+        ]
+    }
+    for col in SIGNAL_COLUMNS:
+        data[col] = rng.random(rows) * 100
+    data["alarms"] = ""
+    return pd.DataFrame(data)
+
+
+def bench(label: str, fn, df: pd.DataFrame) -> float:
+    start = time.perf_counter()
+    memories = fn(df)
+    elapsed = time.perf_counter() - start
+    rate = len(memories) / elapsed
+    print(f"{label:<10} {len(memories):>8} rows  {elapsed:8.3f}s  {rate:12,.0f} rows/sec")
+    return rate
+
+
+def per_row(df: pd.DataFrame) -> list:
+    return [row_to_memory(row) for _, row in df.iterrows()]
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    frame = make_frame(rows)
+    before = bench("iterrows", per_row, frame)
+    after = bench("columnar", frame_to_memories, frame)
+    print(f"speedup    {after / before:.1f}x")
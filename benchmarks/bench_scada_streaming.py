@@ -0,0 +1,65 @@
+"""Peak RSS of whole-file vs chunked SCADA CSV conversion.
+
+Each mode runs in a fresh subprocess so ``ru_maxrss`` reflects only that
+mode. Usage: python benchmarks/bench_scada_streaming.py [rows] [chunksize]
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from shared.scada_utils import convert_frame
+
+
+def write_csv(path: str, rows: int) -> None:
+    """Write a synthetic SCADA export in blocks to keep the writer small."""
+    sys.path.insert(0, os.path.dirname(__file__))
+    from bench_scada_ingest import make_frame
+
+    block = 50_000
+    written = 0
+    while written < rows:
+        n = min(block, rows - written)
+        make_frame(n).to_csv(path, mode="a", header=written == 0, index=False)
+        written += n
+
+
+def run_mode(mode: str, path: str, chunksize: int) -> None:
+    start = time.perf_counter()
+    converted = 0
+    if mode == "full":
+        memories, _ = convert_frame(pd.read_csv(path))
+        converted = len(memories)
+    else:
+        with pd.read_csv(path, chunksize=chunksize) as reader:
+            for chunk in reader:
+                memories, _ = convert_frame(chunk)
+                converted += len(memories)
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{mode:<7} {converted:>9} rows  {elapsed:7.2f}s  peak RSS {peak_mb:8.1f} MB")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--mode":
+        run_mode(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+        sys.exit(0)
+
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    chunksize = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "scada.csv")
+        write_csv(csv_path, rows)
+        for mode in ("full", "stream"):
+            subprocess.run(
+                [sys.executable, __file__, "--mode", mode, csv_path, str(chunksize)],
+                check=True,
+            )
@@ -0,0 +1,104 @@
+"""Signals/sec through /ingest (one per request) vs /ingest/batch.
+
+Runs against a live now_ingestor. With ``--in-process`` it drives the app
+through httpx's ASGI transport instead, publishing to fakeredis; every
+Redis command, and every pipeline execute, then waits ``REDIS_RTT_MS``
+(default 0.2) to stand in for the network round trip. Usage:
+
+    python benchmarks/bench_signal_ingest.py [base_url] [signals] [batch_size]
+    python benchmarks/bench_signal_ingest.py --in-process [signals] [batch_size]
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+CONCURRENCY = 32
+
+
+def make_signals(n: int) -> list[dict]:
+    ts = datetime.utcnow().isoformat()
+    return [
+        {"timestamp": ts, "source": "bench", "content": f"edge signal {i}"}
+        for i in range(n)
+    ]
+
+
+def in_process_app():
+    """now_ingestor's app publishing to fakeredis with a simulated round trip."""
+    import fakeredis
+    from loguru import logger
+
+    rtt = float(os.getenv("REDIS_RTT_MS", 0.2)) / 1000
+
+    class RemoteFakeRedis(fakeredis.FakeRedis):
+        def execute_command(self, *args, **options):
+            time.sleep(rtt)
+            return super().execute_command(*args, **options)
+
+        def pipeline(self, transaction=True, shard_hint=None):
+            pipe = super().pipeline(transaction, shard_hint)
+            execute = pipe.execute
+
+            def execute_once(*args, **kwargs):
+                time.sleep(rtt)
+                return execute(*args, **kwargs)
+
+            pipe.execute = execute_once
+            return pipe
+
+    from shared import redis_utils
+
+    redis_utils._client = RemoteFakeRedis(decode_responses=True)
+    logger.remove()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    from now_ingestor import main as service
+
+    return service.app
+
+
+async def run(base: str, signals: list[dict], batch_size: int, app=None) -> None:
+    sem = asyncio.Semaphore(CONCURRENCY)
+
+    async def post(client: httpx.AsyncClient, path: str, body) -> None:
+        async with sem:
+            resp = await client.post(base + path, json=body)
+            resp.raise_for_status()
+
+    kwargs = {"transport": httpx.ASGITransport(app=app)} if app is not None else {}
+    async with httpx.AsyncClient(timeout=60, **kwargs) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(post(client, "/ingest", s) for s in signals))
+        single = time.perf_counter() - start
+
+        batches = [signals[i : i + batch_size] for i in range(0, len(signals), batch_size)]
+        start = time.perf_counter()
+        await asyncio.gather(*(post(client, "/ingest/batch", b) for b in batches))
+        batched = time.perf_counter() - start
+
+    n = len(signals)
+    print(f"/ingest        {n / single:10,.0f} signals/sec")
+    print(f"/ingest/batch  {n / batched:10,.0f} signals/sec  (batch={batch_size})")
+    print(f"speedup        {single / batched:10.1f}x")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    app = None
+    if args and args[0] == "--in-process":
+        app = in_process_app()
+        base_url = "http://ingest"
+        args = args[1:]
+    else:
+        base_url = args.pop(0) if args else "http://localhost:8001"
+    count = int(args[0]) if len(args) > 0 else 10_000
+    size = int(args[1]) if len(args) > 1 else 1_000
+    asyncio.run(run(base_url, make_signals(count), size, app))
@@ -0,0 +1,106 @@
+"""Rows/sec loading snapshot_scada rows with execute_batch vs COPY FROM STDIN.
+
+Needs a reachable Postgres (PGHOST/PGPORT/PGUSER/PGPASSWORD/PGDATABASE).
+Rows go into a temporary table, so nothing is left behind. Usage:
+
+    python benchmarks/bench_snapshot_copy.py [rows] [chunk_size]
+"""
+
+import io
+import os
+import sys
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+import psycopg2
+from psycopg2.extras import execute_batch
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from shared.database import connection_params, copy_csv  # noqa: E402
+
+COLUMNS = ["well_id", "timestamp", "flow_rate", "pressure", "temperature", "volume", "source_file"]
+
+DDL = """
+CREATE TEMP TABLE snapshot_scada_bench (
+    id SERIAL PRIMARY KEY,
+    well_id UUID NOT NULL,
+    timestamp TIMESTAMP,
+    flow_rate REAL,
+    pressure REAL,
+    temperature REAL,
+    volume REAL,
+    source_file TEXT
+)
+"""
+
+INSERT = """
+INSERT INTO snapshot_scada_bench (
+    well_id, timestamp, flow_rate, pressure, temperature, volume, source_file
+) VALUES (
+    %(well_id)s, %(timestamp)s, %(flow_rate)s, %(pressure)s, %(temperature)s, %(volume)s, %(source_file)s
+)
+"""
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    start = pd.Timestamp("2024-05-07")
+    stamps = pd.date_range(start, periods=rows, freq="min")
+    return pd.DataFrame(
+        {
+            "well_id": str(uuid.uuid4()),
+            "timestamp": np.datetime_as_string(stamps.values, unit="s"),
+            "flow_rate": rng.uniform(0, 500, rows).round(2),
+            "pressure": rng.uniform(0, 3000, rows).round(2),
+            "temperature": rng.uniform(40, 200, rows).round(2),
+            "volume": rng.uniform(0, 100, rows).round(2),
+            "source_file": "/data/bench.csv",
+        }
+    )[COLUMNS]
+
+
+def load_execute_batch(cur, frame: pd.DataFrame) -> None:
+    execute_batch(cur, INSERT, frame.to_dict("records"))
+
+
+def load_copy(cur, frame: pd.DataFrame) -> None:
+    buf = io.StringIO()
+    frame.to_csv(buf, header=False, index=False)
+    buf.seek(0)
+    copy_csv(cur, "snapshot_scada_bench", COLUMNS, buf)
+
+
+def run(rows: int, chunk_size: int) -> None:
+    frame = make_frame(rows)
+    chunks = [frame.iloc[i : i + chunk_size] for i in range(0, rows, chunk_size)]
+    conn = psycopg2.connect(**connection_params())
+    try:
+        with conn.cursor() as cur:
+            cur.execute(DDL)
+        results = {}
+        for name, load in (("execute_batch", load_execute_batch), ("COPY", load_copy)):
+            with conn.cursor() as cur:
+                cur.execute("TRUNCATE snapshot_scada_bench")
+                start = time.perf_counter()
+                for chunk in chunks:
+                    load(cur, chunk)
+                    conn.commit()
+                results[name] = time.perf_counter() - start
+                cur.execute("SELECT count(*) FROM snapshot_scada_bench")
+                assert cur.fetchone()[0] == rows
+    finally:
+        conn.close()
+
+    for name, elapsed in results.items():
+        print(f"{name:14s} {rows / elapsed:12,.0f} rows/sec  ({elapsed:.2f}s)")
+    print(f"speedup        {results['execute_batch'] / results['COPY']:12.1f}x")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    run(count, size)
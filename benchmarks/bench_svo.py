@@ -0,0 +1,64 @@
+"""Latency of /interpret's GPT extraction: serial chunks vs bounded fan-out.
+
+A stub stands in for ``openai.ChatCompletion.create`` and sleeps for a
+fixed latency per call. The old path sends the chunks one after another;
+``svo.extract_svo`` runs up to ``concurrency`` of them at a time. Usage:
+
+    python benchmarks/bench_svo.py [sentences] [latency_seconds] [concurrency]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+import types
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from loguru import logger  # noqa: E402
+
+from interpret_service import svo  # noqa: E402
+
+
+def stub_create(latency: float):
+    def create(model, messages):
+        time.sleep(latency)
+        count = len(messages[0]["content"].splitlines()) - 1
+        content = json.dumps([{"subject": "s", "verb": "v", "object": "o", "tags": []}] * count)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message={"content": content})])
+
+    return create
+
+
+def main(n: int, latency: float, concurrency: int) -> None:
+    logger.remove()
+    sentences = [f"Pressure on pad {i} dropped after the choke was opened." for i in range(n)]
+    create = stub_create(latency)
+
+    start = time.perf_counter()
+    for i in range(0, n, svo.SVO_CHUNK_SIZE):
+        prompt = svo.build_prompt(sentences[i : i + svo.SVO_CHUNK_SIZE])
+        create(model="m", messages=[{"role": "user", "content": prompt}])
+    serial = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = asyncio.run(
+        svo.extract_svo(sentences, create, "m", concurrency=concurrency, token_budget=0)
+    )
+    fanned = time.perf_counter() - start
+    assert len(results) == n
+
+    chunks = -(-n // svo.SVO_CHUNK_SIZE)
+    print(f"{n} sentences in {chunks} chunks, {latency * 1000:.0f} ms per call")
+    print(f"serial              {serial:8.2f}s")
+    print(f"fan-out ({concurrency:2d} at once) {fanned:8.2f}s")
+    print(f"speedup             {serial / fanned:8.1f}x")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    limit = int(sys.argv[3]) if len(sys.argv) > 3 else svo.SVO_CONCURRENCY
+    main(count, delay, limit)
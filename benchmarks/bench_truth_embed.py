@@ -0,0 +1,92 @@
+"""Rows/sec for TRUTH's embedding step, one model call per row versus one per batch.
+
+Encodes ``BATCH_SIZE``-row batches of reflected SCADA-style sentences on
+CPU, first with ``model.encode(text)`` for every row (the old loop), then
+with a single ``model.encode(texts)`` per batch (``embed_texts``). Every
+sentence is distinct, so the embedding cache would not help here. Loads
+``all-MiniLM-L6-v2`` when it is available; without network access it falls
+back to a randomly initialised model of the same shape (6 layers, 384
+hidden), which costs the same to run. Usage:
+
+    python benchmarks/bench_truth_embed.py [rows] [batch_size]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+import torch
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from sentence_transformers import SentenceTransformer, models  # noqa: E402
+
+MODEL_NAME = os.getenv("MODEL_NAME", "all-MiniLM-L6-v2")
+
+
+def minilm_shaped(texts) -> SentenceTransformer:
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    words = sorted({w for t in texts for w in t.lower().replace(",", " ").split()})
+    path = tempfile.mkdtemp(prefix="minilm_")
+    with open(os.path.join(path, "vocab.txt"), "w") as f:
+        f.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *words]))
+    BertTokenizerFast(os.path.join(path, "vocab.txt")).save_pretrained(path)
+    config = BertConfig(
+        vocab_size=len(words) + 5,
+        hidden_size=384,
+        num_hidden_layers=6,
+        num_attention_heads=12,
+        intermediate_size=1536,
+        max_position_embeddings=512,
+    )
+    BertModel(config).save_pretrained(path)
+    transformer = models.Transformer(path, max_seq_length=256)
+    return SentenceTransformer(modules=[transformer, models.Pooling(384)], device="cpu")
+
+
+def sentences(n: int):
+    rng = random.Random(0)
+    events = ["stable", "rising", "dropping sharply", "fluctuating", "holding after the choke change"]
+    return [
+        f"At 2024-05-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}, pressure was {rng.uniform(900, 2100):.1f} psi "
+        f"and flow rate was {rng.uniform(50, 400):.1f} bbl/hr; trend {rng.choice(events)} on well {i % 40}."
+        for i in range(n)
+    ]
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else int(os.getenv("BATCH_SIZE", 100))
+    texts = sentences(rows)
+    try:
+        model = SentenceTransformer(MODEL_NAME, device="cpu")
+        label = MODEL_NAME
+    except OSError:
+        model = minilm_shaped(texts)
+        label = "random MiniLM-shaped model (no network)"
+    model.encode(texts[:8])
+
+    print(f"{label}, {rows} rows, batches of {batch_size}, {torch.get_num_threads()} torch threads")
+    batches = [texts[i : i + batch_size] for i in range(0, rows, batch_size)]
+
+    start = time.perf_counter()
+    for batch in batches:
+        for text in batch:
+            model.encode(text)
+    per_row = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for batch in batches:
+        model.encode(batch)
+    batched = time.perf_counter() - start
+
+    print(f"per-row encode : {rows / per_row:8.1f} rows/s")
+    print(f"batched encode : {rows / batched:8.1f} rows/s ({per_row / batched:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
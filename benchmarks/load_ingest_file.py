@@ -0,0 +1,149 @@
+"""Concurrent upload load test for now_ingestor's /ingest-file route.
+
+Runs against a live service (``docker-compose up now_ingestor``) and
+reports latency percentiles. With ``--in-process`` it drives the app
+through httpx's ASGI transport instead: Postgres is replaced by a stub
+whose INSERT blocks for ``DB_LATENCY_MS`` (default 5), Redis (unused by
+the route) by no-ops, and uploads go to a temporary directory. Usage:
+
+    python benchmarks/load_ingest_file.py [url] [concurrency] [requests] [size_kb]
+    python benchmarks/load_ingest_file.py --in-process [concurrency] [requests] [size_kb]
+"""
+
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import types
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+
+class StubCursor:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        # psycopg2 blocks the calling thread for the round trip
+        time.sleep(self.latency)
+
+
+class StubConnection:
+    closed = 0
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def cursor(self):
+        return StubCursor(self.latency)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def stub_psycopg2(latency: float) -> None:
+    class StubPool:
+        def __init__(self, minconn, maxconn, *args, **kwargs):
+            self._pool, self._used = [], {}
+
+        def getconn(self):
+            conn = self._pool.pop() if self._pool else StubConnection(latency)
+            self._used[id(conn)] = conn
+            return conn
+
+        def putconn(self, conn, close=False):
+            self._used.pop(id(conn), None)
+            if not close:
+                self._pool.append(conn)
+
+    psycopg2 = types.ModuleType("psycopg2")
+    psycopg2.pool = types.SimpleNamespace(
+        SimpleConnectionPool=StubPool, ThreadedConnectionPool=StubPool
+    )
+    sys.modules["psycopg2"] = psycopg2
+    sys.modules["psycopg2.pool"] = psycopg2.pool
+
+
+def stub_redis() -> None:
+    redis_utils = types.ModuleType("shared.redis_utils")
+    redis_utils.r = None
+    redis_utils.publish = lambda *args, **kwargs: None
+    redis_utils.publish_many = lambda channel, messages, **kwargs: len(list(messages))
+    sys.modules["shared.redis_utils"] = redis_utils
+
+
+def in_process_app():
+    """now_ingestor's app with stubbed Postgres and Redis, storing uploads in a temp dir."""
+    stub_psycopg2(float(os.getenv("DB_LATENCY_MS", 5)) / 1000)
+    stub_redis()
+    from loguru import logger
+
+    logger.remove()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    from now_ingestor import main as service
+
+    service.STORAGE_ROOT = tempfile.mkdtemp(prefix="ingest_load_")
+    return service.app
+
+
+async def upload(client: httpx.AsyncClient, url: str, payload: bytes, latencies: list) -> None:
+    start = time.perf_counter()
+    resp = await client.post(url, files={"file": ("load.txt", payload, "text/plain")})
+    resp.raise_for_status()
+    latencies.append(time.perf_counter() - start)
+
+
+async def main(url: str, concurrency: int, total: int, size_kb: int, app=None) -> None:
+    payload = b"x" * (size_kb * 1024)
+    latencies: list[float] = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def worker() -> None:
+        async with sem:
+            await upload(client, url, payload, latencies)
+
+    if app is not None:
+        kwargs = {"transport": httpx.ASGITransport(app=app), "base_url": "http://ingest"}
+    else:
+        kwargs = {"limits": httpx.Limits(max_connections=concurrency)}
+    async with httpx.AsyncClient(timeout=60, **kwargs) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+    print(f"{total} uploads of {size_kb} KB at concurrency {concurrency}")
+    print(f"throughput {total / elapsed:8.1f} req/s")
+    print(f"p50 {pct(0.50):8.1f} ms  p95 {pct(0.95):8.1f} ms  p99 {pct(0.99):8.1f} ms")
+    print(f"mean {statistics.mean(latencies) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    app = None
+    if args and args[0] == "--in-process":
+        app = in_process_app()
+        target = "/ingest-file"
+        args = args[1:]
+    else:
+        target = args.pop(0) if args else "http://localhost:8001/ingest-file"
+    conc = int(args[0]) if len(args) > 0 else 50
+    count = int(args[1]) if len(args) > 1 else 1000
+    size = int(args[2]) if len(args) > 2 else 512
+    asyncio.run(main(target, conc, count, size, app))
@@ -1,13 +1,14 @@
 import os
 import json
 import asyncio
-import asyncpg
 from typing import List, Dict, Any
 from qdrant_client import QdrantClient
 from qdrant_client.http.models import PointStruct, VectorParams, Distance
 import logging
 import uuid
 
+from shared.database import AsyncConnectionPool, get_async_pool
+
 logger = logging.getLogger("genio.embed.database")
 
 
@@ -19,12 +20,12 @@ TARGET_EMBEDDING_DIM = 384
 
 class Database:
     def __init__(self) -> None:
-        self.pg_pool: asyncpg.Pool | None = None
+        self.pg_pool: AsyncConnectionPool | None = None
         self.qdrant: QdrantClient | None = None
         self.collection_initialized = False
 
     async def connect(self) -> None:
-        self.pg_pool = await asyncpg.create_pool(DATABASE_URL)
+        self.pg_pool = get_async_pool(dsn=DATABASE_URL)
         async with self.pg_pool.acquire() as conn:
             await conn.execute(
                 """
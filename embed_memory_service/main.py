@@ -4,11 +4,14 @@ from loguru import logger
 from database import Database
 from schemas import EmbedRequest
 import redis.asyncio as redis
+from shared.database import get_pool
+from shared.llm import complete
+from shared.redis_utils import AsyncSubscription, send
+from shared.sharding import owned_channels
 from prometheus_fastapi_instrumentator import Instrumentator
 from prometheus_client import Histogram, Counter
 from qdrant_client.http import models as qm
 import openai
-import psycopg2
 import uuid
 import asyncio
 import json
@@ -46,15 +49,14 @@ embed_errors = Counter("embed_errors_total", "Total errors in Embed Memory servi
 shutdown_event = asyncio.Event()
 
 
-def pg_connect() -> psycopg2.extensions.connection:
-    """Return a new PostgreSQL connection using environment variables."""
-    return psycopg2.connect(
-        host=os.getenv("PGHOST", "postgres"),
-        port=os.getenv("PGPORT", 5432),
-        user=os.getenv("PGUSER", "user"),
-        password=os.getenv("PGPASSWORD", "password"),
-        dbname=os.getenv("PGDATABASE", "database"),
-    )
+# Pooled psycopg2 connections for the memory_log writes
+pg_pool = get_pool(
+    host=os.getenv("PGHOST", "postgres"),
+    port=os.getenv("PGPORT", 5432),
+    user=os.getenv("PGUSER", "user"),
+    password=os.getenv("PGPASSWORD", "password"),
+    dbname=os.getenv("PGDATABASE", "database"),
+)
 
 
 def prepare_entries(points: list[qm.PointStruct]) -> list[tuple]:
@@ -83,8 +85,7 @@ def store_to_memory_log(points: list[qm.PointStruct]) -> None:
     """Persist points into the memory_log table."""
     if not points:
         return
-    conn = pg_connect()
-    try:
+    with pg_pool.connection() as conn:
         with conn.cursor() as cur:
             cur.executemany(
                 """
@@ -97,8 +98,6 @@ def store_to_memory_log(points: list[qm.PointStruct]) -> None:
                 prepare_entries(points),
             )
         conn.commit()
-    finally:
-        conn.close()
 
 
 def mark_embedded(ids: list[str]) -> None:
@@ -128,11 +127,13 @@ async def gpt_enrich(
     try:
         openai.api_key = OPENAI_API_KEY
         resp = await asyncio.to_thread(
+            complete,
             openai.ChatCompletion.create,
-            model=OPENAI_MODEL,
-            messages=[{"role": "user", "content": f"{prompt}\nSentence: {sentence}"}],
+            OPENAI_MODEL,
+            [{"role": "user", "content": f"{prompt}\nSentence: {sentence}"}],
+            validate=json.loads,
         )
-        content = resp.choices[0].message["content"]
+        content = resp.content
         data = json.loads(content)
         return (
             data.get("summary", default[0]),
@@ -173,11 +174,12 @@ async def fetch_truth_points(well_id: str) -> list[qm.PointStruct]:
 async def handle_embed_ready(well_id: str, source: str) -> None:
     """Process an embed_ready event for a given well."""
     points = await fetch_truth_points(well_id)
-    store_to_memory_log(points)
+    await asyncio.to_thread(store_to_memory_log, points)
     mark_embedded([str(p.id) for p in points])
-    await redis_client.publish(
+    await send(
+        redis_client,
         REPLAY_CHANNEL,
-        json.dumps({"event": "replay_ready", "well_id": well_id, "source": source}),
+        {"event": "replay_ready", "well_id": well_id, "source": source},
     )
     logger.info("[EMBED] Finalized %d embeddings for well %s", len(points), well_id)
 
@@ -186,13 +188,17 @@ async def handle_embed_ready(well_id: str, source: str) -> None:
 async def startup():
     await db.connect()
     asyncio.create_task(redis_listener())
-    asyncio.create_task(embed_ready_listener())
+    for shard in owned_channels(EMBED_CHANNEL):
+        asyncio.create_task(embed_ready_listener(shard))
 
 
 @app.on_event("shutdown")
 async def shutdown():
     shutdown_event.set()
     await redis_client.close()
+    if db.pg_pool:
+        await db.pg_pool.close()
+    pg_pool.close()
 
 
 @app.get("/health")
@@ -207,8 +213,7 @@ async def detailed_healthcheck():
         logger.error(f"[EMBED] Redis health check failed: {e}")
 
     try:
-        async with db.pg_pool.acquire() as conn:
-            await conn.execute("SELECT 1")
+        await db.pg_pool.check()
     except Exception as e:
         db_status = f"error: {str(e)}"
         logger.error(f"[EMBED] Database health check failed: {e}")
@@ -227,19 +232,21 @@ async def healthcheck():
 
 
 async def redis_listener():
-    pubsub = redis_client.pubsub()
-    await pubsub.subscribe(VISUALIZE_CHANNEL)
+    subscription = AsyncSubscription(redis_client, VISUALIZE_CHANNEL, "embed")
     logger.info(f"[EMBED] Subscribed to '{VISUALIZE_CHANNEL}'")
 
     while not shutdown_event.is_set():
-        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1)
-        if message:
-            try:
-                data = json.loads(message["data"])
-                asyncio.create_task(handle_embedding(data))
-            except Exception as e:
+        messages = await subscription.read(timeout=1)
+        if not messages:
+            continue
+        results = await asyncio.gather(
+            *(handle_embedding(data) for _, data in messages), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
                 embed_errors.inc()
-                logger.error("[EMBED] Error processing message", error=str(e))
+                logger.error("[EMBED] Error processing message", error=str(result))
+        await subscription.ack(msg_id for msg_id, _ in messages)
 
 
 async def handle_embedding(data):
@@ -264,9 +271,7 @@ async def handle_embedding(data):
             metadata_id = await db.store_embedding(
                 uuid, anchored_embedding, metadata, timestamp
             )
-        await redis_client.publish(
-            EMBED_CHANNEL, json.dumps({"uuid": uuid, "metadata_id": metadata_id})
-        )
+        await send(redis_client, EMBED_CHANNEL, {"uuid": uuid, "metadata_id": metadata_id})
         logger.info(
             "[EMBED] Stored and published",
             uuid=uuid,
@@ -278,24 +283,22 @@ async def handle_embedding(data):
         logger.error("[EMBED] Error storing embedding", uuid=uuid, error=str(e))
 
 
-async def embed_ready_listener():
-    """Listen for embed_ready events and finalize memory capture."""
-    pubsub = redis_client.pubsub()
-    await pubsub.subscribe(EMBED_CHANNEL)
-    logger.info(f"[EMBED] Subscribed to '{EMBED_CHANNEL}'")
+async def embed_ready_listener(channel: str = EMBED_CHANNEL):
+    """Listen for embed_ready events on one shard and finalize memory capture."""
+    subscription = AsyncSubscription(redis_client, channel, "embed")
+    logger.info(f"[EMBED] Subscribed to '{channel}'")
     while not shutdown_event.is_set():
-        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1)
-        if not message:
-            continue
-        try:
-            data = json.loads(message["data"])
+        messages = await subscription.read(timeout=1)
+        for _, data in messages:
             if data.get("event") != "embed_ready":
                 continue
-            well_id = data["well_id"]
-            source = data.get("source", "unknown")
-            await handle_embed_ready(well_id, source)
-        except Exception as exc:
-            logger.error(f"[EMBED] Failed to process embed_ready: {exc}")
+            try:
+                well_id = data["well_id"]
+                source = data.get("source", "unknown")
+                await handle_embed_ready(well_id, source)
+            except Exception as exc:
+                logger.error(f"[EMBED] Failed to process embed_ready: {exc}")
+        await subscription.ack(msg_id for msg_id, _ in messages)
 
 
 if __name__ == "__main__":
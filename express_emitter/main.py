@@ -1,35 +1,32 @@
+import io
 import os
 import re
-import json
 import asyncio
+import functools
 from datetime import datetime
-from typing import List, Any, Dict
+from typing import List, Any, Dict, Iterator, Literal
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 import httpx
 from pydantic import BaseModel
+import numpy as np
 import pandas as pd
 import fitz
-import psycopg2
-from psycopg2.extras import execute_batch
 from sentence_transformers import SentenceTransformer
 from prometheus_fastapi_instrumentator import Instrumentator
 from prometheus_client import Histogram
 from loguru import logger
 import redis.asyncio as redis
 
-from shared.config import (
-    REDIS_HOST,
-    REDIS_PORT,
-    PGHOST,
-    PGPORT,
-    PGUSER,
-    PGPASSWORD,
-    PGDATABASE,
-)
+from shared.batching import EmbeddingBatcher
+from shared.config import REDIS_HOST, REDIS_PORT
+from shared.database import copy_csv, copy_rows, get_pool
+from shared.embedding_cache import get_embedding_cache
 
 
-from shared.scada_utils import parse_scada_timestamp
+from shared.redis_utils import AsyncSubscription, send
+from shared.scada_utils import parse_scada_timestamps
+from shared.sharding import shard_channel
 
 
 # FastAPI app initialization
@@ -44,6 +41,9 @@ redis_pool = redis.ConnectionPool.from_url(
 )
 redis_client = redis.Redis(connection_pool=redis_pool)
 
+# PostgreSQL pool shared by the ingest workers
+db = get_pool()
+
 # Prometheus metrics
 embedding_latency = Histogram(
     "embedding_generation_seconds", "Time spent generating embeddings"
@@ -54,6 +54,23 @@ MODEL_NAME = os.getenv("MODEL_NAME", "all-MiniLM-L6-v2")
 NOW_CHANNEL = os.getenv("NOW_CHANNEL", "now_channel")
 EXPRESS_CHANNEL = os.getenv("EXPRESS_CHANNEL", "express_channel")
 BATCH_SIZE = int(os.getenv("BATCH_SIZE", "32"))
+# Seconds to finish in-flight embedding work on shutdown
+SHUTDOWN_TIMEOUT = float(os.getenv("SHUTDOWN_TIMEOUT", 10))
+# Most texts accepted by one /encode/batch request
+ENCODE_BATCH_MAX_TEXTS = int(os.getenv("ENCODE_BATCH_MAX_TEXTS", "2048"))
+# now_channel reads allowed to wait on the batcher at once
+NOW_MAX_IN_FLIGHT = int(os.getenv("NOW_MAX_IN_FLIGHT", "8"))
+SCADA_CHUNK_SIZE = int(os.getenv("SCADA_CHUNK_SIZE", "10000"))
+SCADA_COLUMNS = [
+    "well_id",
+    "timestamp",
+    "flow_rate",
+    "pressure",
+    "temperature",
+    "volume",
+    "source_file",
+]
+WELLFILE_COLUMNS = ["well_id", "page", "text", "source_file"]
 INGEST_CHANNEL = os.getenv("INGEST_CHANNEL", "ingest_channel")
 INTERPRET_CHANNEL = os.getenv("INTERPRET_CHANNEL", "interpret_channel")
 INTERPRET_SERVICE_URL = os.getenv(
@@ -62,6 +79,8 @@ INTERPRET_SERVICE_URL = os.getenv(
 )
 
 model: SentenceTransformer | None = None
+# Merges /encode requests and now_channel messages into model.encode calls
+batcher: EmbeddingBatcher | None = None
 
 
 # Request and Response Schemas
@@ -77,50 +96,83 @@ class EncodeResponse(BaseModel):
     model: str
 
 
+class EncodeBatchRequest(BaseModel):
+    texts: List[str]
+    # "json" or a raw little-endian buffer of "float32" / "float16" values
+    format: Literal["json", "float32", "float16"] = "json"
+
+
+class EncodeBatchResponse(BaseModel):
+    embeddings: List[List[float]]
+    count: int
+    dim: int
+    timestamp: datetime
+    model: str
+
+
 # Text preprocessing utility
 def preprocess_text(text: str) -> str:
     text = re.sub(r"[^\w\s]", "", text)
     return " ".join(text.split())
 
 
+# Background tasks are referenced here until done so they are not collected
+background_tasks: set = set()
+listener_tasks: List[asyncio.Task] = []
+
+
+def _task_done(task: asyncio.Task) -> None:
+    background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"[EXPRESS] Background task failed: {task.exception()!r}")
+
+
+def spawn(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(_task_done)
+    return task
+
+
 # Batch embedding function
-async def encode_batch(texts: List[str]) -> List[List[float]]:
-    assert model is not None
-    loop = asyncio.get_event_loop()
-    embeddings = await loop.run_in_executor(None, model.encode, texts)
-    return [emb.tolist() for emb in embeddings]
+async def encode_batch(texts: List[str]) -> List[np.ndarray]:
+    assert batcher is not None
+    # Kept as arrays: send() packs them into float32 frames without tolist()
+    return await batcher.encode(texts)
 
 
 # Redis listener for batching embeddings
 async def handle_now_channel():
-    pubsub = redis_client.pubsub()
-    await pubsub.subscribe(NOW_CHANNEL)
-    buffer = []
-    buffer_timer = datetime.utcnow()
-    flush_interval = 1  # seconds
+    subscription = AsyncSubscription(redis_client, NOW_CHANNEL, "express", batch_size=BATCH_SIZE)
+    # Reads still being encoded; the batcher merges them into larger batches
+    in_flight = asyncio.Semaphore(NOW_MAX_IN_FLIGHT)
     logger.info(f"[EXPRESS] Subscribed to Redis channel '{NOW_CHANNEL}'")
 
-    while True:
-        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.5)
-        now = datetime.utcnow()
+    async def handle(messages) -> None:
+        try:
+            batch = []
+            for _, data in messages:
+                try:
+                    uuid = data.get("uuid", datetime.utcnow().isoformat())
+                    batch.append((uuid, data["content"]))
+                except Exception as e:
+                    logger.error(f"[EXPRESS] Message handling error: {e}")
+            if batch:
+                await process_batch(batch)
+            # Ack only once the embeddings for these signals are published
+            await subscription.ack([msg_id for msg_id, _ in messages])
+        except Exception as e:
+            logger.error(f"[EXPRESS] Failed to embed {len(messages)} messages: {e}")
+        finally:
+            in_flight.release()
 
-        if message:
-            try:
-                data = json.loads(message["data"])
-                uuid = data.get("uuid", datetime.utcnow().isoformat())
-                content = data["content"]
-                buffer.append((uuid, content))
-            except Exception as e:
-                logger.error(f"[EXPRESS] Message handling error: {e}")
-
-        # Check if buffer should be flushed by size or time
-        if buffer and (
-            len(buffer) >= BATCH_SIZE
-            or (now - buffer_timer).total_seconds() >= flush_interval
-        ):
-            await process_batch(buffer)
-            buffer.clear()
-            buffer_timer = now
+    while True:
+        await in_flight.acquire()
+        messages = await subscription.read(timeout=0.5)
+        if not messages:
+            in_flight.release()
+            continue
+        spawn(handle(messages))
 
 
 async def process_batch(batch):
@@ -131,15 +183,17 @@ async def process_batch(batch):
         embeddings = await encode_batch(cleaned_texts)
 
     timestamp = datetime.utcnow().isoformat()
-    for uuid, embedding, content in zip(uuids, embeddings, contents):
-        payload = {
-            "uuid": uuid,
-            "embedding": embedding,
-            "timestamp": timestamp,
-            "content": content,
-        }
-        await redis_client.publish(EXPRESS_CHANNEL, json.dumps(payload))
-        logger.info("[EXPRESS] Published embedding", uuid=uuid)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for uuid, embedding, content in zip(uuids, embeddings, contents):
+            payload = {
+                "uuid": uuid,
+                "embedding": embedding,
+                "timestamp": timestamp,
+                "content": content,
+            }
+            send(pipe, EXPRESS_CHANNEL, payload)
+        await pipe.execute()
+    logger.info("[EXPRESS] Published embeddings", count=len(uuids))
 
 
 # -----------------------------------------------------------
@@ -158,10 +212,9 @@ async def post_snapshot(snapshot: Dict[str, Any]) -> None:
 # -----------------------------------------------------------
 # Ingest worker utilities
 # -----------------------------------------------------------
-def parse_scada_csv(path: str, well_id: str) -> List[Dict[str, Any]]:
-    """Yield SCADA CSV rows as dictionaries."""
+def _normalize_scada_frame(df: pd.DataFrame, path: str, well_id: str) -> pd.DataFrame:
+    """Rename a chunk of a SCADA CSV to the ``snapshot_scada`` columns."""
 
-    df = pd.read_csv(path)
     df = df.rename(
         columns={
             "DateTime": "timestamp",
@@ -172,23 +225,18 @@ def parse_scada_csv(path: str, well_id: str) -> List[Dict[str, Any]]:
         }
     )
     if "timestamp" in df:
-        df["timestamp"] = df["timestamp"].apply(parse_scada_timestamp)
+        df["timestamp"] = parse_scada_timestamps(df["timestamp"])
 
     df["well_id"] = well_id
     df["source_file"] = path
+    return df[SCADA_COLUMNS]
 
-    cols = [
-        "well_id",
-        "timestamp",
-        "flow_rate",
-        "pressure",
-        "temperature",
-        "volume",
-        "source_file",
-    ]
+
+def scada_frame_to_rows(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Convert a normalized SCADA frame into snapshot row dictionaries."""
 
     rows = []
-    for row in df[cols].itertuples(index=False):
+    for row in df.itertuples(index=False):
         rows.append({
             "well_id": row.well_id,
             "timestamp": row.timestamp,
@@ -201,6 +249,31 @@ def parse_scada_csv(path: str, well_id: str) -> List[Dict[str, Any]]:
     return rows
 
 
+def iter_scada_frames(
+    path: str, well_id: str, chunksize: int = SCADA_CHUNK_SIZE
+) -> Iterator[pd.DataFrame]:
+    """Yield normalized SCADA frames of at most ``chunksize`` rows."""
+
+    with pd.read_csv(path, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield _normalize_scada_frame(chunk, path, well_id)
+
+
+def iter_scada_csv(
+    path: str, well_id: str, chunksize: int = SCADA_CHUNK_SIZE
+) -> Iterator[List[Dict[str, Any]]]:
+    """Yield SCADA CSV rows in chunks of at most ``chunksize`` rows."""
+
+    for frame in iter_scada_frames(path, well_id, chunksize):
+        yield scada_frame_to_rows(frame)
+
+
+def parse_scada_csv(path: str, well_id: str) -> List[Dict[str, Any]]:
+    """Return all SCADA CSV rows as dictionaries."""
+
+    return [row for chunk in iter_scada_csv(path, well_id) for row in chunk]
+
+
 def parse_wellfile_pdf(path: str, well_id: str) -> List[Dict[str, Any]]:
     """Return the first sentence from each PDF page."""
 
@@ -292,10 +365,7 @@ def wellfile_rows_to_snapshots(rows: List[Dict[str, Any]], well_id: str) -> List
 def init_db() -> None:
     """Ensure snapshot tables exist."""
 
-    conn = psycopg2.connect(
-        host=PGHOST, port=PGPORT, user=PGUSER, password=PGPASSWORD, dbname=PGDATABASE
-    )
-    with conn:
+    with db.connection() as conn, conn:
         with conn.cursor() as cur:
             cur.execute(
                 """
@@ -322,76 +392,55 @@ def init_db() -> None:
                 )
                 """
             )
-    conn.close()
 
 
-def store_scada_rows(rows: list[Dict[str, Any]]) -> None:
-    """Persist SCADA rows to the database."""
+def store_scada_frame(df: pd.DataFrame) -> None:
+    """Bulk-load a normalized SCADA frame with ``COPY ... FROM STDIN``."""
 
-    conn = psycopg2.connect(
-        host=PGHOST, port=PGPORT, user=PGUSER, password=PGPASSWORD, dbname=PGDATABASE
-    )
-    with conn:
+    buf = io.StringIO()
+    df.to_csv(buf, header=False, index=False)
+    buf.seek(0)
+    with db.connection() as conn, conn:
         with conn.cursor() as cur:
-            execute_batch(
-                cur,
-                """
-                INSERT INTO snapshot_scada (
-                    well_id, timestamp, flow_rate, pressure, temperature, volume, source_file
-                ) VALUES (
-                    %(well_id)s, %(timestamp)s, %(flow_rate)s, %(pressure)s, %(temperature)s, %(volume)s, %(source_file)s
-                )
-                """,
-                rows,
-            )
-    conn.close()
+            copy_csv(cur, "snapshot_scada", SCADA_COLUMNS, buf)
 
 
 def store_wellfile_rows(rows: list[Dict[str, Any]]) -> None:
     """Persist well file rows to the database."""
 
-    conn = psycopg2.connect(
-        host=PGHOST, port=PGPORT, user=PGUSER, password=PGPASSWORD, dbname=PGDATABASE
-    )
-    with conn:
+    with db.connection() as conn, conn:
         with conn.cursor() as cur:
-            execute_batch(
+            copy_rows(
                 cur,
-                """
-                INSERT INTO snapshot_wellfile (
-                    well_id, page, text, source_file
-                ) VALUES (
-                    %(well_id)s, %(page)s, %(text)s, %(source_file)s
-                )
-                """,
-                rows,
+                "snapshot_wellfile",
+                WELLFILE_COLUMNS,
+                ([r[c] for c in WELLFILE_COLUMNS] for r in rows),
             )
-    conn.close()
 
 
 async def process_scada_event(payload: Dict[str, Any]) -> None:
     """Handle scada_ingest_ready event."""
 
-    rows = await asyncio.to_thread(
-        parse_scada_csv, payload["file_path"], payload["well_id"]
-    )
-    await asyncio.to_thread(store_scada_rows, rows)
-
-    snapshots = scada_rows_to_snapshots(rows)
+    frames = iter_scada_frames(payload["file_path"], payload["well_id"])
     count = 0
-    for snap in snapshots:
-        await post_snapshot(snap)
-        count += 1
-
-    await redis_client.publish(
-        INTERPRET_CHANNEL,
-        json.dumps(
-            {
-                "event": "interpret_ready",
-                "well_id": payload["well_id"],
-                "source": "scada",
-            }
-        ),
+    while True:
+        # Parse, persist and emit one chunk at a time to bound memory use
+        frame = await asyncio.to_thread(next, frames, None)
+        if frame is None:
+            break
+        await asyncio.to_thread(store_scada_frame, frame)
+        for snap in scada_rows_to_snapshots(scada_frame_to_rows(frame)):
+            await post_snapshot(snap)
+            count += 1
+
+    await send(
+        redis_client,
+        shard_channel(INTERPRET_CHANNEL, payload["well_id"]),
+        {
+            "event": "interpret_ready",
+            "well_id": payload["well_id"],
+            "source": "scada",
+        },
     )
     logger.info(
         "[EXPRESS] Stored SCADA snapshot", well_id=payload["well_id"], count=count
@@ -412,15 +461,14 @@ async def process_wellfile_event(payload: Dict[str, Any]) -> None:
         await post_snapshot(snap)
         count += 1
 
-    await redis_client.publish(
-        INTERPRET_CHANNEL,
-        json.dumps(
-            {
-                "event": "interpret_ready",
-                "well_id": payload["well_id"],
-                "source": "wellfile",
-            }
-        ),
+    await send(
+        redis_client,
+        shard_channel(INTERPRET_CHANNEL, payload["well_id"]),
+        {
+            "event": "interpret_ready",
+            "well_id": payload["well_id"],
+            "source": "wellfile",
+        },
     )
     logger.info(
         "[EXPRESS] Stored WELLFILE snapshot", well_id=payload["well_id"], count=count
@@ -430,35 +478,46 @@ async def process_wellfile_event(payload: Dict[str, Any]) -> None:
 async def handle_ingest_channel() -> None:
     """Background worker listening for ingest events."""
 
-    pubsub = redis_client.pubsub()
-    await pubsub.subscribe(INGEST_CHANNEL)
+    subscription = AsyncSubscription(redis_client, INGEST_CHANNEL, "express")
     logger.info(f"[EXPRESS] Subscribed to Redis channel '{INGEST_CHANNEL}'")
 
     while True:
-        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.5)
-        if not message:
-            await asyncio.sleep(0.1)
-            continue
-
-        try:
-            payload = json.loads(message["data"])
-            event = payload.get("event")
-            if event == "scada_ingest_ready":
-                await process_scada_event(payload)
-            elif event == "wellfile_ingest_ready":
-                await process_wellfile_event(payload)
-        except Exception as exc:  # pragma: no cover - defensive logging
-            logger.error(f"[EXPRESS] Error handling ingest event: {exc}")
+        for msg_id, payload in await subscription.read(timeout=0.5):
+            try:
+                event = payload.get("event")
+                if event == "scada_ingest_ready":
+                    await process_scada_event(payload)
+                elif event == "wellfile_ingest_ready":
+                    await process_wellfile_event(payload)
+            except Exception as exc:  # pragma: no cover - defensive logging
+                logger.error(f"[EXPRESS] Error handling ingest event: {exc}")
+            await subscription.ack([msg_id])
 
 
 # Startup event: only tasks needing asynchronous context here
 @app.on_event("startup")
 async def startup_event():
-    global model
+    global model, batcher
     model = SentenceTransformer(MODEL_NAME)
+    # Texts seen before skip the model; only misses are batched into encode
+    cache = get_embedding_cache(MODEL_NAME)
+    batcher = EmbeddingBatcher(functools.partial(cache.encode, encoder=model.encode))
+    batcher.start()
     init_db()
-    asyncio.create_task(handle_now_channel())
-    asyncio.create_task(handle_ingest_channel())
+    listener_tasks[:] = [spawn(handle_now_channel()), spawn(handle_ingest_channel())]
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Stop reading, let batches already read finish, then stop the batcher
+    for task in listener_tasks:
+        task.cancel()
+    await asyncio.gather(*listener_tasks, return_exceptions=True)
+    if background_tasks:
+        await asyncio.wait(list(background_tasks), timeout=SHUTDOWN_TIMEOUT)
+    if batcher is not None:
+        await batcher.stop(timeout=SHUTDOWN_TIMEOUT)
+    await redis_client.close()
 
 
 # HTTP API endpoint for single embedding generation
@@ -468,11 +527,10 @@ async def encode(req: EncodeRequest):
         logger.warning("[EXPRESS] Empty text received", uuid=req.uuid)
         raise HTTPException(status_code=400, detail="Input text is empty")
 
-    assert model is not None
+    assert batcher is not None
     cleaned = preprocess_text(req.text)
     with embedding_latency.time():
-        loop = asyncio.get_event_loop()
-        embedding = await loop.run_in_executor(None, model.encode, cleaned)
+        (embedding,) = await batcher.encode([cleaned])
 
     logger.info("[EXPRESS] Encoded via API", uuid=req.uuid)
 
@@ -484,6 +542,53 @@ async def encode(req: EncodeRequest):
     )
 
 
+# HTTP API endpoint for many embeddings in one round-trip
+@app.post("/encode/batch", response_model=EncodeBatchResponse)
+async def encode_many(req: EncodeBatchRequest):
+    """Embed ``texts`` in order.
+
+    With ``format`` "float32" or "float16" the body is the row-major
+    ``count x dim`` matrix as little-endian bytes, described by the
+    ``X-Embedding-Count``, ``X-Embedding-Dim`` and ``X-Embedding-Dtype``
+    headers.
+    """
+    if not req.texts:
+        raise HTTPException(status_code=400, detail="No texts provided")
+    if len(req.texts) > ENCODE_BATCH_MAX_TEXTS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {ENCODE_BATCH_MAX_TEXTS} texts per request"
+        )
+    empty = [i for i, text in enumerate(req.texts) if not text.strip()]
+    if empty:
+        raise HTTPException(status_code=400, detail=f"Input text is empty at index {empty}")
+
+    assert batcher is not None
+    with embedding_latency.time():
+        vectors = await batcher.encode([preprocess_text(text) for text in req.texts])
+    matrix = np.asarray(vectors, dtype=np.float32)
+    count, dim = matrix.shape
+    logger.info("[EXPRESS] Encoded batch via API", count=count, format=req.format)
+
+    if req.format != "json":
+        return Response(
+            content=matrix.astype(np.dtype(req.format).newbyteorder("<")).tobytes(),
+            media_type="application/octet-stream",
+            headers={
+                "X-Embedding-Count": str(count),
+                "X-Embedding-Dim": str(dim),
+                "X-Embedding-Dtype": req.format,
+                "X-Embedding-Model": MODEL_NAME,
+            },
+        )
+    return EncodeBatchResponse(
+        embeddings=matrix.tolist(),
+        count=count,
+        dim=dim,
+        timestamp=datetime.utcnow(),
+        model=MODEL_NAME,
+    )
+
+
 # Enhanced health check endpoint
 @app.get("/health")
 async def detailed_healthcheck():
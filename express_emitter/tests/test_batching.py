@@ -0,0 +1,123 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from shared.batching import EmbeddingBatcher
+
+
+def make_encoder(calls):
+    def encode(texts):
+        calls.append(list(texts))
+        return np.array([[len(t.split()), i] for i, t in enumerate(texts)], dtype=np.float32)
+
+    return encode
+
+
+def test_concurrent_callers_share_encode_calls():
+    calls = []
+
+    async def run():
+        batcher = EmbeddingBatcher(make_encoder(calls), max_batch_size=8, max_wait=0.02)
+        try:
+            results = await asyncio.gather(
+                batcher.encode(["a b", "c d"]),
+                batcher.encode(["e f"]),
+                batcher.encode(["g h"] * 6),
+            )
+        finally:
+            await batcher.stop()
+        return results
+
+    results = asyncio.run(run())
+    assert [len(r) for r in results] == [2, 1, 6]
+    assert calls == [["a b", "c d", "e f"] + ["g h"] * 5, ["g h"]]
+    assert [int(v[1]) for v in results[0]] == [0, 1]
+
+
+def test_texts_are_bucketed_by_length_and_errors_reach_callers():
+    calls = []
+    long_text = " ".join(["word"] * 40)
+
+    async def run():
+        batcher = EmbeddingBatcher(make_encoder(calls), max_batch_size=4, max_wait=0.01, bucket_width=16)
+        try:
+            short, long = await asyncio.gather(
+                batcher.encode(["short one", "short two"]), batcher.encode([long_text])
+            )
+            batcher.encode_fn = lambda texts: 1 / 0
+            with pytest.raises(ZeroDivisionError):
+                await batcher.encode(["boom"])
+        finally:
+            await batcher.stop()
+        return short, long
+
+    short, long = asyncio.run(run())
+    assert sorted(calls) == sorted([["short one", "short two"], [long_text]])
+    assert long[0][0] == 40
+
+
+def test_stop_drains_queued_texts_and_the_running_encode():
+    import threading
+    import time
+
+    started, finished = threading.Event(), []
+
+    def slow_encode(texts):
+        started.set()
+        time.sleep(0.2)
+        finished.append(list(texts))
+        return [[len(t)] for t in texts]
+
+    async def run():
+        batcher = EmbeddingBatcher(slow_encode, max_batch_size=1)
+        first = asyncio.ensure_future(batcher.encode(["one"]))
+        second = asyncio.ensure_future(batcher.encode(["three"]))
+        await asyncio.to_thread(started.wait)
+        await batcher.stop()
+        return await first, await second
+
+    assert asyncio.run(run()) == ([[3]], [[5]])
+    assert finished == [["one"], ["three"]]
+
+
+def test_stop_hands_a_finished_encode_to_its_callers():
+    async def run():
+        loop = asyncio.get_running_loop()
+        batcher = EmbeddingBatcher(make_encoder([]))
+        # The encode finished, but the scheduler was cancelled before answering
+        batcher._encoding = loop.create_future()
+        batcher._encoding.set_result([[1.0], [2.0]])
+        first, second = loop.create_future(), loop.create_future()
+        batcher._in_flight = [("a", first, 0.0), ("b", second, 0.0)]
+        assert batcher._busy()
+        await batcher.stop()
+        return await first, await second
+
+    assert asyncio.run(run()) == ([1.0], [2.0])
+
+
+def test_encode_batch_route_returns_json_or_binary(monkeypatch):
+    import sys
+    import types
+
+    sys.modules.setdefault("openai", types.ModuleType("openai"))
+    from express_emitter import main
+
+    async def run(fmt):
+        monkeypatch.setattr(main, "batcher", EmbeddingBatcher(make_encoder([])))
+        try:
+            return await main.encode_many(main.EncodeBatchRequest(texts=["a b c", "d"], format=fmt))
+        finally:
+            await main.batcher.stop()
+
+    as_json = asyncio.run(run("json"))
+    assert (as_json.count, as_json.dim) == (2, 2)
+    assert as_json.embeddings == [[3.0, 0.0], [1.0, 1.0]]
+
+    for fmt in ("float32", "float16"):
+        resp = asyncio.run(run(fmt))
+        assert resp.headers["X-Embedding-Dtype"] == fmt
+        assert (resp.headers["X-Embedding-Count"], resp.headers["X-Embedding-Dim"]) == ("2", "2")
+        decoded = np.frombuffer(resp.body, dtype=np.dtype(fmt).newbyteorder("<")).reshape(2, 2)
+        assert decoded.tolist() == as_json.embeddings
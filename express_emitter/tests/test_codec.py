@@ -0,0 +1,47 @@
+import json
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from shared.codec import decode_message, encode_message, is_binary
+from shared.redis_utils import _decode
+
+
+def test_vector_messages_round_trip_as_float32_frames():
+    vector = np.random.default_rng(0).random(384, dtype=np.float32)
+    message = {
+        "uuid": "abc",
+        "embedding": vector,
+        "pruned_embedding": vector.tolist(),
+        "tokens": ["pressure", "drop"],
+        "timestamp": datetime(2024, 1, 1),
+    }
+
+    data = encode_message(message)
+    assert is_binary(data)
+    assert len(data) < len(encode_message(message, codec="json")) / 4
+
+    decoded = decode_message(data)
+    assert decoded["uuid"] == "abc"
+    assert decoded["tokens"] == ["pressure", "drop"]
+    assert decoded["timestamp"] == "2024-01-01T00:00:00"
+    assert decoded["embedding"] == vector.tolist()
+    assert decoded["pruned_embedding"] == vector.tolist()
+    assert decode_message(data, arrays=True)["embedding"].dtype == np.float32
+
+
+def test_messages_without_vectors_stay_json_and_both_decode():
+    event = {"event": "interpret_ready", "well_id": "W1", "embedding": []}
+    assert json.loads(encode_message(event)) == event
+    assert json.loads(encode_message({"embedding": np.ones(2)}, codec="json")) == {"embedding": [1.0, 1.0]}
+
+    frame = encode_message({"uuid": "u", "anchored_embedding": [0.5, 1.5]})
+    messages, bad = _decode(
+        [(b"1-0", frame), ("2-0", json.dumps(event).encode()), ("3-0", frame[:10])], "reflect_channel"
+    )
+    assert messages == [("1-0", {"uuid": "u", "anchored_embedding": [0.5, 1.5]}), ("2-0", event)]
+    assert bad == ["3-0"]
+
+    with pytest.raises(ValueError):
+        decode_message(frame[:-4])
@@ -16,7 +16,7 @@ from express_emitter.main import (
     scada_rows_to_snapshots,
     wellfile_rows_to_snapshots,
 )
-from now_ingestor.scada_utils import parse_scada_timestamp
+from shared.scada_utils import parse_scada_timestamp
 
 
 def test_parse_scada_csv():
@@ -65,3 +65,46 @@ def test_parse_wellfile_pdf(tmp_path):
 
     snaps = wellfile_rows_to_snapshots(rows, "abcd")
     assert snaps[0]["source"] == "wellfile"
+
+
+def test_store_scada_frame_streams_copy(tmp_path, monkeypatch):
+    import contextlib
+    from express_emitter import main
+
+    path = tmp_path / "scada.csv"
+    pd.DataFrame(
+        {
+            "DateTime": ["05/07/2024 00:00-01:00", "05/07/2024 01:00-02:00"],
+            "flow_rate_mcf_day": [5.0, None],
+            "static_pressure_psia": [2.0, 2.5],
+            "temperature_degF": [3.0, 3.5],
+            "volume_mcf": [4.0, 4.5],
+        }
+    ).to_csv(path, index=False)
+    frame = next(main.iter_scada_frames(str(path), "w1"))
+
+    copied = {}
+
+    class Cursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def copy_expert(self, statement, data):
+            copied["statement"] = statement
+            copied["data"] = data.read()
+
+    class Conn(contextlib.nullcontext):
+        def cursor(self):
+            return Cursor()
+
+    pool = types.SimpleNamespace(connection=lambda: contextlib.nullcontext(Conn()))
+    monkeypatch.setattr(main, "db", pool)
+    main.store_scada_frame(frame)
+
+    lines = copied["data"].splitlines()
+    assert lines[0] == f"w1,{parse_scada_timestamp('05/07/2024 00:00-01:00')},5.0,2.0,3.0,4.0,{path}"
+    # Missing readings load as NULL
+    assert lines[1].split(",")[2] == ""
@@ -1,17 +1,38 @@
 import os
+import re
 import json
-from typing import List
+import string
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from datetime import datetime
 
-import psycopg2
 import redis
 import spacy
+from psycopg2.extras import execute_values
+
+from shared.database import get_pool
+from shared.logger import logger
+from shared.redis_utils import Subscription, send
+from shared.sharding import shard_channel
 
 
 REDIS_HOST = os.getenv("REDIS_HOST", "genio_redis")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 INTERPRET_CHANNEL = os.getenv("INTERPRET_CHANNEL", "interpret_channel")
 REFLECT_CHANNEL = os.getenv("REFLECT_CHANNEL", "reflect_channel")
+# Snapshot rows interpreted per transaction while draining the backlog
+INTERPRET_BATCH_SIZE = int(os.getenv("INTERPRET_BATCH_SIZE", "200"))
+# Texts per nlp.pipe batch and worker processes used by spaCy
+NLP_BATCH_SIZE = int(os.getenv("NLP_BATCH_SIZE", "256"))
+NLP_N_PROCESS = int(os.getenv("NLP_N_PROCESS", "1"))
+# Noun chunks only need the tagger and parser
+NLP_DISABLE = ["ner", "lemmatizer"]
+# Sentence generated for every snapshot_scada row
+SCADA_TEMPLATE = "At {ts}, pressure was {pressure} psi and flow rate was {flow_rate} bbl/hr."
+# Most recently used value shapes whose noun-chunk patterns are kept
+TEMPLATE_CACHE_SIZE = int(os.getenv("TEMPLATE_CACHE_SIZE", "10000"))
 
 PG_CONFIG = {
     "host": os.getenv("PGHOST", "postgres"),
@@ -22,7 +43,7 @@ PG_CONFIG = {
 }
 
 try:  # pragma: no cover - prefer full model if available
-    nlp = spacy.load("en_core_web_sm")
+    nlp = spacy.load("en_core_web_sm", disable=NLP_DISABLE)
 except Exception:  # pragma: no cover - fallback for tests
     def _simple_noun_phrases(text: str) -> List[str]:
         phrases = []
@@ -43,8 +64,12 @@ except Exception:  # pragma: no cover - fallback for tests
 
             return Doc()
 
+        def pipe(self, texts, batch_size=None, n_process=1):
+            return (self(text) for text in texts)
+
     nlp = _NLP()
 redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
+db = get_pool(**PG_CONFIG)
 
 
 def extract_noun_phrases(text: str) -> List[str]:
@@ -53,102 +78,285 @@ def extract_noun_phrases(text: str) -> List[str]:
     return [chunk.text for chunk in doc.noun_chunks]
 
 
-def get_db_connection():
-    return psycopg2.connect(**PG_CONFIG)
-
-
-def interpret_scada() -> None:
-    conn = get_db_connection()
-    try:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT id, well_id, timestamp, pressure, flow_rate, source_file
-                FROM snapshot_scada
-                WHERE interpreted = false
-                ORDER BY timestamp
-                LIMIT 200
-                """
-            )
-            rows = cur.fetchall()
-
-            for row in rows:
-                rec_id, well_id, ts, pressure, flow_rate, source_file = row
-                ts_fmt = ts.strftime("%H:%M on %b %d")
-                text = f"At {ts_fmt}, pressure was {pressure} psi and flow rate was {flow_rate} bbl/hr."
-                noun_phrases = json.dumps(extract_noun_phrases(text))
-                cur.execute(
-                    """
-                    INSERT INTO interpreted_scada (id, well_id, timestamp, text, noun_phrases, source_file)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    """,
-                    (rec_id, well_id, ts, text, noun_phrases, source_file),
-                )
-                cur.execute(
-                    "UPDATE snapshot_scada SET interpreted = true WHERE id = %s",
-                    (rec_id,),
-                )
-        conn.commit()
-    finally:
-        conn.close()
-
-
-def interpret_wellfile() -> None:
-    conn = get_db_connection()
-    try:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT id, well_id, page, text, source_file
-                FROM snapshot_wellfile
-                WHERE interpreted = false
-                ORDER BY id
-                LIMIT 200
-                """
-            )
-            rows = cur.fetchall()
-
-            for row in rows:
-                rec_id, well_id, page, text, source_file = row
-                noun_phrases = json.dumps(extract_noun_phrases(text))
-                cur.execute(
-                    """
-                    INSERT INTO interpreted_wellfile (id, well_id, page, text, noun_phrases, source_file)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    """,
-                    (rec_id, well_id, page, text, noun_phrases, source_file),
-                )
-                cur.execute(
-                    "UPDATE snapshot_wellfile SET interpreted = true WHERE id = %s",
-                    (rec_id,),
-                )
-        conn.commit()
-    finally:
-        conn.close()
-
-
-def listen_for_signals() -> None:
-    pubsub = redis_client.pubsub()
-    pubsub.subscribe(INTERPRET_CHANNEL)
-
-    for message in pubsub.listen():
-        if message.get("type") != "message":
-            continue
+def extract_noun_phrases_batch(
+    texts: List[str], batch_size: int = NLP_BATCH_SIZE, n_process: int = NLP_N_PROCESS
+) -> List[List[str]]:
+    """Noun phrases for each of ``texts``, parsed in batches with ``nlp.pipe``."""
+    docs = nlp.pipe(texts, batch_size=batch_size, n_process=n_process)
+    return [[chunk.text for chunk in doc.noun_chunks] for doc in docs]
+
+
+Pattern = List[Union[str, Tuple[str]]]
+
+
+class TemplatePhraseCache:
+    """Noun phrases for sentences rendered from a fixed template.
+
+    Sentences whose slot values have the same shape (digits masked, words
+    kept) parse the same way, so spaCy only sees the first sentence of each
+    shape. Its noun chunks are stored as literal text plus slot references
+    and re-filled with the values of later rows. Shapes whose chunks cut
+    through a slot value are not cached and always go to spaCy. Only the
+    ``max_entries`` most recently used shapes are kept. One cache can be
+    shared by the shard listener threads; spaCy runs outside its lock.
+    """
+
+    def __init__(
+        self,
+        template: str,
+        extract_batch: Callable[[List[str]], List[List[str]]],
+        max_entries: int = TEMPLATE_CACHE_SIZE,
+    ):
+        self.parts = list(string.Formatter().parse(template))
+        self.extract_batch = extract_batch
+        self.max_entries = max_entries
+        self._patterns: "OrderedDict[Tuple[str, ...], Optional[List[Pattern]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, values: Dict[str, Any]) -> Tuple[str, List[Tuple[int, int, str]]]:
+        """The sentence for ``values`` and the ``(start, end, field)`` span of each slot."""
+        text, spans = "", []
+        for literal, field, _, _ in self.parts:
+            text += literal
+            if field is not None:
+                value = str(values[field])
+                spans.append((len(text), len(text) + len(value), field))
+                text += value
+        return text, spans
+
+    @staticmethod
+    def _shape(text: str, spans: List[Tuple[int, int, str]]) -> Tuple[str, ...]:
+        return tuple(re.sub(r"\d", "0", text[start:end]) for start, end, _ in spans)
+
+    @staticmethod
+    def _learn(text: str, spans: List[Tuple[int, int, str]], phrases: List[str]) -> Optional[List[Pattern]]:
+        patterns, pos = [], 0
+        for phrase in phrases:
+            start = text.find(phrase, pos)
+            if start < 0:
+                return None
+            end = pos = start + len(phrase)
+            pattern: Pattern = []
+            cursor = start
+            for s_start, s_end, field in spans:
+                if s_end <= start or s_start >= end:
+                    continue
+                if s_start < start or s_end > end:
+                    return None
+                if cursor < s_start:
+                    pattern.append(text[cursor:s_start])
+                pattern.append((field,))
+                cursor = s_end
+            if cursor < end:
+                pattern.append(text[cursor:end])
+            patterns.append(pattern)
+        return patterns
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def _remember(self, shape: Tuple[str, ...], patterns: Optional[List[Pattern]]) -> None:
+        # Called with _lock held
+        self._patterns[shape] = patterns
+        while len(self._patterns) > self.max_entries:
+            self._patterns.popitem(last=False)
+
+    def extract(self, rows: List[Dict[str, Any]]) -> Tuple[List[str], List[List[str]]]:
+        """Sentences and noun phrases for each row of slot ``values``."""
+        rendered = [self.render(values) for values in rows]
+        shapes = [self._shape(text, spans) for text, spans in rendered]
+
+        # Patterns for this call's shapes, which eviction cannot take away
+        known: Dict[Tuple[str, ...], Optional[List[Pattern]]] = {}
+        exemplars: Dict[Tuple[str, ...], int] = {}
+        with self._lock:
+            for i, shape in enumerate(shapes):
+                if shape in known or shape in exemplars:
+                    continue
+                if shape in self._patterns:
+                    self._patterns.move_to_end(shape)
+                    known[shape] = self._patterns[shape]
+                else:
+                    exemplars[shape] = i
+        parsed: Dict[int, List[str]] = {}
+        if exemplars:
+            texts = [rendered[i][0] for i in exemplars.values()]
+            for (shape, i), phrases in zip(exemplars.items(), self.extract_batch(texts)):
+                known[shape] = self._learn(*rendered[i], phrases)
+                parsed[i] = phrases
+            with self._lock:
+                for shape in exemplars:
+                    self._remember(shape, known[shape])
+
+        results: List[Optional[List[str]]] = []
+        unmatched = []
+        for i, ((text, _), shape) in enumerate(zip(rendered, shapes)):
+            patterns = known[shape]
+            if i in parsed:
+                results.append(parsed[i])
+                continue
+            if patterns is None:
+                unmatched.append(i)
+                results.append(None)
+                continue
+            values = {field: text[start:end] for start, end, field in rendered[i][1]}
+            results.append([
+                "".join(values[p[0]] if isinstance(p, tuple) else p for p in pattern)
+                for pattern in patterns
+            ])
+        if unmatched:
+            for i, phrases in zip(unmatched, self.extract_batch([rendered[i][0] for i in unmatched])):
+                results[i] = phrases
+        with self._lock:
+            self.misses += len(exemplars) + len(unmatched)
+            self.hits += len(rows) - len(exemplars) - len(unmatched)
+        return [text for text, _ in rendered], results  # type: ignore[return-value]
+
+
+scada_phrases = TemplatePhraseCache(SCADA_TEMPLATE, lambda texts: extract_noun_phrases_batch(texts))
+
+
+def _interpret_scada_batch(cur, well_id: Optional[str], limit: int) -> int:
+    cur.execute(
+        """
+        SELECT id, well_id, timestamp, pressure, flow_rate, source_file
+        FROM snapshot_scada
+        WHERE interpreted = false AND (%s IS NULL OR well_id = %s)
+        ORDER BY timestamp
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+        """,
+        (well_id, well_id, limit),
+    )
+    rows = cur.fetchall()
+    if not rows:
+        return 0
+
+    texts, phrase_lists = scada_phrases.extract([
+        {"ts": ts.strftime("%H:%M on %b %d"), "pressure": pressure, "flow_rate": flow_rate}
+        for _, _, ts, pressure, flow_rate, _ in rows
+    ])
+    records = [
+        (rec_id, row_well, ts, text, json.dumps(phrases), source_file)
+        for (rec_id, row_well, ts, _, _, source_file), text, phrases in zip(rows, texts, phrase_lists)
+    ]
+
+    execute_values(
+        cur,
+        "INSERT INTO interpreted_scada (id, well_id, timestamp, text, noun_phrases, source_file) VALUES %s",
+        records,
+        page_size=limit,
+    )
+    cur.execute(
+        "UPDATE snapshot_scada SET interpreted = true WHERE id = ANY(%s)",
+        ([r[0] for r in records],),
+    )
+    return len(records)
+
+
+def _interpret_wellfile_batch(cur, well_id: Optional[str], limit: int) -> int:
+    cur.execute(
+        """
+        SELECT id, well_id, page, text, source_file
+        FROM snapshot_wellfile
+        WHERE interpreted = false AND (%s IS NULL OR well_id = %s)
+        ORDER BY id
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+        """,
+        (well_id, well_id, limit),
+    )
+    rows = cur.fetchall()
+    if not rows:
+        return 0
+
+    phrases = extract_noun_phrases_batch([row[3] for row in rows])
+    records = [
+        (rec_id, row_well, page, text, json.dumps(found), source_file)
+        for (rec_id, row_well, page, text, source_file), found in zip(rows, phrases)
+    ]
+    execute_values(
+        cur,
+        "INSERT INTO interpreted_wellfile (id, well_id, page, text, noun_phrases, source_file) VALUES %s",
+        records,
+        page_size=limit,
+    )
+    cur.execute(
+        "UPDATE snapshot_wellfile SET interpreted = true WHERE id = ANY(%s)",
+        ([r[0] for r in records],),
+    )
+    return len(records)
+
+
+def _drain(batch: Callable[[Any, Optional[str], int], int], well_id: Optional[str], batch_size: int) -> int:
+    """Run ``batch`` until it finds less than a full batch; commit after each one."""
+    total = 0
+    with db.connection() as conn:
+        while True:
+            with conn.cursor() as cur:
+                done = batch(cur, well_id, batch_size)
+            conn.commit()
+            total += done
+            if done < batch_size:
+                return total
+
+
+def interpret_scada(well_id: Optional[str] = None, batch_size: int = INTERPRET_BATCH_SIZE) -> int:
+    """Interpret every pending SCADA snapshot (of ``well_id`` if given)."""
+    return _drain(_interpret_scada_batch, well_id, batch_size)
+
+
+def interpret_wellfile(well_id: Optional[str] = None, batch_size: int = INTERPRET_BATCH_SIZE) -> int:
+    """Interpret every pending wellfile snapshot (of ``well_id`` if given)."""
+    return _drain(_interpret_wellfile_batch, well_id, batch_size)
+
+
+def interpret_source(source: str, well_id: Optional[str]) -> int:
+    """Interpret the pending rows named by an ``interpret_ready`` event."""
+    if source == "scada":
+        return interpret_scada(well_id)
+    if source == "wellfile":
+        return interpret_wellfile(well_id)
+    return 0
+
+
+def listen_for_signals(
+    channel: str = INTERPRET_CHANNEL,
+    run: Callable[[str, Optional[str]], int] = interpret_source,
+) -> None:
+    """Handle ``interpret_ready`` events from one shard of the interpret channel.
+
+    ``run`` does the interpretation; the service passes one that hands it to
+    its worker processes.
+    """
+    subscription = Subscription(redis_client, channel, "interpret_worker")
+
+    while True:
         try:
-            payload = json.loads(message["data"])
-        except json.JSONDecodeError:
+            messages = subscription.read(timeout=1)
+        except Exception as exc:
+            logger.error("[INTERPRET] Read from %s failed: %s", channel, exc)
+            time.sleep(1)
             continue
-
-        if payload.get("event") == "interpret_ready":
-            src = payload.get("source")
-            well_id = payload.get("well_id")
-            if src == "scada":
-                interpret_scada()
-            elif src == "wellfile":
-                interpret_wellfile()
-            redis_client.publish(
-                REFLECT_CHANNEL,
-                json.dumps(
-                    {"event": "reflect_ready", "well_id": well_id, "source": src}
-                ),
-            )
+        done = []
+        for msg_id, payload in messages:
+            try:
+                if payload.get("event") == "interpret_ready":
+                    src = payload.get("source")
+                    well_id = payload.get("well_id")
+                    run(src, well_id)
+                    send(
+                        redis_client,
+                        shard_channel(REFLECT_CHANNEL, well_id),
+                        {"event": "reflect_ready", "well_id": well_id, "source": src},
+                    )
+                done.append(msg_id)
+            except Exception as exc:
+                # Left unacked: the stream redelivers it once idle
+                logger.error("[INTERPRET] Failed to handle %s on %s: %s", payload, channel, exc)
+        try:
+            subscription.ack(done)
+        except Exception as exc:
+            logger.error("[INTERPRET] Ack on %s failed: %s", channel, exc)
@@ -1,9 +1,12 @@
 from fastapi import FastAPI, HTTPException
-from shared.redis_utils import subscribe, publish
+from shared.redis_utils import consume, publish
 from interpret_worker import listen_for_signals
 from shared.logger import logger
+from shared.sharding import owned_channels
+import asyncio
+import functools
 import threading
-import json
+import time
 import spacy
 import os
 from datetime import datetime
@@ -11,11 +14,22 @@ from typing import List
 from schemas import (
     PruneRequest,
     PruneResponse,
+    PruneBatchRequest,
+    PruneBatchResponse,
     InterpretRequest,
     InterpretResponseLine,
     SnapshotLine,
 )
-from pruning import prune_embedding
+from pruning import prune_batch, prune_embedding
+from reducer import get_reducer
+import svo
+from workers import (
+    INTERPRET_WORKER_MODE,
+    WorkerPool,
+    init_worker,
+    interpret_message,
+    interpret_ready,
+)
 from loguru import logger
 from prometheus_fastapi_instrumentator import Instrumentator
 from prometheus_client import Histogram, Counter
@@ -48,49 +62,70 @@ EXPRESS_CHANNEL = os.getenv("EXPRESS_CHANNEL", "express_channel")
 INTERPRET_CHANNEL = os.getenv("INTERPRET_CHANNEL", "interpret_channel")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# Point at a proxy or a local stub server instead of api.openai.com
+OPENAI_API_BASE = os.getenv("OPENAI_API_BASE")
 SKIP_THREADS = os.getenv("INTERPRET_SKIP_THREADS") == "1"
 
 shutdown_flag = threading.Event()
 
+# spawn re-imports this module as __mp_main__ in each worker process when
+# it is run as a script; only the server process starts threads and a pool
+IS_SERVER = __name__ != "__mp_main__"
+pool = WorkerPool() if INTERPRET_WORKER_MODE == "process" and IS_SERVER and not SKIP_THREADS else None
+if pool is None:
+    init_worker(nlp)
+
+
+def _reduction():
+    """REDUCE_DIM and the current fitted reducer, or ``(None, None)`` when off."""
+    if REDUCE_DIM <= 0:
+        return None, None
+    return REDUCE_DIM, get_reducer()
+
 
 def listener():
-    pubsub = subscribe(EXPRESS_CHANNEL)
+    """Interpret EXPRESS messages and publish the results.
+
+    Messages that fail are left unacked so the consumer group redelivers
+    them; read errors are logged and the loop keeps going.
+    """
+    subscription = consume(EXPRESS_CHANNEL, "interpret")
     logger.info(f"[INTERPRET] Subscribed to '{EXPRESS_CHANNEL}'")
+    reduce_dim = REDUCE_DIM if REDUCE_DIM > 0 else None
 
     while not shutdown_flag.is_set():
-        message = pubsub.get_message(timeout=1)
-        if message and message["type"] == "message":
+        try:
+            messages = subscription.read(timeout=1)
+        except Exception as e:
+            logger.error(f"[INTERPRET] Read from '{EXPRESS_CHANNEL}' failed: {e}")
+            time.sleep(1)
+            continue
+        if pool is not None:
+            # Fan the batch out to the worker processes, publish in order
+            jobs = [pool.submit(interpret_message, data, THRESHOLD, reduce_dim) for _, data in messages]
+            results = [job.exception() or job.result() for job in jobs]
+        else:
+            results = []
+            for _, data in messages:
+                try:
+                    results.append(interpret_message(data, THRESHOLD, reduce_dim))
+                except Exception as e:
+                    results.append(e)
+
+        done = []
+        for (msg_id, _), result in zip(messages, results):
             try:
-                data = json.loads(message["data"])
-                content = data.get("content")
-                embedding = data.get("embedding")
-                uuid = data.get("uuid", datetime.utcnow().isoformat())
-
-                if not embedding:
-                    interpret_errors.inc()
-                    logger.error(f"[INTERPRET] Missing embedding for uuid={uuid}")
-                    continue
-
-                doc = nlp(content)
-                tokens = [token.text for token in doc if not token.is_stop]
+                if isinstance(result, Exception):
+                    raise result
+                downstream_message, prune_seconds = result
+                pruning_latency.observe(prune_seconds)
+                uuid = downstream_message["uuid"]
+                tokens = downstream_message["tokens"]
                 logger.info(f"[INTERPRET] Parsed Tokens: {tokens}")
-
-                with pruning_latency.time():
-                    pruned_embedding, details = prune_embedding(
-                        embedding, THRESHOLD, REDUCE_DIM if REDUCE_DIM > 0 else None
-                    )
                 logger.info(
-                    f"[INTERPRET] Pruned embedding uuid={uuid}, details={details}"
+                    f"[INTERPRET] Pruned embedding uuid={uuid}, details={downstream_message['pruning_details']}"
                 )
 
-                downstream_message = {
-                    "uuid": uuid,
-                    "tokens": tokens,
-                    "pruned_embedding": pruned_embedding,
-                    "pruning_details": details,
-                    "timestamp": datetime.utcnow().isoformat(),
-                }
-
                 publish(INTERPRET_CHANNEL, downstream_message)
                 logger.info(
                     f"[INTERPRET] Published data uuid={uuid} to '{INTERPRET_CHANNEL}'"
@@ -108,21 +143,31 @@ def listener():
                 logger.info(
                     f"[INTERPRET] Published replay to 'memory_replay_channel': {replay_message}"
                 )
+                done.append(msg_id)
 
             except Exception as e:
                 interpret_errors.inc()
                 logger.error(f"[INTERPRET] Error processing message: {e}")
+        try:
+            subscription.ack(done)
+        except Exception as e:
+            logger.error(f"[INTERPRET] Ack on '{EXPRESS_CHANNEL}' failed: {e}")
 
 
 def handle_shutdown(signal_received, frame):
     shutdown_flag.set()
+    if pool is not None:
+        pool.shutdown()
 
 
 signal.signal(signal.SIGINT, handle_shutdown)
 signal.signal(signal.SIGTERM, handle_shutdown)
-if not SKIP_THREADS:
+if not SKIP_THREADS and IS_SERVER:
     threading.Thread(target=listener, daemon=True).start()
-    threading.Thread(target=listen_for_signals, daemon=True).start()
+    # One worker thread per owned shard keeps each well's events in order
+    run = functools.partial(pool.run, interpret_ready) if pool is not None else interpret_ready
+    for shard in owned_channels(INTERPRET_CHANNEL):
+        threading.Thread(target=listen_for_signals, args=(shard, run), daemon=True).start()
 
 
 @app.get("/health")
@@ -136,6 +181,7 @@ def detailed_healthcheck():
     return {
         "status": "active",
         "spacy": spacy_status,
+        "workers": pool.stats() if pool is not None else {"mode": "thread"},
         "timestamp": datetime.utcnow().isoformat(),
     }
 
@@ -151,9 +197,7 @@ async def prune(req: PruneRequest):
         raise HTTPException(status_code=400, detail="Embedding vector missing")
     try:
         with pruning_latency.time():
-            pruned, details = prune_embedding(
-                req.embedding, THRESHOLD, REDUCE_DIM if REDUCE_DIM > 0 else None
-            )
+            pruned, details = prune_embedding(req.embedding, THRESHOLD, *_reduction())
     except Exception as e:
         interpret_errors.inc()
         raise HTTPException(status_code=400, detail=f"Failed to prune embedding: {e}")
@@ -166,39 +210,45 @@ async def prune(req: PruneRequest):
     )
 
 
-def _chunks(items: List[str], size: int = 10) -> List[List[str]]:
-    """Return items in consecutive batches."""
-
-    return [items[i : i + size] for i in range(0, len(items), size)]
+@app.post("/prune/batch", response_model=PruneBatchResponse)
+async def prune_many(req: PruneBatchRequest):
+    if any(not item.embedding for item in req.items):
+        raise HTTPException(status_code=400, detail="Embedding vector missing")
+    try:
+        with pruning_latency.time():
+            pruned, details = await asyncio.to_thread(
+                prune_batch,
+                [item.embedding for item in req.items],
+                THRESHOLD,
+                *_reduction(),
+            )
+    except Exception as e:
+        interpret_errors.inc()
+        raise HTTPException(status_code=400, detail=f"Failed to prune embeddings: {e}")
+
+    now = datetime.utcnow()
+    return PruneBatchResponse(
+        results=[
+            PruneResponse(uuid=item.uuid, pruned_embedding=values, timestamp=now, details=info)
+            for item, values, info in zip(req.items, pruned, details)
+        ]
+    )
 
 
-def extract_svo(lines: List[SnapshotLine]) -> List[dict]:
+async def extract_svo(lines: List[SnapshotLine]) -> List[dict]:
     """Call GPT-4o to parse sentences into subject, verb, object, and tags."""
 
     if not OPENAI_API_KEY:
         raise HTTPException(status_code=500, detail="OpenAI API key not configured")
     openai.api_key = OPENAI_API_KEY
-    sentences = [l.sentence for l in lines]
-    results: List[dict] = []
-    for batch in _chunks(sentences):
-        prompt = (
-            "For each numbered sentence, return JSON with subject, verb, object, "
-            "and a short list of tags. Respond with a JSON array in the same order."\
-            "\n" + "\n".join(f"{i+1}. {s}" for i, s in enumerate(batch))
-        )
-        try:
-            resp = openai.ChatCompletion.create(
-                model=OPENAI_MODEL, messages=[{"role": "user", "content": prompt}]
-            )
-            data = json.loads(resp.choices[0].message["content"])
-        except Exception as e:  # pragma: no cover - network issues
-            interpret_errors.inc()
-            logger.error(f"[INTERPRET] GPT extraction failed: {e}")
-            data = [{} for _ in batch]
-        if not isinstance(data, list):
-            data = [{} for _ in batch]
-        results.extend(data)
-    return results
+    if OPENAI_API_BASE:
+        openai.api_base = OPENAI_API_BASE
+    return await svo.extract_svo(
+        [l.sentence for l in lines],
+        openai.ChatCompletion.create,
+        OPENAI_MODEL,
+        on_error=interpret_errors.inc,
+    )
 
 
 @app.post("/interpret", response_model=List[InterpretResponseLine])
@@ -208,7 +258,7 @@ async def interpret(req: InterpretRequest) -> List[InterpretResponseLine]:
     if not req.lines:
         raise HTTPException(status_code=400, detail="No lines provided")
 
-    parsed = extract_svo(req.lines)
+    parsed = await extract_svo(req.lines)
     enriched: List[InterpretResponseLine] = []
     for line, info in zip(req.lines, parsed):
         enriched.append(
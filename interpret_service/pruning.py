@@ -1,40 +1,98 @@
-from typing import List, Tuple, Optional
+from typing import List, Optional, Sequence, Tuple
 import numpy as np
 from loguru import logger
-from sklearn.decomposition import PCA
 
+# Kept for callers that still pass it; a single threshold pass is idempotent
 MAX_RECURSION_DEPTH = 10
 
+
+def prune_array(values: Sequence[float], threshold: float) -> np.ndarray:
+    """float32 copy of ``values`` without entries whose magnitude is below ``threshold``."""
+    arr = np.asarray(values, dtype=np.float32)
+    return arr[prune_mask(arr, threshold)]
+
+
+def prune_mask(matrix: np.ndarray, threshold: float) -> np.ndarray:
+    """Boolean mask of the entries of ``matrix`` that survive pruning."""
+    return np.abs(matrix) >= threshold
+
+
 def recursive_prune(values: List[float], threshold: float, depth: int = 0) -> List[float]:
-    if depth >= MAX_RECURSION_DEPTH:
-        logger.warning("Maximum recursion depth reached during pruning")
-        return values
-
-    filtered = [v for v in values if abs(v) >= threshold]
-    if len(filtered) == len(values):
-        return filtered
-    return recursive_prune(filtered, threshold, depth + 1)
-
-def prune_embedding(values: List[float], threshold: float, reduce_dim: Optional[int] = None) -> Tuple[List[float], dict]:
-    original_len = len(values)
-    pruned = recursive_prune(values, threshold)
-
-    details = {
-        "original_size": original_len,
-        "pruned_size": len(pruned),
-        "percentage_reduced": round(100 * (1 - len(pruned) / original_len), 2)
+    return prune_array(values, threshold).tolist()
+
+
+def _details(original: int, pruned: int) -> dict:
+    return {
+        "original_size": original,
+        "pruned_size": pruned,
+        "percentage_reduced": round(100 * (1 - pruned / original), 2),
     }
 
-    if reduce_dim and reduce_dim < len(pruned):
-        try:
-            pca = PCA(n_components=reduce_dim)
-            pca_result = pca.fit_transform(np.array(pruned).reshape(1, -1))
-            pruned = pca_result.flatten().tolist()
-            details["reduced_size"] = len(pruned)
-        except Exception as e:
-            logger.error(f"PCA reduction failed: {e}")
-            details["pca_error"] = str(e)
 
-    logger.info("Pruning completed", details=details)
+def _reduce(matrix: np.ndarray, mask: np.ndarray, reduce_dim: int, reducer, details: List[dict]) -> Optional[np.ndarray]:
+    """Project pruned ``matrix`` rows (dropped entries zeroed) with ``reducer``."""
+    if reducer is None:
+        error = "no fitted reducer loaded"
+    elif matrix.shape[1] != reducer.dim:
+        error = f"reducer expects {reducer.dim} dimensions, got {matrix.shape[1]}"
+    else:
+        reduced = reducer.transform(np.where(mask, matrix, 0), reduce_dim)
+        for info in details:
+            info["reduced_size"] = reduced.shape[1]
+        return reduced
+    logger.error(f"PCA reduction failed: {error}")
+    for info in details:
+        info["pca_error"] = error
+    return None
+
+
+def _prune(
+    embeddings: Sequence[Sequence[float]], threshold: float, reduce_dim: Optional[int], reducer
+) -> Tuple[List[List[float]], List[dict]]:
+    if len(embeddings) == 0:
+        return [], []
+    if isinstance(embeddings, np.ndarray) or len({len(e) for e in embeddings}) == 1:
+        groups = [np.asarray(embeddings, dtype=np.float32)]
+    else:
+        groups = [np.asarray([e], dtype=np.float32) for e in embeddings]
+
+    rows: List[List[float]] = []
+    details: List[dict] = []
+    for matrix in groups:
+        mask = prune_mask(matrix, threshold)
+        sizes = mask.sum(axis=1).tolist()
+        infos = [_details(matrix.shape[1], size) for size in sizes]
+        reduced = _reduce(matrix, mask, reduce_dim, reducer, infos) if reduce_dim else None
+        if reduced is not None:
+            rows.extend(reduced.tolist())
+        else:
+            flat = matrix[mask].tolist()
+            offsets = np.cumsum([0] + sizes).tolist()
+            rows.extend(flat[start:end] for start, end in zip(offsets, offsets[1:]))
+        details.extend(infos)
+    return rows, details
+
+
+def prune_embedding(
+    values: List[float], threshold: float, reduce_dim: Optional[int] = None, reducer=None
+) -> Tuple[List[float], dict]:
+    """Prune one embedding; with ``reduce_dim`` it is projected by ``reducer``."""
+    rows, details = _prune([values], threshold, reduce_dim, reducer)
+
+    logger.info("Pruning completed", details=details[0])
+
+    return rows[0], details[0]
+
+
+def prune_batch(
+    embeddings: Sequence[Sequence[float]], threshold: float, reduce_dim: Optional[int] = None, reducer=None
+) -> Tuple[List[List[float]], List[dict]]:
+    """Prune many embeddings with one mask when they share a dimension.
 
-    return pruned, details
+    ``embeddings`` may be a float32 matrix, which is used without copying.
+    Ragged input is pruned one embedding at a time. With ``reduce_dim`` the
+    pruned rows are projected by ``reducer`` in a single matrix multiply.
+    """
+    rows, details = _prune(embeddings, threshold, reduce_dim, reducer)
+    logger.info("Batch pruning completed", count=len(rows))
+    return rows, details
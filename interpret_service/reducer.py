@@ -0,0 +1,160 @@
+"""PCA reducer for pruned embeddings, fit once over the stored corpus.
+
+Fit it offline from the vectors in Qdrant, inside the service container::
+
+    python -m reducer --components 64
+
+``interpret_service`` loads the ``.npz`` from ``REDUCER_PATH`` and reloads it
+whenever the file's mtime changes, so a refit can be dropped in place.
+"""
+
+import argparse
+import os
+import threading
+from typing import Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+REDUCER_PATH = os.getenv("REDUCER_PATH", "/app/models/reducer.npz")
+QDRANT_HOST = os.getenv("QDRANT_HOST", "qdrant")
+QDRANT_PORT = int(os.getenv("QDRANT_PORT", 6333))
+QDRANT_COLLECTION = os.getenv("QDRANT_COLLECTION", "genio_embeddings")
+
+
+class Reducer:
+    """Mean and principal axes of a fitted PCA, applied as one matmul."""
+
+    def __init__(self, mean: np.ndarray, components: np.ndarray, explained_variance_ratio: Optional[np.ndarray] = None):
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.components = np.asarray(components, dtype=np.float32)
+        self.explained_variance_ratio = explained_variance_ratio
+        # Projecting (x - mean) equals x @ W.T - mean @ W.T; keep the offset
+        self._offset = self.mean @ self.components.T
+
+    @property
+    def dim(self) -> int:
+        return self.components.shape[1]
+
+    @property
+    def n_components(self) -> int:
+        return self.components.shape[0]
+
+    def transform(self, matrix: np.ndarray, n_components: Optional[int] = None) -> np.ndarray:
+        """Project the rows of ``matrix`` onto the first ``n_components`` axes."""
+        k = min(n_components or self.n_components, self.n_components)
+        matrix = np.asarray(matrix, dtype=np.float32)
+        return matrix @ self.components[:k].T - self._offset[:k]
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp.npz"
+        np.savez(
+            tmp,
+            mean=self.mean,
+            components=self.components,
+            explained_variance_ratio=self.explained_variance_ratio
+            if self.explained_variance_ratio is not None
+            else np.array([]),
+        )
+        # Readers polling the mtime never see a half-written file
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "Reducer":
+        with np.load(path) as data:
+            ratio = data["explained_variance_ratio"]
+            return cls(data["mean"], data["components"], ratio if ratio.size else None)
+
+
+def fit_reducer(batches: Iterable[np.ndarray], n_components: int) -> Reducer:
+    """Fit ``IncrementalPCA`` over ``batches`` of row vectors.
+
+    Batches smaller than ``n_components`` are held back and merged with the
+    next one, as ``partial_fit`` needs at least that many rows; a remainder
+    that never reaches that size is skipped.
+    """
+    from sklearn.decomposition import IncrementalPCA
+
+    pca = IncrementalPCA(n_components=n_components)
+    pending = []
+    rows = 0
+    for batch in batches:
+        pending.append(np.asarray(batch, dtype=np.float32))
+        rows += len(pending[-1])
+        if rows >= n_components:
+            pca.partial_fit(np.concatenate(pending))
+            pending, rows = [], 0
+    if pending:
+        if not hasattr(pca, "components_"):
+            raise ValueError(f"need at least {n_components} vectors to fit, got {rows}")
+        logger.warning(f"[REDUCER] Skipped {rows} trailing vectors smaller than one batch")
+    return Reducer(pca.mean_, pca.components_, pca.explained_variance_ratio_)
+
+
+def iter_qdrant_vectors(client, collection: str, batch_size: int = 1024) -> Iterator[np.ndarray]:
+    """Scroll every vector out of ``collection`` in float32 batches."""
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection,
+            limit=batch_size,
+            offset=offset,
+            with_payload=False,
+            with_vectors=True,
+        )
+        if points:
+            yield np.asarray([p.vector for p in points], dtype=np.float32)
+        if offset is None:
+            break
+
+
+_lock = threading.Lock()
+_loaded: Tuple[Optional[float], Optional[Reducer]] = (None, None)
+
+
+def get_reducer(path: str = REDUCER_PATH) -> Optional[Reducer]:
+    """The reducer saved at ``path``, reloaded when the file changes."""
+    global _loaded
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return None
+    if _loaded[0] == mtime:
+        return _loaded[1]
+    with _lock:
+        if _loaded[0] != mtime:
+            try:
+                reducer = Reducer.load(path)
+            except Exception as e:
+                logger.error(f"[REDUCER] Failed to load {path}: {e}")
+                return _loaded[1]
+            logger.info(f"[REDUCER] Loaded {reducer.n_components}x{reducer.dim} reducer from {path}")
+            _loaded = (mtime, reducer)
+        return _loaded[1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fit the embedding reducer from Qdrant")
+    parser.add_argument("--components", type=int, default=64)
+    parser.add_argument("--collection", default=QDRANT_COLLECTION)
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--out", default=REDUCER_PATH)
+    args = parser.parse_args()
+
+    from qdrant_client import QdrantClient
+
+    client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+    reducer = fit_reducer(
+        iter_qdrant_vectors(client, args.collection, args.batch_size), args.components
+    )
+    reducer.save(args.out)
+    kept = float(np.sum(reducer.explained_variance_ratio))
+    logger.info(
+        f"[REDUCER] Saved {reducer.n_components}x{reducer.dim} reducer to {args.out} "
+        f"({kept:.1%} of variance kept)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,16 @@ class PruneResponse(BaseModel):
     details: dict
 
 
+class PruneBatchRequest(BaseModel):
+    """Request body for the /prune/batch endpoint."""
+
+    items: List[PruneRequest]
+
+
+class PruneBatchResponse(BaseModel):
+    results: List[PruneResponse]
+
+
 class SnapshotLine(BaseModel):
     """Input line containing a sentence and metadata."""
 
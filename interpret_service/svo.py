@@ -0,0 +1,129 @@
+"""Subject/verb/object extraction with GPT, fanned out over sentence chunks.
+
+Chunks are sent concurrently, at most ``SVO_CONCURRENCY`` at a time, with
+the blocking OpenAI call run in a worker thread through the shared LLM
+cache. Failed calls are retried with exponential backoff. Each request gets ``SVO_TOKEN_BUDGET`` tokens;
+chunks that would exceed it are not sent and come back empty.
+"""
+
+import asyncio
+import json
+import os
+import random
+from typing import Any, Callable, List, Optional
+
+from loguru import logger
+
+from shared.llm import Completion, complete
+
+SVO_CHUNK_SIZE = int(os.getenv("SVO_CHUNK_SIZE", "10"))
+SVO_CONCURRENCY = int(os.getenv("SVO_CONCURRENCY", "4"))
+SVO_MAX_RETRIES = int(os.getenv("SVO_MAX_RETRIES", "3"))
+# First retry delay in seconds; doubles on each attempt
+SVO_RETRY_DELAY = float(os.getenv("SVO_RETRY_DELAY", "0.5"))
+# Tokens one /interpret request may spend; 0 disables the limit
+SVO_TOKEN_BUDGET = int(os.getenv("SVO_TOKEN_BUDGET", "50000"))
+# Rough completion size per sentence, used until the real usage is known
+COMPLETION_TOKENS_PER_SENTENCE = 40
+
+PROMPT = (
+    "For each numbered sentence, return JSON with subject, verb, object, "
+    "and a short list of tags. Respond with a JSON array in the same order."
+)
+
+
+def build_prompt(batch: List[str]) -> str:
+    return PROMPT + "\n" + "\n".join(f"{i+1}. {s}" for i, s in enumerate(batch))
+
+
+def estimate_tokens(prompt: str, sentences: int) -> int:
+    """About four characters per token, plus the expected completion."""
+    return len(prompt) // 4 + 1 + COMPLETION_TOKENS_PER_SENTENCE * sentences
+
+
+class TokenBudget:
+    """Tokens left for one request; ``limit=0`` means unlimited."""
+
+    def __init__(self, limit: int) -> None:
+        self.remaining: Optional[int] = limit or None
+
+    def reserve(self, tokens: int) -> bool:
+        if self.remaining is None:
+            return True
+        if tokens > self.remaining:
+            return False
+        self.remaining -= tokens
+        return True
+
+    def settle(self, reserved: int, used: int) -> None:
+        """Swap a reservation for the tokens the call actually used."""
+        if self.remaining is not None:
+            self.remaining += reserved - used
+
+
+async def _complete(
+    create: Callable[..., Any], model: str, prompt: str, retries: int, delay: float
+) -> Completion:
+    for attempt in range(retries + 1):
+        try:
+            return await asyncio.to_thread(
+                complete,
+                create,
+                model,
+                [{"role": "user", "content": prompt}],
+                validate=json.loads,
+            )
+        except Exception as e:
+            if attempt == retries:
+                raise
+            wait = delay * 2 ** attempt * (1 + random.random())
+            logger.warning(f"[INTERPRET] GPT call failed ({e}); retry {attempt + 1} in {wait:.2f}s")
+            await asyncio.sleep(wait)
+
+
+async def extract_svo(
+    sentences: List[str],
+    create: Callable[..., Any],
+    model: str,
+    chunk_size: int = SVO_CHUNK_SIZE,
+    concurrency: int = SVO_CONCURRENCY,
+    token_budget: int = SVO_TOKEN_BUDGET,
+    retries: int = SVO_MAX_RETRIES,
+    retry_delay: float = SVO_RETRY_DELAY,
+    on_error: Callable[[], Any] = lambda: None,
+) -> List[dict]:
+    """One ``{subject, verb, object, tags}`` dict per sentence, ``{}`` on failure."""
+    semaphore = asyncio.Semaphore(concurrency)
+    budget = TokenBudget(token_budget)
+
+    async def run(batch: List[str]) -> List[dict]:
+        prompt = build_prompt(batch)
+        reserved = estimate_tokens(prompt, len(batch))
+        async with semaphore:
+            if not budget.reserve(reserved):
+                logger.warning(f"[INTERPRET] Token budget spent; skipped {len(batch)} sentences")
+                return [{} for _ in batch]
+            try:
+                resp = await _complete(create, model, prompt, retries, retry_delay)
+            except Exception as e:
+                budget.settle(reserved, 0)
+                on_error()
+                logger.error(f"[INTERPRET] GPT extraction failed: {e}")
+                return [{} for _ in batch]
+        used = resp.total_tokens
+        budget.settle(reserved, reserved if used is None else used)
+        try:
+            data = json.loads(resp.content)
+        except Exception as e:
+            on_error()
+            logger.error(f"[INTERPRET] GPT returned unparseable output: {e}")
+            data = None
+        if not isinstance(data, list):
+            return [{} for _ in batch]
+        # Keep every chunk aligned with its sentences
+        data = [d if isinstance(d, dict) else {} for d in data]
+        return (data + [{} for _ in batch])[: len(batch)]
+
+    chunks = [sentences[i : i + chunk_size] for i in range(0, len(sentences), chunk_size)]
+    results = await asyncio.gather(*(run(batch) for batch in chunks))
+    return [info for chunk in results for info in chunk]
@@ -20,7 +20,7 @@ sys.modules["openai"].ChatCompletion = types.SimpleNamespace(
 spacy.load = lambda name: spacy.blank("en")
 
 sys.modules["shared.redis_utils"] = types.SimpleNamespace(
-    subscribe=lambda *a, **k: types.SimpleNamespace(get_message=lambda timeout=None: None),
+    consume=lambda *a, **k: types.SimpleNamespace(read=lambda timeout=None: [], ack=lambda ids: 0),
     publish=lambda *a, **k: None,
 )
 
@@ -53,3 +53,56 @@ def test_interpret_route():
     assert data[0]["verb"] == "v"
     assert data[0]["object"] == "o"
     assert data[0]["tags"] == ["t"]
+
+
+def test_prune_batch_route():
+    resp = client.post(
+        "/prune/batch",
+        json={
+            "items": [
+                {"uuid": "a", "embedding": [0.5, 0.01, -0.25]},
+                {"uuid": "b", "embedding": [0.02, 0.75]},
+            ]
+        },
+    )
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert [r["uuid"] for r in results] == ["a", "b"]
+    assert [r["pruned_embedding"] for r in results] == [[0.5, -0.25], [0.75]]
+    assert results[1]["details"]["percentage_reduced"] == 50.0
+
+
+def test_listener_acks_only_published_messages(monkeypatch):
+    acked, published = [], []
+
+    class FakeSubscription:
+        reads = 0
+
+        def read(self, timeout):
+            FakeSubscription.reads += 1
+            if FakeSubscription.reads == 1:
+                raise ConnectionError("redis restarting")
+            if FakeSubscription.reads > 2:
+                main.shutdown_flag.set()
+                return []
+            return [("1-0", {"uuid": "bad"}), ("2-0", {"uuid": "ok"})]
+
+        def ack(self, ids):
+            acked.extend(ids)
+
+    def interpret_message(data, threshold, reduce_dim):
+        if data["uuid"] == "bad":
+            raise ValueError("no embedding")
+        message = {"uuid": data["uuid"], "tokens": [], "pruning_details": {}, "timestamp": "t"}
+        return message, 0.0
+
+    monkeypatch.setattr(main, "consume", lambda *a: FakeSubscription())
+    monkeypatch.setattr(main, "interpret_message", interpret_message)
+    monkeypatch.setattr(main, "publish", lambda channel, msg: published.append(msg["uuid"]))
+    monkeypatch.setattr(main.time, "sleep", lambda s: None)
+    try:
+        main.listener()
+    finally:
+        main.shutdown_flag.clear()
+    assert acked == ["2-0"]
+    assert published == ["ok", "ok"]
@@ -0,0 +1,166 @@
+import contextlib
+import os
+import sys
+import types
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+from interpret_service import interpret_worker
+
+
+def test_interpret_scada_drains_backlog_in_batches(monkeypatch):
+    ts = datetime(2024, 5, 7, 12, 0)
+    backlog = [(i, "w1", ts, 88.0, 1.5, "f.csv") for i in range(5)]
+    statements = []
+    inserted = []
+
+    class Cursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, sql, params):
+            statements.append(" ".join(sql.split()))
+            if sql.lstrip().startswith("SELECT"):
+                limit = params[-1]
+                self.rows, backlog[:limit] = backlog[:limit], []
+
+        def fetchall(self):
+            return self.rows
+
+    commits = []
+    conn = types.SimpleNamespace(cursor=Cursor, commit=lambda: commits.append(1))
+    pool = types.SimpleNamespace(connection=lambda: contextlib.nullcontext(conn))
+    monkeypatch.setattr(interpret_worker, "db", pool)
+    monkeypatch.setattr(
+        interpret_worker,
+        "execute_values",
+        lambda cur, sql, records, page_size: inserted.append(records),
+    )
+
+    assert interpret_worker.interpret_scada("w1", batch_size=2) == 5
+    assert [len(batch) for batch in inserted] == [2, 2, 1]
+    updates = [s for s in statements if s.startswith("UPDATE")]
+    assert updates == ["UPDATE snapshot_scada SET interpreted = true WHERE id = ANY(%s)"] * 3
+    assert len(commits) == 3
+    assert inserted[0][0][3] == "At 12:00 on May 07, pressure was 88.0 psi and flow rate was 1.5 bbl/hr."
+
+
+def test_template_cache_parses_each_value_shape_once():
+    parsed = []
+
+    def extract_batch(texts):
+        parsed.extend(texts)
+        return [["pressure", text.split()[7] + " psi", "flow rate"] for text in texts]
+
+    cache = interpret_worker.TemplatePhraseCache(interpret_worker.SCADA_TEMPLATE, extract_batch)
+    rows = [
+        {"ts": "12:00 on May 07", "pressure": p, "flow_rate": 1.5}
+        for p in (88.0, 91.5, 90.25, 12.75)
+    ]
+    texts, phrases = cache.extract(rows)
+
+    assert texts[1] == "At 12:00 on May 07, pressure was 91.5 psi and flow rate was 1.5 bbl/hr."
+    assert phrases == [["pressure", f"{p} psi", "flow rate"] for p in ("88.0", "91.5", "90.25", "12.75")]
+    assert parsed == [texts[0], texts[2]]
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_template_cache_keeps_one_entry_per_shape_and_is_bounded():
+    parsed = []
+
+    def extract_batch(texts):
+        parsed.extend(texts)
+        return [["pressure", text.split()[7] + " psi", "flow rate"] for text in texts]
+
+    cache = interpret_worker.TemplatePhraseCache(
+        interpret_worker.SCADA_TEMPLATE, extract_batch, max_entries=2
+    )
+    _, first = cache.extract([{"ts": "12:00 on May 07", "pressure": 88.0, "flow_rate": 1.5}])
+    _, second = cache.extract([{"ts": "12:05 on May 07", "pressure": 91.5, "flow_rate": 2.5}])
+
+    assert first == [["pressure", "88.0 psi", "flow rate"]]
+    assert second == [["pressure", "91.5 psi", "flow rate"]]
+    assert len(cache) == 1 and len(parsed) == 1
+
+    rows = [{"ts": "12:00 on May 07", "pressure": p, "flow_rate": 1.5} for p in (1.5, 100.25, 7.0)]
+    _, phrases = cache.extract(rows)
+    assert phrases == [["pressure", f"{p} psi", "flow rate"] for p in ("1.5", "100.25", "7.0")]
+    assert len(cache) == 2
+
+
+def test_template_cache_is_shared_safely_by_shard_threads():
+    import threading
+
+    cache = interpret_worker.TemplatePhraseCache(
+        "Well {name} shut in.", lambda texts: [[t.split()[1]] for t in texts], max_entries=2
+    )
+    errors = []
+
+    def shard(offset):
+        try:
+            for n in range(200):
+                name = "w" + "1" * ((n + offset) % 6)
+                _, phrases = cache.extract([{"name": name}])
+                assert phrases == [[name]]
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=shard, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert len(cache) == 2
+    assert cache.hits + cache.misses == 800
+
+
+def test_template_cache_falls_back_when_a_chunk_splits_a_slot():
+    cache = interpret_worker.TemplatePhraseCache(
+        "Well {name} shut in.", lambda texts: [[t.split()[1][:3]] for t in texts]
+    )
+    texts, phrases = cache.extract([{"name": "alpha"}, {"name": "bravo"}])
+    assert phrases == [["alp"], ["bra"]]
+    assert cache.misses == 2
+
+
+def test_failed_signals_stay_unacked_and_the_listener_keeps_going(monkeypatch):
+    acked, sent = [], []
+
+    class FakeSubscription:
+        reads = 0
+
+        def __init__(self, *args):
+            pass
+
+        def read(self, timeout):
+            FakeSubscription.reads += 1
+            if FakeSubscription.reads > 1:
+                raise KeyboardInterrupt  # stop the loop
+            return [
+                ("1-0", {"event": "interpret_ready", "source": "scada", "well_id": "bad"}),
+                ("2-0", {"event": "interpret_ready", "source": "scada", "well_id": "ok"}),
+            ]
+
+        def ack(self, ids):
+            acked.extend(ids)
+
+    def run(source, well_id):
+        if well_id == "bad":
+            raise RuntimeError("postgres went away")
+        return 1
+
+    monkeypatch.setattr(interpret_worker, "Subscription", FakeSubscription)
+    monkeypatch.setattr(interpret_worker, "send", lambda client, channel, msg: sent.append(msg))
+    try:
+        interpret_worker.listen_for_signals("interpret_channel:0", run=run)
+    except KeyboardInterrupt:
+        pass
+    assert acked == ["2-0"]
+    assert [m["well_id"] for m in sent] == ["ok"]
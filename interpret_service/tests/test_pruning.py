@@ -0,0 +1,26 @@
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+from interpret_service.pruning import prune_batch, prune_embedding
+
+
+def test_prune_embedding_drops_small_values_in_one_pass():
+    pruned, details = prune_embedding([0.5, -0.05, -0.25, 0.0], 0.1)
+    assert pruned == [0.5, -0.25]
+    assert details == {"original_size": 4, "pruned_size": 2, "percentage_reduced": 50.0}
+
+
+def test_prune_batch_matches_single_pruning():
+    rng = np.random.default_rng(0)
+    square = rng.normal(scale=0.2, size=(8, 16)).tolist()
+    ragged = [[0.3, 0.01], [0.02, -0.4, 0.5]]
+    for embeddings in (square, ragged):
+        pruned, details = prune_batch(embeddings, 0.1)
+        expected = [prune_embedding(e, 0.1) for e in embeddings]
+        assert pruned == [p for p, _ in expected]
+        assert details == [d for _, d in expected]
@@ -0,0 +1,66 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+from interpret_service import reducer as reducer_mod
+from interpret_service.pruning import prune_batch, prune_embedding
+
+
+def corpus(rows=300, dim=32):
+    rng = np.random.default_rng(0)
+    basis = rng.normal(size=(4, dim))
+    return (rng.normal(size=(rows, 4)) @ basis + rng.normal(scale=0.01, size=(rows, dim))).astype(np.float32)
+
+
+def test_incremental_fit_matches_sklearn_and_round_trips(tmp_path):
+    from sklearn.decomposition import IncrementalPCA
+
+    data = corpus()
+    # The 3-row tail is smaller than n_components and is left out
+    batches = [data[i : i + 99] for i in range(0, len(data), 99)]
+    fitted = reducer_mod.fit_reducer(batches, n_components=4)
+    pca = IncrementalPCA(n_components=4)
+    for chunk in (data[:99], data[99:198], data[198:297]):
+        pca.partial_fit(chunk)
+    assert np.allclose(fitted.transform(data), pca.transform(data), atol=1e-3)
+
+    path = str(tmp_path / "reducer.npz")
+    fitted.save(path)
+    loaded = reducer_mod.Reducer.load(path)
+    assert np.allclose(loaded.transform(data, 2), fitted.transform(data)[:, :2])
+
+
+def test_get_reducer_reloads_when_the_file_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(reducer_mod, "_loaded", (None, None))
+    path = str(tmp_path / "reducer.npz")
+    assert reducer_mod.get_reducer(path) is None
+
+    reducer_mod.fit_reducer([corpus()], 2).save(path)
+    first = reducer_mod.get_reducer(path)
+    assert first.n_components == 2 and reducer_mod.get_reducer(path) is first
+
+    reducer_mod.fit_reducer([corpus()], 3).save(path)
+    os.utime(path, (0, os.stat(path).st_mtime + 5))
+    assert reducer_mod.get_reducer(path).n_components == 3
+
+
+def test_prune_batch_projects_pruned_rows_in_one_transform():
+    data = corpus(50)
+    fitted = reducer_mod.fit_reducer([corpus()], 4)
+    pruned, details = prune_batch(data, 0.5, reduce_dim=3, reducer=fitted)
+
+    masked = np.where(np.abs(data) >= 0.5, data, 0)
+    assert np.allclose(pruned, fitted.transform(masked, 3), atol=1e-5)
+    assert details[0]["reduced_size"] == 3
+    single, info = prune_embedding(data[0].tolist(), 0.5, reduce_dim=3, reducer=fitted)
+    assert np.allclose(single, pruned[0], atol=1e-5)
+
+    _, details = prune_batch(data, 0.5, reduce_dim=3, reducer=None)
+    assert details[0]["pca_error"] == "no fitted reducer loaded"
+    with pytest.raises(ValueError):
+        reducer_mod.fit_reducer([data[:2]], 4)
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import types
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+from interpret_service import svo
+
+
+def fake_create(latency=0.05, fail_first=0, usage=None):
+    state = {"active": 0, "peak": 0, "calls": 0}
+    lock = threading.Lock()
+
+    def create(model, messages):
+        with lock:
+            state["calls"] += 1
+            calls = state["calls"]
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        try:
+            time.sleep(latency)
+            if calls <= fail_first:
+                raise RuntimeError("rate limited")
+            lines = messages[0]["content"].splitlines()[1:]
+            data = [{"subject": line.split(". ", 1)[1]} for line in lines]
+            return types.SimpleNamespace(
+                choices=[types.SimpleNamespace(message={"content": json.dumps(data)})],
+                usage=usage,
+            )
+        finally:
+            with lock:
+                state["active"] -= 1
+
+    return create, state
+
+
+def test_chunks_run_concurrently_in_order_with_retries():
+    create, state = fake_create(fail_first=1)
+    sentences = [f"s{i}" for i in range(45)]
+    results = asyncio.run(
+        svo.extract_svo(sentences, create, "m", chunk_size=10, concurrency=3, retry_delay=0.01)
+    )
+    assert [r["subject"] for r in results] == sentences
+    assert state["peak"] == 3
+    assert state["calls"] == 6
+
+
+def test_token_budget_skips_chunks_once_spent():
+    errors = []
+    create, state = fake_create(latency=0, usage={"total_tokens": 500})
+    sentences = [f"s{i}" for i in range(30)]
+    results = asyncio.run(
+        svo.extract_svo(
+            sentences, create, "m", chunk_size=10, concurrency=1, token_budget=1000,
+            on_error=lambda: errors.append(1),
+        )
+    )
+    assert state["calls"] == 2
+    assert [bool(r) for r in results] == [True] * 20 + [False] * 10
+    assert errors == []
+
+
+def test_repeated_requests_are_served_from_the_llm_cache(tmp_path, monkeypatch):
+    from shared import llm
+
+    monkeypatch.setattr(llm, "_cache", llm.DiskCache(str(tmp_path), ttl=60, max_entries=10))
+    create, state = fake_create(latency=0, usage={"total_tokens": 10})
+    sentences = ["Pressure  dropped.", "Flow resumed."]
+    first = asyncio.run(svo.extract_svo(sentences, create, "m", chunk_size=1))
+    # Whitespace differences normalize to the same cache key
+    again = asyncio.run(svo.extract_svo(["Pressure dropped.", "Flow resumed."], create, "m", chunk_size=1))
+    assert again == first
+    assert state["calls"] == 2
+
+
+def test_disk_cache_expires_and_evicts_least_recently_used(tmp_path):
+    from shared import llm
+
+    cache = llm.DiskCache(str(tmp_path), ttl=60, max_entries=20)
+    for key in ("a", "b", "c"):
+        cache.set(key, key.upper())
+        os.utime(cache._path(key), (0, time.time() - {"a": 30, "b": 20, "c": 10}[key]))
+    assert cache.get("a") == "A"  # refreshes a's last use
+    cache.max_entries = 2
+    assert cache.evict() == 1
+    assert cache.get("b") is None and cache.get("c") == "C"
+
+    os.utime(cache._path("c"), (0, time.time() - 120))
+    assert cache.get("c") is None
+
+
+def test_redis_cache_keeps_only_the_most_recently_used_entries():
+    import pytest
+
+    fakeredis = pytest.importorskip("fakeredis")
+    from shared import llm
+
+    client = fakeredis.FakeRedis(decode_responses=True)
+    cache = llm.RedisCache(client, ttl=60, max_entries=2)
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"  # a is now newer than b
+    cache.set("c", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+    assert client.zcard(llm.RedisCache.INDEX) == 2
+    assert client.exists("llm:b") == 0
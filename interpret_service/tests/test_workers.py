@@ -0,0 +1,42 @@
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "interpret_service"))
+
+import spacy
+
+import workers
+
+
+def test_interpret_message_tokenizes_and_prunes():
+    workers.init_worker(spacy.blank("en"))
+    message, seconds = workers.interpret_message(
+        {"uuid": "u1", "content": "The pump is running", "embedding": [0.5, 0.01, -0.3]}, 0.1, None
+    )
+    assert message["tokens"] == ["pump", "running"]
+    assert message["pruned_embedding"] == [0.5, -0.30000001192092896]
+    assert message["pruning_details"]["pruned_size"] == 2
+    assert seconds >= 0
+
+
+def test_pool_bounds_jobs_in_flight():
+    pool = workers.WorkerPool(workers=1, queue_size=1, initializer=None)
+    try:
+        first = pool.submit(time.sleep, 0.5)
+        second = pool.submit(time.sleep, 0)
+        assert pool.stats() == {"workers": 1, "busy": 1, "queued": 1}
+
+        submitted = threading.Event()
+        threading.Thread(target=lambda: (pool.submit(abs, -3), submitted.set()), daemon=True).start()
+        assert not submitted.wait(0.1)
+        first.result()
+        second.result()
+        assert submitted.wait(5)
+        assert pool.run(pow, 2, 5) == 32
+        assert pool.stats()["busy"] == 0
+    finally:
+        pool.shutdown()
@@ -0,0 +1,147 @@
+"""CPU-bound interpretation, run in the server process or in a process pool.
+
+With ``INTERPRET_WORKER_MODE=process`` the Redis listeners only read, hand
+work to a ``ProcessPoolExecutor`` and publish results, so spaCy and pruning
+no longer hold the GIL that FastAPI's request handling needs. Each worker
+process loads its own spaCy model in :func:`init_worker`.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from loguru import logger
+from prometheus_client import Gauge
+
+from pruning import prune_embedding
+from reducer import get_reducer
+
+# "thread" keeps all work in the server process; "process" uses the pool
+INTERPRET_WORKER_MODE = os.getenv("INTERPRET_WORKER_MODE", "thread")
+INTERPRET_WORKERS = int(os.getenv("INTERPRET_WORKERS", os.cpu_count() or 1))
+# Jobs waiting for a free worker before listeners block on submit
+INTERPRET_QUEUE_SIZE = int(os.getenv("INTERPRET_QUEUE_SIZE", "64"))
+
+queue_depth = Gauge("interpret_queue_depth", "Jobs waiting for a worker process")
+workers_busy = Gauge("interpret_workers_busy", "Worker processes running a job")
+workers_total = Gauge("interpret_workers", "Worker processes in the pool")
+
+nlp = None
+
+
+def init_worker(model=None) -> None:
+    """Load the spaCy model used for tokenizing, unless one is passed in."""
+    global nlp
+    if model is not None:
+        nlp = model
+        return
+    import spacy
+
+    # Only the tokenizer is used here; stop words are lexical attributes
+    nlp = spacy.load(
+        "en_core_web_sm",
+        exclude=["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner"],
+    )
+
+
+def interpret_message(data: Dict[str, Any], threshold: float, reduce_dim: Optional[int]) -> Tuple[Dict[str, Any], float]:
+    """Tokens and pruned embedding for one express message.
+
+    Returns the downstream message and the seconds spent pruning.
+    """
+    uuid = data.get("uuid", datetime.utcnow().isoformat())
+    embedding = data.get("embedding")
+    if not embedding:
+        raise ValueError(f"Missing embedding for uuid={uuid}")
+
+    doc = nlp.make_doc(data.get("content"))
+    tokens = [token.text for token in doc if not token.is_stop]
+
+    start = time.perf_counter()
+    reducer = get_reducer() if reduce_dim else None
+    pruned_embedding, details = prune_embedding(embedding, threshold, reduce_dim, reducer)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "uuid": uuid,
+        "tokens": tokens,
+        "pruned_embedding": pruned_embedding,
+        "pruning_details": details,
+        "timestamp": datetime.utcnow().isoformat(),
+    }, elapsed
+
+
+def interpret_ready(source: str, well_id: Optional[str]) -> int:
+    """Run :func:`interpret_worker.interpret_source` in this process."""
+    from interpret_worker import interpret_source
+
+    return interpret_source(source, well_id)
+
+
+class WorkerPool:
+    """``ProcessPoolExecutor`` behind a bounded queue.
+
+    ``submit`` blocks once ``workers + queue_size`` jobs are in flight, so a
+    slow pool pushes back on the listeners instead of buffering without
+    limit (with Redis Streams the backlog stays in the stream).
+    """
+
+    def __init__(
+        self,
+        workers: int = INTERPRET_WORKERS,
+        queue_size: int = INTERPRET_QUEUE_SIZE,
+        initializer: Optional[Callable[[], None]] = init_worker,
+    ) -> None:
+        self.workers = workers
+        # spawn: forking would copy the server's threads and open sockets
+        self._executor = ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context("spawn"), initializer=initializer
+        )
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        workers_total.set(workers)
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        self._slots.acquire()
+        with self._lock:
+            self._in_flight += 1
+        self._report()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._done(None)
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Submit ``fn`` and wait for its result."""
+        return self.submit(fn, *args).result()
+
+    def _done(self, _future: Optional[Future]) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+        self._report()
+
+    def _report(self) -> None:
+        in_flight = self._in_flight
+        workers_busy.set(min(in_flight, self.workers))
+        queue_depth.set(max(in_flight - self.workers, 0))
+
+    def stats(self) -> Dict[str, int]:
+        in_flight = self._in_flight
+        return {
+            "workers": self.workers,
+            "busy": min(in_flight, self.workers),
+            "queued": max(in_flight - self.workers, 0),
+        }
+
+    def shutdown(self) -> None:
+        logger.info("[INTERPRET] Shutting down worker pool")
+        self._executor.shutdown(wait=False, cancel_futures=True)
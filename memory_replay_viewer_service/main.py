@@ -2,6 +2,8 @@ from fastapi import FastAPI
 from fastapi.responses import HTMLResponse
 from fastapi.middleware.cors import CORSMiddleware
 from shared.redis_utils import subscribe
+from shared.embedding_cache import get_embedding_cache
+from shared.llm import complete
 from shared.logger import logger
 from shared.config import QDRANT_HOST, QDRANT_PORT
 from sentence_transformers import SentenceTransformer
@@ -17,6 +19,7 @@ latest_replays = []
 
 MODEL_NAME = "all-MiniLM-L6-v2"
 model = SentenceTransformer(MODEL_NAME)
+embedding_cache = get_embedding_cache(MODEL_NAME)
 qdrant_client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
 COLLECTION = "genio_memory"
 
@@ -73,7 +76,7 @@ def get_latest_replays():
 @app.post("/chat")
 async def chat(query: str, well_id: str):
     """Answer questions using memory context from Qdrant."""
-    vector = model.encode(query).tolist()
+    vector = embedding_cache.encode_one(query, model.encode).tolist()
     results = qdrant_client.search(
         collection_name=COLLECTION,
         query_vector=vector,
@@ -89,11 +92,12 @@ async def chat(query: str, well_id: str):
     prompt += f'\n\nQuestion: "{query}"\nAnswer:'
     openai.api_key = OPENAI_API_KEY
     try:
-        completion = openai.ChatCompletion.create(
-            model=OPENAI_MODEL,
-            messages=[{"role": "user", "content": prompt}],
+        completion = complete(
+            openai.ChatCompletion.create,
+            OPENAI_MODEL,
+            [{"role": "user", "content": prompt}],
         )
-        answer = completion.choices[0].message["content"].strip()
+        answer = completion.content.strip()
     except Exception as e:  # pragma: no cover - openai may fail
         logger.error(f"[VIEWER] OpenAI call failed: {e}")
         answer = "Error generating answer"
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 from datetime import datetime
@@ -12,6 +13,10 @@ from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
 from prometheus_fastapi_instrumentator import Instrumentator
 
+from shared.content_store import claim_content, release_content
+from shared.retention import RetentionIndex, parse_timestamp_prefixed, run_retention
+from shared.upload_utils import UploadTooLarge, save_upload
+
 from .utils import classify_filename, generate_file_path
 
 app = FastAPI(title="Genio NOW File Ingestor")
@@ -32,6 +37,9 @@ REDIS_CHANNEL = os.getenv("FILE_CHANNEL", "file_ingest")
 EXPRESS_EMITTER_URL = os.getenv("EXPRESS_EMITTER_URL")
 
 redis_client: Optional[redis.Redis] = None
+retention = RetentionIndex()
+# Periodic sweep, kept so it is not garbage collected and can be cancelled
+retention_task: Optional[asyncio.Task] = None
 
 
 @app.on_event("startup")
@@ -41,17 +49,42 @@ def startup() -> None:
     logger.info("[NOW_FILE] Redis connected", host=REDIS_HOST, port=REDIS_PORT)
 
 
+@app.on_event("startup")
+async def start_retention() -> None:
+    """Index existing raw uploads and expire them on an interval."""
+    global retention_task
+    await asyncio.to_thread(retention.scan, RAW_DATA_ROOT, 3, parse_timestamp_prefixed)
+    retention_task = asyncio.create_task(run_retention(retention))
+
+
+@app.on_event("shutdown")
+async def stop_retention() -> None:
+    if retention_task is not None:
+        retention_task.cancel()
+        await asyncio.gather(retention_task, return_exceptions=True)
+
+
 @app.post("/ingest")
 async def ingest_file(well_id: str = Form(...), file: UploadFile = File(...)) -> dict:
     """Store uploaded file and publish an ingestion event."""
     file_type = classify_filename(file.filename)
-    contents = await file.read()
-    if len(contents) > MAX_FILE_SIZE:
+    path = generate_file_path(RAW_DATA_ROOT, well_id, file_type, file.filename)
+    try:
+        _, digest = await save_upload(file, path, max_size=MAX_FILE_SIZE)
+    except UploadTooLarge:
         raise HTTPException(status_code=400, detail="File too large")
 
-    path = generate_file_path(RAW_DATA_ROOT, well_id, file_type, file.filename)
-    with open(path, "wb") as f:
-        f.write(contents)
+    if redis_client:
+        duplicate_of = claim_content(redis_client, digest, well_id, path)
+        if duplicate_of:
+            os.remove(path)
+            logger.info("[NOW_FILE] Skipped duplicate", file_path=duplicate_of)
+            return {
+                "status": "duplicate",
+                "well_id": well_id,
+                "file_type": file_type,
+                "file_path": duplicate_of,
+            }
 
     payload = {
         "well_id": well_id,
@@ -60,8 +93,13 @@ async def ingest_file(well_id: str = Form(...), file: UploadFile = File(...)) ->
         "timestamp": datetime.utcnow().isoformat(),
     }
     if redis_client:
-        redis_client.publish(REDIS_CHANNEL, json.dumps(payload))
+        try:
+            redis_client.publish(REDIS_CHANNEL, json.dumps(payload))
+        except Exception:
+            release_content(redis_client, digest, well_id)
+            raise
         logger.info("[NOW_FILE] Published", channel=REDIS_CHANNEL, **payload)
+    retention.add(datetime.utcnow(), path)
 
     if EXPRESS_EMITTER_URL:
         try:
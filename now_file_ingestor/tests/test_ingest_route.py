@@ -23,10 +23,23 @@ def _prepare_app():
 class DummyRedis:
     def __init__(self):
         self.published = []
+        self.store = {}
 
     def publish(self, channel: str, message: str) -> None:
         self.published.append((channel, message))
 
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def delete(self, key):
+        self.store.pop(key, None)
+
 
 def test_ingest_file(tmp_path, monkeypatch):
     _prepare_app()
@@ -45,3 +58,62 @@ def test_ingest_file(tmp_path, monkeypatch):
     assert os.path.exists(data["file_path"])
     assert dummy.published
     assert dummy.published[0][0] == "file_ingest"
+
+
+def test_ingest_file_too_large(tmp_path, monkeypatch):
+    _prepare_app()
+    dummy = DummyRedis()
+    monkeypatch.setattr("now_file_ingestor.main.redis_client", dummy)
+    monkeypatch.setattr("now_file_ingestor.main.RAW_DATA_ROOT", str(tmp_path))
+    monkeypatch.setattr("now_file_ingestor.main.MAX_FILE_SIZE", 8)
+
+    client = TestClient(app)
+    resp = client.post(
+        "/ingest",
+        data={"well_id": "w1"},
+        files={"file": ("data.csv", "x,y\n1,2\n3,4", "text/csv")},
+    )
+    assert resp.status_code == 400
+    assert not dummy.published
+    saved = [f for _, _, files in os.walk(tmp_path) for f in files]
+    assert saved == []
+
+
+def test_ingest_duplicate_file(tmp_path, monkeypatch):
+    _prepare_app()
+    dummy = DummyRedis()
+    monkeypatch.setattr("now_file_ingestor.main.redis_client", dummy)
+    monkeypatch.setattr("now_file_ingestor.main.RAW_DATA_ROOT", str(tmp_path))
+
+    client = TestClient(app)
+    first = client.post(
+        "/ingest",
+        data={"well_id": "w1"},
+        files={"file": ("data.csv", "x,y\n1,2", "text/csv")},
+    ).json()
+    second = client.post(
+        "/ingest",
+        data={"well_id": "w1"},
+        files={"file": ("copy.csv", "x,y\n1,2", "text/csv")},
+    ).json()
+
+    assert second["status"] == "duplicate"
+    assert second["file_path"] == first["file_path"]
+    assert len(dummy.published) == 1
+
+
+def test_retention_sweeper_is_cancelled_on_shutdown(tmp_path, monkeypatch):
+    import asyncio
+
+    from now_file_ingestor import main
+
+    monkeypatch.setattr(main, "RAW_DATA_ROOT", str(tmp_path))
+
+    async def run():
+        await main.start_retention()
+        task = main.retention_task
+        assert not task.done()
+        await main.stop_retention()
+        return task
+
+    assert asyncio.run(run()).cancelled()
@@ -3,25 +3,34 @@ from fastapi import (
     UploadFile,
     File,
     HTTPException,
-    BackgroundTasks,
     Body,
     Form,
+    Request,
 )
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 from uuid import uuid4
-from datetime import datetime, timedelta
+from datetime import datetime
+from typing import Optional
+import asyncio
+import json
 import os
-import psycopg2
-from psycopg2.pool import SimpleConnectionPool
 from loguru import logger
-import shutil
 from prometheus_fastapi_instrumentator import Instrumentator
 
+from shared.database import get_pool
 from shared.schemas import NowSignal
-from shared.redis_utils import publish
+from shared.redis_utils import publish, publish_many, r as redis_conn
 import pandas as pd
-from shared.scada_utils import row_to_memory
+from shared.scada_utils import convert_frame
+from shared.upload_utils import UploadTooLarge, save_upload
+from shared.content_store import claim_content, release_content
+from shared.retention import (
+    RetentionIndex,
+    parse_epoch_prefixed,
+    parse_folder_time,
+    run_retention,
+)
 
 # ────────────────────────────────────────────
 # Configuration Constants
@@ -32,6 +41,7 @@ STORAGE_ROOT = "/tmp/ingested_files"
 EXPRESS_CHANNEL = os.getenv("EXPRESS_CHANNEL", "express_channel")
 INGEST_CHANNEL = os.getenv("INGEST_CHANNEL", "ingest_channel")
 DATA_ROOT = os.getenv("DATA_ROOT", "./data")
+SCADA_CHUNK_SIZE = int(os.getenv("SCADA_CHUNK_SIZE", 10000))  # CSV rows per chunk
 
 # ────────────────────────────────────────────
 # FastAPI App Setup
@@ -48,41 +58,46 @@ app.add_middleware(
 
 Instrumentator().instrument(app).expose(app)
 
+# Uploads under STORAGE_ROOT and DATA_ROOT, expired by a periodic sweep
+retention = RetentionIndex()
+# Periodic sweep, kept so it is not garbage collected and can be cancelled
+retention_task: Optional[asyncio.Task] = None
+
 # ────────────────────────────────────────────
 # PostgreSQL Connection Pool
 # ────────────────────────────────────────────
-pool = SimpleConnectionPool(
-    minconn=1,
-    maxconn=10,
-    host=os.getenv("PGHOST", "postgres"),
-    port=os.getenv("PGPORT", "5432"),
+# Shared threaded pool: DB work runs in worker threads, off the event loop
+db = get_pool(
     user=os.getenv("PGUSER", "postgres"),
     password=os.getenv("PGPASSWORD", "postgres"),
     dbname=os.getenv("PGDATABASE", "genio"),
 )
 
 
-def get_db_connection():
-    return pool.getconn()
-
-
-def put_db_connection(conn):
-    pool.putconn(conn)
-
-
 # ────────────────────────────────────────────
 # Startup: Init DB + Storage Dir
 # ────────────────────────────────────────────
 @app.on_event("startup")
-def startup_event():
-    init_db()
+async def startup_event():
+    global retention_task
+    await asyncio.to_thread(init_db)
     os.makedirs(STORAGE_ROOT, exist_ok=True)
+    # Index existing uploads once; new ones are added as they arrive
+    await asyncio.to_thread(retention.scan, STORAGE_ROOT, 1, parse_folder_time)
+    await asyncio.to_thread(retention.scan, DATA_ROOT, 2, parse_epoch_prefixed)
+    retention_task = asyncio.create_task(run_retention(retention))
+
+
+@app.on_event("shutdown")
+async def stop_retention() -> None:
+    if retention_task is not None:
+        retention_task.cancel()
+        await asyncio.gather(retention_task, return_exceptions=True)
 
 
 def init_db():
-    conn = get_db_connection()
     try:
-        with conn.cursor() as cur:
+        with db.connection() as conn, conn.cursor() as cur:
             cur.execute(
                 """
                 CREATE TABLE IF NOT EXISTS ingested_files (
@@ -97,8 +112,6 @@ def init_db():
             logger.info("[NOW] Database initialized successfully")
     except Exception as e:
         logger.error(f"[NOW] DB initialization failed: {e}")
-    finally:
-        put_db_connection(conn)
 
 
 # ────────────────────────────────────────────
@@ -136,54 +149,89 @@ def ingest_signal(signal: NowSignal):
     return {"status": "published"}
 
 
+@app.post("/ingest/batch")
+async def ingest_batch(request: Request):
+    """Publish many NowSignals sent as a JSON array or as NDJSON lines.
+
+    Every signal is validated before anything is published, so a batch is
+    accepted or rejected as a whole.
+    """
+    body = await request.body()
+    ndjson = "ndjson" in request.headers.get("content-type", "")
+    # (where, item) pairs; "where" names the NDJSON line or array index
+    records: list[tuple[str, object]] = []
+    where = "body"
+    try:
+        text = body.decode("utf-8")
+        if ndjson:
+            for line_no, line in enumerate(text.splitlines(), 1):
+                where = f"line {line_no}"
+                if line.strip():
+                    records.append((where, json.loads(line)))
+        else:
+            items = json.loads(text)
+            if not isinstance(items, list):
+                raise HTTPException(status_code=400, detail="Expected a list of signals")
+            records = [(f"signal {idx}", item) for idx, item in enumerate(items)]
+    except UnicodeDecodeError as e:
+        line_no = body[: e.start].count(b"\n") + 1
+        raise HTTPException(status_code=400, detail=f"Invalid UTF-8 at line {line_no}: {e}")
+    except json.JSONDecodeError as e:
+        if not ndjson:
+            where = f"line {e.lineno}"
+        raise HTTPException(status_code=400, detail=f"Invalid JSON at {where}: {e}")
+
+    signals: list[dict] = []
+    errors: list[str] = []
+    for where, item in records:
+        try:
+            signals.append(NowSignal(**item).dict())
+        except (ValidationError, TypeError) as e:
+            errors.append(f"{where}: {e}")
+        except (ValueError, KeyError) as e:
+            raise HTTPException(status_code=400, detail=f"Malformed record at {where}: {e}")
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+
+    published = await asyncio.to_thread(publish_many, "now_channel", signals)
+    logger.info("[NOW] Published NowSignal batch", count=published)
+    return {"status": "published", "count": published}
+
+
 @app.post("/ingest-file", response_model=IngestResponse)
 async def ingest_file(
-    file: UploadFile = File(...), background_tasks: BackgroundTasks = None
+    file: UploadFile = File(...),
 ):
     ext = os.path.splitext(file.filename)[1].lower()
     if ext not in ALLOWED_EXTENSIONS:
         logger.warning(f"[NOW_FILE] Unsupported file type: {ext}")
         raise HTTPException(status_code=400, detail="Unsupported file type")
 
-    content_bytes = await file.read()
-    if len(content_bytes) > MAX_FILE_SIZE:
-        logger.warning(f"[NOW_FILE] File too large: {file.filename}")
-        raise HTTPException(status_code=413, detail="File too large")
-
-    try:
-        text = content_bytes.decode("utf-8")
-    except UnicodeDecodeError:
-        text = content_bytes.decode("utf-8", errors="replace")
-
     uid = str(uuid4())
     ts = datetime.utcnow()
     dir_path = os.path.join(STORAGE_ROOT, ts.strftime("%Y%m%d_%H%M%S"))
-    os.makedirs(dir_path, exist_ok=True)
     file_path = os.path.join(dir_path, f"{uid}{ext}")
 
-    with open(file_path, "wb") as f:
-        f.write(content_bytes)
+    # Indexed first, so the sweeper owns the folder whatever happens next
+    retention.add(ts, dir_path)
+    try:
+        await save_upload(file, file_path, max_size=MAX_FILE_SIZE)
+    except UploadTooLarge:
+        logger.warning(f"[NOW_FILE] File too large: {file.filename}")
+        await asyncio.to_thread(discard_upload, file_path)
+        raise HTTPException(status_code=413, detail="File too large")
 
-    conn = get_db_connection()
     try:
-        with conn.cursor() as cur:
-            cur.execute(
-                "INSERT INTO ingested_files (id, filename, filetype, timestamp) VALUES (%s, %s, %s, %s)",
-                (uid, file.filename, ext.lstrip("."), ts),
-            )
-            conn.commit()
-            logger.info("[NOW_FILE] Logged file ingestion to DB", uuid=uid)
+        preview = await asyncio.to_thread(read_preview, file_path)
+        await asyncio.to_thread(log_ingestion, uid, file.filename, ext.lstrip("."), ts)
+        logger.info("[NOW_FILE] Logged file ingestion to DB", uuid=uid)
     except Exception as e:
         logger.error(f"[NOW_FILE] Failed to log to DB: {e}")
+        await asyncio.to_thread(discard_upload, file_path)
         raise HTTPException(
             status_code=500, detail="Internal server error during DB logging"
         )
-    finally:
-        put_db_connection(conn)
-
-    background_tasks.add_task(cleanup_old_files)
 
-    preview = text[:200]
     logger.info(
         "[NOW_FILE] Ingested file",
         file_name=file.filename,
@@ -204,12 +252,19 @@ async def upload_scada(file: UploadFile = File(...), well_id: str = Form(...)) -
     """Store a SCADA CSV file and publish an ingestion event."""
     ts = int(datetime.utcnow().timestamp())
     filename = f"{uuid4()}_{ts}_{file.filename}"
-    dir_path = os.path.join(DATA_ROOT, well_id)
-    os.makedirs(dir_path, exist_ok=True)
-    file_path = os.path.join(dir_path, filename)
+    file_path = os.path.join(DATA_ROOT, well_id, filename)
 
-    with open(file_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
+    _, digest = await save_upload(file, file_path)
+    duplicate_of = await discard_if_duplicate(file_path, digest, well_id)
+    if duplicate_of:
+        logger.info(
+            "[NOW] Skipped duplicate SCADA file", file_path=duplicate_of, well_id=well_id
+        )
+        return {
+            "status": "SCADA file already ingested",
+            "well_id": well_id,
+            "file_path": duplicate_of,
+        }
 
     payload = {
         "event": "scada_ingest_ready",
@@ -217,7 +272,13 @@ async def upload_scada(file: UploadFile = File(...), well_id: str = Form(...)) -
         "file_path": file_path,
         "source": "scada",
     }
-    publish(INGEST_CHANNEL, payload)
+    try:
+        await asyncio.to_thread(publish, INGEST_CHANNEL, payload)
+    except Exception:
+        await asyncio.to_thread(release_content, redis_conn, digest, well_id)
+        await asyncio.to_thread(discard_upload, file_path)
+        raise
+    retention.add(datetime.utcfromtimestamp(ts), file_path)
     logger.info("[NOW] Stored SCADA file", file_path=file_path, well_id=well_id)
     return {"status": "SCADA file received", "well_id": well_id}
 
@@ -229,12 +290,19 @@ async def upload_wellfile(
     """Store a wellfile PDF and publish an ingestion event."""
     ts = int(datetime.utcnow().timestamp())
     filename = f"{uuid4()}_{ts}_{file.filename}"
-    dir_path = os.path.join(DATA_ROOT, well_id)
-    os.makedirs(dir_path, exist_ok=True)
-    file_path = os.path.join(dir_path, filename)
+    file_path = os.path.join(DATA_ROOT, well_id, filename)
 
-    with open(file_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
+    _, digest = await save_upload(file, file_path)
+    duplicate_of = await discard_if_duplicate(file_path, digest, well_id)
+    if duplicate_of:
+        logger.info(
+            "[NOW] Skipped duplicate wellfile", file_path=duplicate_of, well_id=well_id
+        )
+        return {
+            "status": "Wellfile already ingested",
+            "well_id": well_id,
+            "file_path": duplicate_of,
+        }
 
     payload = {
         "event": "wellfile_ingest_ready",
@@ -242,7 +310,13 @@ async def upload_wellfile(
         "file_path": file_path,
         "source": "wellfile",
     }
-    publish(INGEST_CHANNEL, payload)
+    try:
+        await asyncio.to_thread(publish, INGEST_CHANNEL, payload)
+    except Exception:
+        await asyncio.to_thread(release_content, redis_conn, digest, well_id)
+        await asyncio.to_thread(discard_upload, file_path)
+        raise
+    retention.add(datetime.utcfromtimestamp(ts), file_path)
     logger.info("[NOW] Stored wellfile", file_path=file_path, well_id=well_id)
     return {"status": "Wellfile received", "well_id": well_id}
 
@@ -254,21 +328,11 @@ async def ingest_scada(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="CSV file required")
 
     try:
-        df = pd.read_csv(file.file)
-    except Exception as e:
+        rows_ingested, errors = await asyncio.to_thread(publish_scada_csv, file.file)
+    except ValueError as e:
         logger.error(f"[SCADA] Failed to parse CSV: {e}")
         raise HTTPException(status_code=400, detail="Invalid CSV format")
 
-    rows_ingested = 0
-    errors: list[str] = []
-    for idx, row in df.iterrows():
-        try:
-            memory = row_to_memory(row)
-            publish(EXPRESS_CHANNEL, memory)
-            rows_ingested += 1
-        except Exception as exc:
-            errors.append(f"row {idx}: {exc}")
-
     return {
         "rows_ingested": rows_ingested,
         "success": len(errors) == 0,
@@ -279,8 +343,7 @@ async def ingest_scada(file: UploadFile = File(...)):
 @app.get("/health")
 def detailed_healthcheck():
     try:
-        conn = get_db_connection()
-        conn.close()
+        db.check()
         db_status = "ok"
     except Exception as e:
         db_status = f"error: {str(e)}"
@@ -289,25 +352,80 @@ def detailed_healthcheck():
     return {
         "status": "active",
         "database": db_status,
+        "pool": db.stats(),
         "timestamp": datetime.utcnow().isoformat(),
     }
 
 
 # ────────────────────────────────────────────
-# Background Cleanup
+# Blocking I/O helpers (run via asyncio.to_thread)
 # ────────────────────────────────────────────
-def cleanup_old_files(days: int = 7):
-    cutoff_time = datetime.utcnow() - timedelta(days=days)
-    for folder in os.listdir(STORAGE_ROOT):
-        folder_path = os.path.join(STORAGE_ROOT, folder)
-        if os.path.isdir(folder_path):
+async def discard_if_duplicate(file_path: str, digest: str, well_id: str) -> str | None:
+    """Return the earlier copy of already-ingested content, removing ``file_path``."""
+    duplicate_of = await asyncio.to_thread(
+        claim_content, redis_conn, digest, well_id, file_path
+    )
+    if duplicate_of:
+        await asyncio.to_thread(os.remove, file_path)
+    return duplicate_of
+
+
+def discard_upload(path: str) -> None:
+    """Remove a file from a failed upload, and its folder if nothing else is in it."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    try:
+        os.rmdir(os.path.dirname(path))
+    except OSError:
+        pass  # shared with other uploads, or already gone
+
+
+def read_preview(path: str, chars: int = 200) -> str:
+    # 4 bytes per character covers any UTF-8 text
+    with open(path, "rb") as f:
+        head = f.read(chars * 4)
+    return head.decode("utf-8", errors="replace")[:chars]
+
+
+def log_ingestion(uid: str, filename: str, filetype: str, ts: datetime) -> None:
+    with db.connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            "INSERT INTO ingested_files (id, filename, filetype, timestamp) VALUES (%s, %s, %s, %s)",
+            (uid, filename, filetype, ts),
+        )
+        conn.commit()
+
+
+def publish_scada_csv(fileobj) -> tuple[int, list[str]]:
+    """Convert and publish a SCADA CSV chunk by chunk.
+
+    Raises ``ValueError`` if the CSV cannot be parsed at all.
+    """
+    try:
+        reader = pd.read_csv(fileobj, chunksize=SCADA_CHUNK_SIZE)
+        chunk = next(reader, None)
+    except Exception as e:
+        raise ValueError(str(e)) from e
+
+    # Convert and publish one chunk at a time so memory stays bounded
+    rows_read = 0
+    rows_ingested = 0
+    errors: list[str] = []
+    with reader:
+        while chunk is not None:
+            rows_read += len(chunk)
+            memories, chunk_errors = convert_frame(chunk)
+            rows_ingested += publish_many(EXPRESS_CHANNEL, memories)
+            errors.extend(chunk_errors)
             try:
-                folder_time = datetime.strptime(folder, "%Y%m%d_%H%M%S")
-                if folder_time < cutoff_time:
-                    shutil.rmtree(folder_path)
-                    logger.info(f"[NOW] Removed old folder: {folder_path}")
-            except ValueError:
-                continue
+                chunk = next(reader, None)
+            except Exception as e:
+                logger.error(f"[SCADA] Failed to parse CSV chunk: {e}")
+                errors.append(f"parse error after row {rows_read}: {e}")
+                break
+    return rows_ingested, errors
 
 
 # ────────────────────────────────────────────
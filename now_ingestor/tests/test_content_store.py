@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+from shared import content_store  # noqa: E402
+from shared.content_store import CONTENT_KEY_TTL, claim_content, content_key  # noqa: E402
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def test_claims_expire_with_retention(tmp_path):
+    client = fakeredis.FakeRedis(decode_responses=True)
+    first = tmp_path / "first.csv"
+    first.write_text("x")
+
+    assert claim_content(client, "abc", "w1", str(first)) is None
+    assert claim_content(client, "abc", "w1", str(tmp_path / "second.csv")) == str(first)
+    assert 0 < client.ttl(content_key("abc", "w1")) <= CONTENT_KEY_TTL
+
+
+def test_only_one_caller_replaces_a_stale_claim(tmp_path, monkeypatch):
+    client = fakeredis.FakeRedis(decode_responses=True)
+    key = content_key("abc", "w1")
+    client.set(key, str(tmp_path / "deleted.csv"))
+    winner = tmp_path / "winner.csv"
+    winner.write_text("x")
+
+    real_exists = os.path.exists
+    checks = []
+
+    def exists(path):
+        checks.append(path)
+        # Another ingestor replaces the stale claim between our WATCH and SET
+        if len(checks) == 2:
+            client.set(key, str(winner))
+        return real_exists(path)
+
+    monkeypatch.setattr(content_store.os.path, "exists", exists)
+    assert claim_content(client, "abc", "w1", str(tmp_path / "loser.csv")) == str(winner)
+    assert client.get(key) == str(winner)
+    assert len(checks) == 3  # stale twice, then the winner's copy after the retry
@@ -0,0 +1,90 @@
+import os
+import sys
+import types
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+
+class FakeConn:
+    def __init__(self):
+        self.closed = 0
+
+    def close(self):
+        self.closed = 1
+
+
+class FakePool:
+    """Opens and closes connections through the same hooks as psycopg2's pools."""
+
+    def __init__(self, minconn, maxconn, **params):
+        self.maxconn = maxconn
+        self._pool = []
+        self._used = {}
+
+    def _connect(self, key=None):
+        return FakeConn()
+
+    def _putconn(self, conn, key=None, close=False):
+        self._used.pop(id(conn), None)
+        if close or len(self._pool) >= self.maxconn:
+            conn.close()
+        else:
+            self._pool.append(conn)
+
+    def getconn(self):
+        conn = self._pool.pop() if self._pool else self._connect()
+        self._used[id(conn)] = conn
+        return conn
+
+    def putconn(self, conn, close=False):
+        self._putconn(conn, close=close)
+
+
+sys.modules["psycopg2.pool"] = types.SimpleNamespace(ThreadedConnectionPool=FakePool)
+
+import pytest
+from shared.database import ConnectionPool, PoolTimeout
+
+
+def test_connections_are_reused_until_they_expire():
+    pool = ConnectionPool("test_reuse", maxconn=2, max_lifetime=60)
+    with pool.connection() as first:
+        assert pool.stats()["in_use"] == 1
+    with pool.connection() as again:
+        assert again is first
+    assert pool.stats() == {"in_use": 0, "size": 1, "max": 2}
+
+    pool._born[id(first)] -= 120
+    with pool.connection() as fresh:
+        assert fresh is not first
+    assert first.closed
+
+
+def test_lifetime_counts_from_when_the_connection_was_opened(monkeypatch):
+    import shared.database as database
+
+    now = [1000.0]
+    monkeypatch.setattr(database.time, "monotonic", lambda: now[0])
+    pool = ConnectionPool("test_born", maxconn=2, max_lifetime=60)
+    first = pool.getconn()
+    assert pool._born == {id(first): 1000.0}
+    pool.putconn(first)
+
+    # Idle time in the pool counts towards the lifetime
+    now[0] += 61
+    with pool.connection() as fresh:
+        assert fresh is not first and first.closed
+        assert pool._born == {id(fresh): 1061.0}
+
+    pool.putconn(pool.getconn(), close=True)
+    assert pool._born == {}
+
+
+def test_exhausted_pool_times_out():
+    pool = ConnectionPool("test_timeout", maxconn=1, timeout=0.01)
+    with pool.connection():
+        with pytest.raises(PoolTimeout):
+            pool.getconn()
+    with pool.connection() as conn:
+        assert not conn.closed
@@ -1,6 +1,9 @@
+import io
+import json
 import sys
 import os
 import types
+import pandas as pd
 from fastapi.testclient import TestClient
 
 # Ensure project root on path for module imports
@@ -20,15 +23,35 @@ class DummyPool:
 
 
 dummy_psycopg2 = types.ModuleType("psycopg2")
-dummy_psycopg2.pool = types.SimpleNamespace(SimpleConnectionPool=DummyPool)
+dummy_psycopg2.pool = types.SimpleNamespace(ThreadedConnectionPool=DummyPool)
 sys.modules["psycopg2"] = dummy_psycopg2
-sys.modules["psycopg2.pool"] = types.SimpleNamespace(SimpleConnectionPool=DummyPool)
+sys.modules["psycopg2.pool"] = types.SimpleNamespace(ThreadedConnectionPool=DummyPool)
+
+class DummyRedis:
+    def __init__(self):
+        self.store = {}
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def delete(self, key):
+        self.store.pop(key, None)
+
 
 dummy_redis_utils = types.ModuleType("shared.redis_utils")
+dummy_redis_utils.r = DummyRedis()
 dummy_redis_utils.publish = lambda *args, **kwargs: None
+dummy_redis_utils.publish_many = lambda channel, messages, **kwargs: len(list(messages))
 sys.modules["shared.redis_utils"] = dummy_redis_utils
 
 from now_ingestor.main import app
+from shared.scada_utils import row_to_memory
 
 
 def _prepare_app():
@@ -86,3 +109,158 @@ def test_upload_wellfile(tmp_path, monkeypatch):
     assert os.path.exists(saved_path)
     assert messages["payload"]["well_id"] == "well1"
     assert messages["payload"]["source"] == "wellfile"
+
+
+def test_ingest_scada_matches_row_conversion(monkeypatch):
+    _prepare_app()
+    published = []
+
+    def fake_publish_many(channel: str, messages) -> int:
+        published.extend(messages)
+        return len(messages)
+
+    monkeypatch.setattr("now_ingestor.main.publish_many", fake_publish_many)
+
+    content = (
+        "DateTime,diff_pressure_inH20,static_pressure_psia,temperature_degF,"
+        "volume_mcf,flow_rate_mcf_day,energy_mmbtu,flow_time_pct,alarms\n"
+        "05/07/2024 00:00-01:00,1,2,3,4,5,6,7,\n"
+        "05/07/2024 01:00-02:00,1,2,3,4,5.5,6,7,high\n"
+        "not a date,1,2,3,4,5,6,7,\n"
+    )
+    client = TestClient(app)
+    response = client.post(
+        "/ingest/scada", files={"file": ("scada.csv", content, "text/csv")}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["rows_ingested"] == 2
+    assert not data["success"]
+    assert data["errors"][0].startswith("row 2:")
+
+    df = pd.read_csv(io.StringIO(content))
+    expected = [row_to_memory(row) for _, row in df.iloc[:2].iterrows()]
+    assert published == expected
+
+
+def test_duplicate_upload_is_not_republished(tmp_path, monkeypatch):
+    _prepare_app()
+    published = []
+    monkeypatch.setattr(
+        "now_ingestor.main.publish", lambda channel, payload: published.append(payload)
+    )
+    monkeypatch.setattr("now_ingestor.main.DATA_ROOT", str(tmp_path))
+    monkeypatch.setattr("now_ingestor.main.redis_conn", DummyRedis())
+
+    client = TestClient(app)
+    for _ in range(2):
+        response = client.post(
+            "/now/scada",
+            data={"well_id": "well1"},
+            files={"file": ("data.csv", "a,b\n1,2", "text/csv")},
+        )
+        assert response.status_code == 200
+
+    assert len(published) == 1
+    assert response.json()["file_path"] == published[0]["file_path"]
+    assert os.listdir(os.path.join(tmp_path, "well1")) == [
+        os.path.basename(published[0]["file_path"])
+    ]
+
+
+def test_ingest_batch_json_and_ndjson(monkeypatch):
+    _prepare_app()
+    published = []
+
+    def fake_publish_many(channel: str, messages) -> int:
+        published.append((channel, list(messages)))
+        return len(messages)
+
+    monkeypatch.setattr("now_ingestor.main.publish_many", fake_publish_many)
+    client = TestClient(app)
+    signals = [
+        {"timestamp": "2025-05-15T22:10:00", "source": "edge", "content": "a"},
+        {"timestamp": "2025-05-15T22:10:01", "source": "edge", "content": "b"},
+    ]
+
+    resp = client.post("/ingest/batch", json=signals)
+    assert resp.status_code == 200
+    assert resp.json()["count"] == 2
+
+    ndjson = "\n".join(json.dumps(s) for s in signals)
+    resp = client.post(
+        "/ingest/batch",
+        content=ndjson,
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert resp.json()["count"] == 2
+    assert [ch for ch, _ in published] == ["now_channel", "now_channel"]
+    assert published[1][1][1]["content"] == "b"
+
+
+def test_ingest_batch_rejects_invalid_signal(monkeypatch):
+    _prepare_app()
+    published = []
+    monkeypatch.setattr(
+        "now_ingestor.main.publish_many",
+        lambda channel, messages: published.extend(messages),
+    )
+    client = TestClient(app)
+    resp = client.post(
+        "/ingest/batch",
+        json=[
+            {"timestamp": "2025-05-15T22:10:00", "source": "edge", "content": "a"},
+            {"source": "edge"},
+        ],
+    )
+    assert resp.status_code == 422
+    assert resp.json()["detail"][0].startswith("signal 1:")
+    assert published == []
+
+
+def test_ingest_batch_reports_the_bad_line(monkeypatch):
+    _prepare_app()
+    monkeypatch.setattr("now_ingestor.main.publish_many", lambda channel, messages: 0)
+    client = TestClient(app)
+    ndjson = {"content-type": "application/x-ndjson"}
+    good = b'{"timestamp": "2025-05-15T22:10:00", "source": "edge", "content": "a"}'
+
+    resp = client.post("/ingest/batch", content=good + b"\n{oops\n", headers=ndjson)
+    assert resp.status_code == 400
+    assert "line 2" in resp.json()["detail"]
+
+    resp = client.post("/ingest/batch", content=good + b"\n\xff\xfe\n", headers=ndjson)
+    assert resp.status_code == 400
+    assert "line 2" in resp.json()["detail"]
+
+    resp = client.post("/ingest/batch", content=good + b"\nnot json", headers=ndjson)
+    assert resp.status_code == 400
+
+    resp = client.post("/ingest/batch", content=b"[1, 2", headers={"content-type": "application/json"})
+    assert resp.status_code == 400
+
+
+def test_failed_file_ingest_leaves_nothing_behind(tmp_path, monkeypatch):
+    from now_ingestor import main
+    from shared.retention import RetentionIndex
+
+    _prepare_app()
+    index = RetentionIndex()
+    monkeypatch.setattr(main, "STORAGE_ROOT", str(tmp_path))
+    monkeypatch.setattr(main, "MAX_FILE_SIZE", 4)
+    monkeypatch.setattr(main, "retention", index)
+    client = TestClient(app)
+
+    resp = client.post("/ingest-file", files={"file": ("big.txt", "too large", "text/plain")})
+    assert resp.status_code == 413
+
+    def broken_db(*args):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(main, "MAX_FILE_SIZE", 1024)
+    monkeypatch.setattr(main, "log_ingestion", broken_db)
+    resp = client.post("/ingest-file", files={"file": ("ok.txt", "fine", "text/plain")})
+    assert resp.status_code == 500
+
+    assert os.listdir(tmp_path) == []
+    assert len(index) == 2  # swept later even if removal had failed
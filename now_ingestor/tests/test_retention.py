@@ -0,0 +1,37 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+from shared.retention import RetentionIndex, parse_epoch_prefixed, parse_folder_time
+
+
+def test_sweep_removes_only_expired_folders(tmp_path):
+    now = datetime(2024, 5, 10)
+    old = tmp_path / (now - timedelta(days=8)).strftime("%Y%m%d_%H%M%S")
+    new = tmp_path / (now - timedelta(days=1)).strftime("%Y%m%d_%H%M%S")
+    other = tmp_path / "not_a_timestamp"
+    for path in (old, new, other):
+        path.mkdir()
+
+    index = RetentionIndex(max_age=timedelta(days=7))
+    assert index.scan(str(tmp_path), 1, parse_folder_time) == 2
+
+    assert index.sweep(now) == 1
+    assert not old.exists()
+    assert new.exists() and other.exists()
+    assert len(index) == 1
+
+
+def test_scan_nested_epoch_files(tmp_path):
+    well = tmp_path / "well1"
+    well.mkdir()
+    ts = int(datetime(2024, 1, 1).timestamp())
+    (well / f"abc-123_{ts}_data.csv").write_text("a")
+
+    index = RetentionIndex(max_age=timedelta(days=7))
+    assert index.scan(str(tmp_path), 2, parse_epoch_prefixed) == 1
+    assert index.sweep(datetime(2024, 3, 1)) == 1
+    assert os.listdir(well) == []
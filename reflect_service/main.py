@@ -1,5 +1,7 @@
 from fastapi import FastAPI, HTTPException
 from shared.logger import logger
+from shared.redis_utils import AsyncSubscription, send
+from shared.sharding import owned_channels
 from routes import router
 from validation import validate_embedding
 from schemas import AnchorResponse
@@ -10,7 +12,6 @@ import threading
 from prometheus_fastapi_instrumentator import Instrumentator
 from prometheus_client import Histogram, Counter
 import asyncio
-import json
 import os
 from datetime import datetime
 import signal
@@ -68,31 +69,34 @@ async def handle_message(data):
         summary=summary,
     )
 
-    # Corrected serialization using response.json()
-    await redis_client.publish(REFLECT_CHANNEL, response.json())
+    await send(redis_client, REFLECT_CHANNEL, response.dict())
     logger.info("[REFLECT] Published anchored embedding", uuid=uuid, status=status)
 
 
 async def listener():
-    pubsub = redis_client.pubsub()
-    await pubsub.subscribe(INTERPRET_CHANNEL)
+    subscription = AsyncSubscription(redis_client, INTERPRET_CHANNEL, "reflect")
     logger.info(f"[REFLECT] Subscribed to '{INTERPRET_CHANNEL}'")
 
     while not shutdown_event.is_set():
-        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1)
-        if message:
-            try:
-                data = json.loads(message["data"])
-                asyncio.create_task(handle_message(data))
-            except Exception as e:
+        messages = await subscription.read(timeout=1)
+        if not messages:
+            continue
+        # Validate the batch concurrently, then ack it as a whole
+        results = await asyncio.gather(
+            *(handle_message(data) for _, data in messages), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
                 reflect_errors.inc()
-                logger.error("[REFLECT] Error processing message", error=str(e))
+                logger.error("[REFLECT] Error processing message", error=str(result))
+        await subscription.ack(msg_id for msg_id, _ in messages)
 
 
 @app.on_event("startup")
 async def startup_event():
     asyncio.create_task(listener())
-    threading.Thread(target=listen_for_signals, daemon=True).start()
+    for shard in owned_channels(REFLECT_CHANNEL):
+        threading.Thread(target=listen_for_signals, args=(shard,), daemon=True).start()
 
 
 @app.on_event("shutdown")
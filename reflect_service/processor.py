@@ -1,14 +1,15 @@
-import json
 import os
 import threading
-from typing import List, Any
+from typing import List, Any, Optional
 
 import pandas as pd
-import psycopg2
 from psycopg2.extras import execute_batch
 import redis
 
+from shared.database import get_pool
 from shared.logger import logger
+from shared.redis_utils import Subscription, send
+from shared.sharding import shard_channel
 
 # Environment configuration
 REDIS_HOST = os.getenv("REDIS_HOST", "genio_redis")
@@ -23,17 +24,9 @@ KEYWORDS = ["lease", "permit", "inspection", "abandonment", "test"]
 
 stop_event = threading.Event()
 
-
-def get_db_connection() -> Any:
-    """Create a new PostgreSQL connection."""
-
-    return psycopg2.connect(
-        host=PGHOST,
-        port=PGPORT,
-        user=PGUSER,
-        password=PGPASSWORD,
-        dbname=PGDATABASE,
-    )
+db = get_pool(
+    host=PGHOST, port=PGPORT, user=PGUSER, password=PGPASSWORD, dbname=PGDATABASE
+)
 
 
 def flag_anomalies(df: pd.DataFrame) -> pd.DataFrame:
@@ -64,10 +57,10 @@ def contains_keywords(text: str, keywords: List[str]) -> bool:
     return any(k in lower for k in keywords)
 
 
-def reflect_scada() -> None:
-    """Process unreflected SCADA rows and flag anomalies."""
+def reflect_scada(well_id: Optional[str] = None) -> None:
+    """Process unreflected SCADA rows (of ``well_id`` if given) and flag anomalies."""
 
-    conn = get_db_connection()
+    conn = db.getconn()
     try:
         with conn.cursor() as cur:
             cur.execute(
@@ -75,8 +68,10 @@ def reflect_scada() -> None:
                 SELECT id, well_id, timestamp, text, noun_phrases,
                        pressure, flow_rate, source_file
                 FROM interpreted_scada
-                WHERE reflected = false
-                """
+                WHERE reflected = false AND (%s IS NULL OR well_id = %s)
+                ORDER BY timestamp
+                """,
+                (well_id, well_id),
             )
             rows = cur.fetchall()
 
@@ -130,21 +125,22 @@ def reflect_scada() -> None:
     except Exception as exc:
         logger.error("[REFLECTOR] reflect_scada failed: %s", exc)
     finally:
-        conn.close()
+        db.putconn(conn)
 
 
-def reflect_wellfile() -> None:
-    """Process unreflected WELLFILE rows and flag important clauses."""
+def reflect_wellfile(well_id: Optional[str] = None) -> None:
+    """Process unreflected WELLFILE rows (of ``well_id`` if given) and flag important clauses."""
 
-    conn = get_db_connection()
+    conn = db.getconn()
     try:
         with conn.cursor() as cur:
             cur.execute(
                 """
                 SELECT id, well_id, timestamp, text, noun_phrases, source_file
                 FROM interpreted_wellfile
-                WHERE reflected = false
-                """
+                WHERE reflected = false AND (%s IS NULL OR well_id = %s)
+                """,
+                (well_id, well_id),
             )
             rows = cur.fetchall()
 
@@ -187,42 +183,36 @@ def reflect_wellfile() -> None:
     except Exception as exc:
         logger.error("[REFLECTOR] reflect_wellfile failed: %s", exc)
     finally:
-        conn.close()
+        db.putconn(conn)
 
 
-def listen_for_signals() -> None:
-    """Listen for ``reflect_ready`` events on Redis."""
+def listen_for_signals(channel: str = "reflect_channel") -> None:
+    """Listen for ``reflect_ready`` events on one shard of the reflect channel."""
 
     client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0, decode_responses=True)
-    pubsub = client.pubsub()
-    pubsub.subscribe("reflect_channel")
-    logger.info("[REFLECTOR] Subscribed to 'reflect_channel'")
-
-    for message in pubsub.listen():
-        if stop_event.is_set():
-            break
-        if message.get("type") != "message":
-            continue
-        try:
-            payload = json.loads(message.get("data", "{}"))
-        except json.JSONDecodeError as exc:
-            logger.error("[REFLECTOR] JSON error: %s", exc)
-            continue
-        if payload.get("event") != "reflect_ready":
-            continue
-
-        source = payload.get("source")
-        well_id = payload.get("well_id")
-        if source == "scada":
-            reflect_scada()
-        elif source == "wellfile":
-            reflect_wellfile()
-
-        client.publish(
-            "truth_channel",
-            json.dumps({"event": "truth_ready", "well_id": well_id, "source": source}),
-        )
-        logger.info("[REFLECTOR] Published truth_ready for well %s", well_id)
+    subscription = Subscription(client, channel, "reflect_processor")
+    logger.info("[REFLECTOR] Subscribed to '%s'", channel)
+
+    while not stop_event.is_set():
+        messages = subscription.read(timeout=1)
+        for _, payload in messages:
+            if payload.get("event") != "reflect_ready":
+                continue
+
+            source = payload.get("source")
+            well_id = payload.get("well_id")
+            if source == "scada":
+                reflect_scada(well_id)
+            elif source == "wellfile":
+                reflect_wellfile(well_id)
+
+            send(
+                client,
+                shard_channel("truth_channel", well_id),
+                {"event": "truth_ready", "well_id": well_id, "source": source},
+            )
+            logger.info("[REFLECTOR] Published truth_ready for well %s", well_id)
+        subscription.ack(msg_id for msg_id, _ in messages)
 
 
 def stop_listener() -> None:
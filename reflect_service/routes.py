@@ -6,6 +6,7 @@ from datetime import datetime
 from typing import List
 import os
 import json
+from shared.llm import complete
 from shared.logger import logger
 from schemas import (
     AnchorRequest,
@@ -62,11 +63,13 @@ async def reflect(request: ReflectRequest) -> List[ReflectResponse]:
     joined = "\n".join(request.sentences)
     openai.api_key = OPENAI_API_KEY
     try:
-        completion = openai.ChatCompletion.create(
-            model=OPENAI_MODEL,
-            messages=[{"role": "user", "content": prompt + "\n\n" + joined}],
+        completion = complete(
+            openai.ChatCompletion.create,
+            OPENAI_MODEL,
+            [{"role": "user", "content": prompt + "\n\n" + joined}],
+            validate=json.loads,
         )
-        content = completion.choices[0].message["content"].strip()
+        content = completion.content.strip()
         analysis = json.loads(content)
     except Exception as exc:  # pragma: no cover - network issues
         logger.error(f"[REFLECT] GPT call failed: {exc}")
@@ -48,3 +48,41 @@ def test_flag_anomalies_detects_spike():
 def test_contains_keywords():
     assert contains_keywords("Permit granted for drilling", KEYWORDS)
     assert not contains_keywords("Routine maintenance check", KEYWORDS)
+
+
+def test_reflect_scada_scopes_to_well(monkeypatch):
+    from reflect_service import processor
+
+    executed = []
+
+    class Cursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, sql, params=None):
+            executed.append(params)
+
+        def fetchall(self):
+            return []
+
+    conn = types.SimpleNamespace(cursor=Cursor)
+    pool = types.SimpleNamespace(getconn=lambda: conn, putconn=lambda c: None)
+    monkeypatch.setattr(processor, "db", pool)
+    processor.reflect_scada("well-7")
+    assert executed == [("well-7", "well-7")]
+
+
+def test_shards_partition_wells_between_replicas():
+    from shared.sharding import owned_channels, shard_channel
+
+    owned = [owned_channels("reflect_channel", i, 3, shards=8) for i in range(3)]
+    assert sorted(c for chans in owned for c in chans) == sorted(
+        f"reflect_channel:{s}" for s in range(8)
+    )
+    channel = shard_channel("reflect_channel", "well-7", shards=8)
+    assert channel == shard_channel("reflect_channel", "well-7", shards=8)
+    assert sum(channel in chans for chans in owned) == 1
+    assert owned_channels("reflect_channel", 0, 1, shards=1) == ["reflect_channel"]
@@ -1,6 +1,9 @@
 from fastapi import FastAPI
 from pydantic import BaseModel
 from shared.redis_utils import subscribe, publish
+from shared.database import AsyncConnectionPool, get_async_pool
+from shared.embedding_cache import get_embedding_cache
+from shared.llm import complete
 from shared.logger import logger
 from shared.config import (
     QDRANT_HOST,
@@ -15,7 +18,6 @@ import threading
 import json
 import time
 import os
-import asyncpg
 from sentence_transformers import SentenceTransformer
 from qdrant_client import QdrantClient
 from qdrant_client.http.models import Filter, FieldCondition, MatchValue
@@ -25,6 +27,7 @@ app = FastAPI()
 
 MODEL_NAME = "all-MiniLM-L6-v2"
 model = SentenceTransformer(MODEL_NAME)
+embedding_cache = get_embedding_cache(MODEL_NAME)
 qdrant_client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
 COLLECTION = "genio_memory"
 
@@ -32,7 +35,7 @@ OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 DATABASE_URL = f"postgresql://{PGUSER}:{PGPASSWORD}@{PGHOST}:{PGPORT}/{PGDATABASE}"
-pg_pool: asyncpg.Pool | None = None
+pg_pool: AsyncConnectionPool | None = None
 
 MEMORY_LOG = "/app/memory_log.jsonl"
 CHAT_LOG = "/app/chat_log.jsonl"
@@ -50,7 +53,8 @@ class ChatRequest(BaseModel):
 async def on_startup() -> None:
     """Initialize PostgreSQL connection pool."""
     global pg_pool
-    pg_pool = await asyncpg.create_pool(DATABASE_URL)
+    pg_pool = get_async_pool(dsn=DATABASE_URL)
+    await pg_pool.get_pool()
 
 
 @app.on_event("shutdown")
@@ -95,7 +99,7 @@ threading.Thread(target=listener, daemon=True).start()
 @app.get("/replay/search")
 def search_memory(query: str, well_id: str, top_k: int = 5):
     """Perform semantic search across stored memory vectors."""
-    vector = model.encode(query).tolist()
+    vector = embedding_cache.encode_one(query, model.encode).tolist()
     results = qdrant_client.search(
         collection_name=COLLECTION,
         query_vector=vector,
@@ -138,7 +142,7 @@ async def chat(req: ChatRequest):
     """Answer a question using memory context and GPT-4o."""
 
     # Fetch related memory vectors
-    vector = model.encode(req.question).tolist()
+    vector = embedding_cache.encode_one(req.question, model.encode).tolist()
     results = qdrant_client.search(
         collection_name=COLLECTION,
         query_vector=vector,
@@ -172,11 +176,12 @@ async def chat(req: ChatRequest):
     prompt = "\n".join(prompt_lines)
 
     openai.api_key = OPENAI_API_KEY
-    completion = openai.ChatCompletion.create(
-        model=OPENAI_MODEL,
-        messages=[{"role": "user", "content": prompt}],
+    completion = complete(
+        openai.ChatCompletion.create,
+        OPENAI_MODEL,
+        [{"role": "user", "content": prompt}],
     )
-    answer = completion.choices[0].message["content"].strip()
+    answer = completion.content.strip()
 
     total_tokens = len(prompt.split()) + len(answer.split())
     cost = total_tokens / 1000 * 0.01
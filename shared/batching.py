@@ -0,0 +1,179 @@
+"""Dynamic micro-batching in front of a sentence-embedding model.
+
+Callers on the event loop (HTTP handlers, stream listeners) submit texts
+and await their vectors; one scheduler task merges everything queued into
+``encode`` calls. Texts are bucketed by approximate token count so a batch
+holds similar lengths and little padding. A bucket is sent when it holds
+``max_batch_size`` texts or its oldest text has waited ``max_wait``
+seconds. Only one ``encode`` runs at a time, in a worker thread, so
+batches grow on their own while the model is busy; with the default
+``max_wait`` of 0 an idle model starts on a lone text right away.
+"""
+
+import asyncio
+import os
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from shared.logger import logger
+
+try:  # pragma: no cover - metrics are optional
+    from prometheus_client import Histogram
+except ImportError:  # pragma: no cover
+    Histogram = None
+
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", 64))
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", 0))
+# Texts whose word counts differ by less than this share a bucket
+EMBED_BUCKET_WIDTH = int(os.getenv("EMBED_BUCKET_WIDTH", 16))
+
+if Histogram is not None:
+    batch_sizes = Histogram(
+        "embedding_batch_size", "Texts per encode call", buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+    )
+    queue_wait = Histogram("embedding_queue_wait_seconds", "Time texts wait for a batch")
+else:  # pragma: no cover
+    batch_sizes = queue_wait = None
+
+Pending = Tuple[str, asyncio.Future, float]
+
+
+class EmbeddingBatcher:
+    """Scheduler feeding ``encode`` (e.g. ``SentenceTransformer.encode``)."""
+
+    def __init__(
+        self,
+        encode: Callable[[List[str]], Sequence[Any]],
+        max_batch_size: int = EMBED_MAX_BATCH,
+        max_wait: float = EMBED_MAX_WAIT_MS / 1000,
+        bucket_width: int = EMBED_BUCKET_WIDTH,
+    ) -> None:
+        self.encode_fn = encode
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.bucket_width = max(bucket_width, 1)
+        self._buckets: Dict[int, List[Pending]] = defaultdict(list)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # The encode running in a worker thread, if any, and its texts
+        self._encoding: Optional[asyncio.Future] = None
+        self._in_flight: List[Pending] = []
+
+    def start(self) -> None:
+        """Start the scheduler on the running loop."""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Encode what is queued, wait for the worker thread, then stop.
+
+        Texts still queued after ``timeout`` seconds are cancelled.
+        """
+        if self._task is not None:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            while (self._buckets or self._busy()) and loop.time() < deadline:
+                await asyncio.sleep(0.01)
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._busy():
+            # The thread cannot be interrupted; let it finish
+            await asyncio.wait([self._encoding], timeout=timeout)
+        if self._encoding is not None and self._encoding.done():
+            # It may have finished after the scheduler was cancelled
+            self._deliver()
+        for pending in [self._in_flight, *self._buckets.values()]:
+            for _, future, _ in pending:
+                if not future.done():
+                    future.cancel()
+        self._buckets.clear()
+
+    def _busy(self) -> bool:
+        """Whether an encode is running or its callers have not been answered yet."""
+        if self._encoding is not None and not self._encoding.done():
+            return True
+        return any(not future.done() for _, future, _ in self._in_flight)
+
+    def _deliver(self) -> None:
+        """Hand the finished encode's vectors, or its error, to its callers."""
+        batch, encoding = self._in_flight, self._encoding
+        waiting = [future for _, future, _ in batch if not future.done()]
+        if not waiting or encoding.cancelled():
+            return
+        error = encoding.exception()
+        if error is not None:
+            logger.error(f"[BATCHER] encode failed for {len(batch)} texts: {error}")
+            for future in waiting:
+                future.set_exception(error)
+            return
+        for (_, future, _), vector in zip(batch, encoding.result()):
+            if not future.done():
+                future.set_result(vector)
+
+    async def encode(self, texts: Sequence[str]) -> List[Any]:
+        """One vector per text, in order, encoded together with other callers' texts."""
+        self.start()
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self._buckets[len(text.split()) // self.bucket_width].append((text, future, now))
+            futures.append(future)
+        self._wakeup.set()
+        return list(await asyncio.gather(*futures))
+
+    def _next_batch(self, now: float) -> Tuple[Optional[List[Pending]], Optional[float]]:
+        """The batch to send now, or the seconds until one is due."""
+        due_key, due_at = None, None
+        for key, pending in self._buckets.items():
+            if len(pending) >= self.max_batch_size:
+                due_key, due_at = key, float("-inf")
+                break
+            deadline = pending[0][2] + self.max_wait
+            if due_at is None or deadline < due_at:
+                due_key, due_at = key, deadline
+        if due_key is None:
+            return None, None
+        if due_at > now:
+            return None, due_at - now
+        pending = self._buckets[due_key]
+        batch, self._buckets[due_key] = pending[: self.max_batch_size], pending[self.max_batch_size :]
+        if not self._buckets[due_key]:
+            del self._buckets[due_key]
+        return batch, None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            # Nothing runs between clear() and _next_batch(), so no wakeup is lost
+            self._wakeup.clear()
+            now = loop.time()
+            batch, delay = self._next_batch(now)
+            if batch is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            batch = [item for item in batch if not item[1].cancelled()]
+            if not batch:
+                continue
+            if batch_sizes is not None:
+                batch_sizes.observe(len(batch))
+                for _, _, queued_at in batch:
+                    queue_wait.observe(now - queued_at)
+            self._in_flight = batch
+            self._encoding = asyncio.ensure_future(
+                asyncio.to_thread(self.encode_fn, [text for text, _, _ in batch])
+            )
+            # wait() leaves the encode running if we are cancelled, so
+            # stop() can still collect it
+            await asyncio.wait([self._encoding])
+            self._deliver()
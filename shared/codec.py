@@ -0,0 +1,138 @@
+"""Wire format for messages on the Redis channels.
+
+Messages that carry embeddings are sent as a binary frame instead of JSON::
+
+    b"\\xffGV" | version (1 byte) | header length (uint32 LE) | header | vectors
+
+The header is the JSON of the message without its vector fields, plus the
+name and length of each vector; the vectors follow as little-endian float32
+buffers, back to back. A 384-dim embedding then costs 1.5 KB instead of
+about 8 KB of decimal text, and decoding it is one ``np.frombuffer``.
+
+Vector fields are the top-level keys in ``VECTOR_FIELDS`` holding a list of
+numbers, and any top-level numpy array. Everything else (signals, events)
+stays plain JSON, and :func:`decode_message` accepts both, so producers and
+consumers can be upgraded in any order. ``VECTOR_CODEC=json`` turns the
+frame off.
+
+Frames are not valid UTF-8, so they must be read through a connection
+created with ``decode_responses=False``; ``shared.redis_utils`` subscriptions
+do this on their own.
+"""
+
+import json
+import os
+import struct
+import sys
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Optional, Union
+
+try:  # pragma: no cover - services without numpy fall back to ``array``
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+VECTOR_CODEC = os.getenv("VECTOR_CODEC", "binary").lower()
+VECTOR_FIELDS = frozenset(
+    os.getenv("VECTOR_FIELDS", "embedding,pruned_embedding,anchored_embedding").split(",")
+)
+
+MAGIC = b"\xffGV"
+VERSION = 1
+_PREFIX = struct.Struct("<3sBI")
+_FLOAT32 = np.dtype("<f4") if np is not None else None
+_BIG_ENDIAN = sys.byteorder == "big"
+
+
+def default_serializer(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if np is not None and isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError(f"Type {type(obj)} not serializable")
+
+
+def _vector(name: str, value: Any):
+    """``value`` as little-endian float32 bytes if it is a vector field, else ``None``."""
+    if np is not None and isinstance(value, np.ndarray):
+        return value.astype(_FLOAT32, copy=False).ravel().tobytes()
+    if name not in VECTOR_FIELDS or not isinstance(value, (list, tuple)) or not value:
+        return None
+    try:
+        if np is not None:
+            return np.asarray(value, dtype=_FLOAT32).tobytes()
+        floats = array("f", value)
+    except (TypeError, ValueError):
+        return None
+    if _BIG_ENDIAN:
+        floats.byteswap()
+    return floats.tobytes()
+
+
+def _floats(data: memoryview, count: int, offset: int, arrays: bool):
+    if np is not None:
+        vector = np.frombuffer(data, dtype=_FLOAT32, count=count, offset=offset)
+        return vector if arrays else vector.tolist()
+    if arrays:
+        raise ValueError("numpy is required to decode vectors as arrays")
+    floats = array("f", data[offset : offset + count * 4])
+    if _BIG_ENDIAN:
+        floats.byteswap()
+    return floats.tolist()
+
+
+def encode_binary(message: Dict[str, Any]) -> bytes:
+    """The binary frame for ``message``, whether or not it holds vectors."""
+    rest, names, buffers = {}, [], []
+    for key, value in message.items():
+        vector = _vector(key, value)
+        if vector is None:
+            rest[key] = value
+        else:
+            names.append([key, len(vector) // 4])
+            buffers.append(vector)
+    header = json.dumps({"m": rest, "v": names}, default=default_serializer).encode()
+    return b"".join([_PREFIX.pack(MAGIC, VERSION, len(header)), header, *buffers])
+
+
+def encode_message(message: Dict[str, Any], codec: Optional[str] = None) -> Union[bytes, str]:
+    """``message`` as a binary frame if it carries vectors, else as JSON."""
+    if (codec or VECTOR_CODEC) == "binary" and any(
+        _vector(key, value) is not None for key, value in message.items()
+    ):
+        return encode_binary(message)
+    return json.dumps(message, default=default_serializer)
+
+
+def is_binary(data: Union[bytes, str]) -> bool:
+    return isinstance(data, (bytes, bytearray, memoryview)) and bytes(data[:3]) == MAGIC
+
+
+def decode_message(data: Union[bytes, str], arrays: bool = False) -> Dict[str, Any]:
+    """Parse a frame or a JSON payload.
+
+    Vectors come back as lists of floats, or as read-only float32 arrays
+    over the payload when ``arrays`` is true. Raises ``ValueError`` on
+    malformed input.
+    """
+    if not is_binary(data):
+        return json.loads(data)
+    data = memoryview(data)
+    try:
+        _, version, size = _PREFIX.unpack_from(data)
+    except struct.error as e:
+        raise ValueError(f"truncated frame: {e}")
+    if version != VERSION:
+        raise ValueError(f"unsupported frame version {version}")
+    offset = _PREFIX.size + size
+    header = json.loads(bytes(data[_PREFIX.size : offset]))
+    message = header["m"]
+    for name, count in header["v"]:
+        end = offset + count * 4
+        if end > len(data):
+            raise ValueError(f"frame too short for vector {name!r}")
+        message[name] = _floats(data, count, offset, arrays)
+        offset = end
+    return message
+
@@ -0,0 +1,57 @@
+import os
+from typing import Optional
+
+import redis
+
+from shared.retention import RETENTION_DAYS
+
+# Redis key prefix for the SHA-256 -> stored path index
+CONTENT_KEY_PREFIX = os.getenv("CONTENT_KEY_PREFIX", "ingest:sha256")
+# Claims expire with the files they point to
+CONTENT_KEY_TTL = int(os.getenv("CONTENT_KEY_TTL", RETENTION_DAYS * 24 * 3600))
+
+
+def content_key(digest: str, well_id: str) -> str:
+    return f"{CONTENT_KEY_PREFIX}:{well_id}:{digest}"
+
+
+def claim_content(client, digest: str, well_id: str, path: str) -> Optional[str]:
+    """Register ``path`` as the stored copy of ``digest`` for ``well_id``.
+
+    Returns ``None`` if the content is new. If it was ingested before,
+    returns the path of the earlier copy. An entry whose file no longer
+    exists (for example after retention cleanup) is replaced, so that
+    content can be ingested again; when several callers find the same
+    stale entry, exactly one of them gets to replace it.
+    """
+    key = content_key(digest, well_id)
+    if client.set(key, path, nx=True, ex=CONTENT_KEY_TTL):
+        return None
+    existing = client.get(key)
+    if isinstance(existing, bytes):
+        existing = existing.decode()
+    if existing and os.path.exists(existing):
+        return existing
+    while True:
+        with client.pipeline() as pipe:
+            try:
+                # WATCH makes the stale check and the replacement one step:
+                # if another ingestor replaces the claim first, EXEC fails
+                pipe.watch(key)
+                existing = pipe.get(key)
+                if isinstance(existing, bytes):
+                    existing = existing.decode()
+                if existing and os.path.exists(existing):
+                    pipe.unwatch()
+                    return existing
+                pipe.multi()
+                pipe.set(key, path, ex=CONTENT_KEY_TTL)
+                pipe.execute()
+                return None
+            except redis.WatchError:
+                continue
+
+
+def release_content(client, digest: str, well_id: str) -> None:
+    """Forget a claim, e.g. when publishing the ingestion event failed."""
+    client.delete(content_key(digest, well_id))
@@ -0,0 +1,338 @@
+import asyncio
+import csv
+import io
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import IO, Any, AsyncIterator, Dict, Iterable, Iterator, Optional, Sequence
+
+from shared.config import PGDATABASE, PGHOST, PGPASSWORD, PGPORT, PGUSER
+from shared.logger import logger
+
+try:  # pragma: no cover - metrics are optional
+    from prometheus_client import Counter, Gauge
+except ImportError:  # pragma: no cover
+    Counter = Gauge = None
+
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", 1))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 10))
+# Seconds a caller waits for a free connection before giving up
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+# Connections older than this are closed and replaced instead of reused
+DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", 1800))
+
+if Gauge is not None:
+    pool_in_use = Gauge("db_pool_in_use", "Connections checked out", ["pool"])
+    pool_size = Gauge("db_pool_size", "Open connections", ["pool"])
+    pool_max = Gauge("db_pool_max", "Pool capacity", ["pool"])
+    pool_recycled = Counter(
+        "db_pool_recycled_total", "Connections closed for age or breakage", ["pool"]
+    )
+else:  # pragma: no cover
+    pool_in_use = pool_size = pool_max = pool_recycled = None
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection frees up within ``DB_POOL_TIMEOUT``."""
+
+
+def connection_params(**overrides: Any) -> Dict[str, Any]:
+    """psycopg2/asyncpg keyword arguments from ``shared.config`` plus overrides."""
+    params = {
+        "host": PGHOST,
+        "port": PGPORT,
+        "user": PGUSER,
+        "password": PGPASSWORD,
+        "dbname": PGDATABASE,
+    }
+    params.update({k: v for k, v in overrides.items() if v is not None})
+    return params
+
+
+def _tracking_pool(base, born: Dict[int, float]):
+    """Subclass of psycopg2 pool ``base`` that records in ``born`` when each
+    connection was opened and forgets it once the pool closes it."""
+
+    class TrackingPool(base):
+        def _connect(self, key=None):
+            conn = super()._connect(key)
+            born[id(conn)] = time.monotonic()
+            return conn
+
+        def _putconn(self, conn, key=None, close=False):
+            try:
+                super()._putconn(conn, key, close)
+            finally:
+                # Surplus and broken connections are closed here, and their
+                # id() may be reused by the next connection
+                if conn.closed:
+                    born.pop(id(conn), None)
+
+    return TrackingPool
+
+
+class ConnectionPool:
+    """Process-wide psycopg2 pool, created on first use.
+
+    ``ThreadedConnectionPool`` raises as soon as it is exhausted; callers
+    here wait up to ``timeout`` seconds for a connection instead. Returned
+    connections are rolled back by psycopg2, and connections that are
+    closed or older than ``max_lifetime`` are replaced on checkout.
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        minconn: int = DB_POOL_MIN,
+        maxconn: int = DB_POOL_MAX,
+        timeout: float = DB_POOL_TIMEOUT,
+        max_lifetime: float = DB_POOL_MAX_LIFETIME,
+        **params: Any,
+    ) -> None:
+        self.name = name
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.params = connection_params(**params)
+        self._pool = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._born: Dict[int, float] = {}
+        self._in_use = 0
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                from psycopg2.pool import ThreadedConnectionPool
+
+                pool_class = _tracking_pool(ThreadedConnectionPool, self._born)
+                self._pool = pool_class(self.minconn, self.maxconn, **self.params)
+                if pool_max is not None:
+                    pool_max.labels(self.name).set(self.maxconn)
+            return self._pool
+
+    def _expired(self, conn) -> bool:
+        if conn.closed:
+            return True
+        born = self._born.get(id(conn))
+        return born is not None and time.monotonic() - born > self.max_lifetime
+
+    def _discard(self, pool, conn) -> None:
+        self._born.pop(id(conn), None)
+        pool.putconn(conn, close=True)
+        if pool_recycled is not None:
+            pool_recycled.labels(self.name).inc()
+
+    def getconn(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeout(f"no connection in pool {self.name!r} after {self.timeout}s")
+        try:
+            pool = self._get_pool()
+            conn = pool.getconn()
+            while self._expired(conn):
+                self._discard(pool, conn)
+                conn = pool.getconn()
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._in_use += 1
+        self._report()
+        return conn
+
+    def putconn(self, conn, close: bool = False) -> None:
+        pool = self._get_pool()
+        try:
+            if close or conn.closed:
+                self._discard(pool, conn)
+            else:
+                pool.putconn(conn)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+            self._report()
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """Check out a connection for the duration of the block."""
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            # psycopg2 rolls back an open transaction when it is returned
+            self.putconn(conn)
+
+    def check(self) -> bool:
+        """Run ``SELECT 1`` on a pooled connection without closing it."""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+                cur.fetchone()
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        pool = self._pool
+        open_conns = len(pool._used) + len(pool._pool) if pool is not None else 0
+        return {"in_use": self._in_use, "size": open_conns, "max": self.maxconn}
+
+    def _report(self) -> None:
+        if pool_in_use is None:
+            return
+        stats = self.stats()
+        pool_in_use.labels(self.name).set(stats["in_use"])
+        pool_size.labels(self.name).set(stats["size"])
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+                self._born.clear()
+
+
+class AsyncConnectionPool:
+    """Process-wide asyncpg pool, created on first use.
+
+    asyncpg has no per-connection lifetime limit, so every ``max_lifetime``
+    seconds the pool's connections are marked expired and asyncpg replaces
+    each one when it is next released.
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        dsn: Optional[str] = None,
+        min_size: int = DB_POOL_MIN,
+        max_size: int = DB_POOL_MAX,
+        timeout: float = DB_POOL_TIMEOUT,
+        max_lifetime: float = DB_POOL_MAX_LIFETIME,
+        **params: Any,
+    ) -> None:
+        self.name = f"{name}_async"
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        params = connection_params(**params)
+        params["database"] = params.pop("dbname")
+        self.params = params
+        self._pool = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._expired_at = time.monotonic()
+
+    async def get_pool(self):
+        if self._pool is None:
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            async with self._lock:
+                if self._pool is None:
+                    import asyncpg
+
+                    kwargs = {} if self.dsn else self.params
+                    self._pool = await asyncpg.create_pool(
+                        self.dsn, min_size=self.min_size, max_size=self.max_size, **kwargs
+                    )
+                    if pool_max is not None:
+                        pool_max.labels(self.name).set(self.max_size)
+        return self._pool
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Any]:
+        """Check out a connection for the duration of the block."""
+        pool = await self.get_pool()
+        now = time.monotonic()
+        if now - self._expired_at > self.max_lifetime:
+            self._expired_at = now
+            await pool.expire_connections()
+            if pool_recycled is not None:
+                pool_recycled.labels(self.name).inc(pool.get_size())
+        try:
+            async with pool.acquire(timeout=self.timeout) as conn:
+                self._report()
+                yield conn
+        finally:
+            self._report()
+
+    async def check(self) -> bool:
+        async with self.acquire() as conn:
+            await conn.execute("SELECT 1")
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        pool = self._pool
+        if pool is None:
+            return {"in_use": 0, "size": 0, "max": self.max_size}
+        size = pool.get_size()
+        return {"in_use": size - pool.get_idle_size(), "size": size, "max": self.max_size}
+
+    def _report(self) -> None:
+        if pool_in_use is None:
+            return
+        stats = self.stats()
+        pool_in_use.labels(self.name).set(stats["in_use"])
+        pool_size.labels(self.name).set(stats["size"])
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+
+def copy_csv(cur, table: str, columns: Sequence[str], data: IO[str]) -> None:
+    """Stream CSV ``data`` into ``table`` with ``COPY ... FROM STDIN``.
+
+    Unquoted empty fields load as NULL.
+    """
+    from psycopg2 import sql
+
+    statement = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+        sql.Identifier(table), sql.SQL(", ").join(map(sql.Identifier, columns))
+    )
+    cur.copy_expert(statement, data)
+
+
+def copy_rows(cur, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+    """Bulk-load row tuples with :func:`copy_csv` and return how many were sent."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    buf.seek(0)
+    copy_csv(cur, table, columns, buf)
+    return count
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_async_pools: Dict[str, AsyncConnectionPool] = {}
+_registry_lock = threading.Lock()
+
+
+def get_pool(name: str = "default", **kwargs: Any) -> ConnectionPool:
+    """Return the process-wide sync pool ``name``, creating it with ``kwargs``."""
+    with _registry_lock:
+        if name not in _pools:
+            _pools[name] = ConnectionPool(name, **kwargs)
+        return _pools[name]
+
+
+def get_async_pool(name: str = "default", **kwargs: Any) -> AsyncConnectionPool:
+    """Return the process-wide asyncpg pool ``name``, creating it with ``kwargs``."""
+    with _registry_lock:
+        if name not in _async_pools:
+            _async_pools[name] = AsyncConnectionPool(name, **kwargs)
+        return _async_pools[name]
+
+
+def close_pools() -> None:
+    """Close every sync pool, e.g. on shutdown or after ``fork()``."""
+    for pool in list(_pools.values()):
+        try:
+            pool.close()
+        except Exception as e:
+            logger.error(f"[DB] Failed to close pool {pool.name}: {e}")
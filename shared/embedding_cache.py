@@ -0,0 +1,203 @@
+"""Embeddings for exact texts, reused across calls and services.
+
+Templated SCADA sentences and repeated questions are encoded over and over
+by the same model. :class:`EmbeddingCache` keys each vector by the sha256 of
+the model name and the text, keeps the most recently used
+``EMBED_CACHE_SIZE`` in process, and with ``EMBED_CACHE_REDIS=true`` also
+shares them through Redis (``EMBED_CACHE_TTL`` seconds) so a text encoded by
+one service or replica is not encoded again by the next. Like the LLM cache,
+``emb:index`` scores the Redis entries by last use and keeps at most
+``EMBED_CACHE_REDIS_MAX`` of them, since that Redis also holds the pipeline
+streams and runs without ``maxmemory``.
+
+Vectors are kept as the encoder returned them (numpy arrays for
+``SentenceTransformer``) and must not be modified by callers; the Redis tier
+stores them as float32. Cache failures are logged and treated as misses.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from shared.config import REDIS_HOST, REDIS_PORT
+from shared.logger import logger
+
+try:  # pragma: no cover - metrics are optional
+    from prometheus_client import Counter
+except ImportError:  # pragma: no cover
+    Counter = None
+
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", 10000))
+EMBED_CACHE_REDIS = os.getenv("EMBED_CACHE_REDIS", "false").lower() == "true"
+EMBED_CACHE_TTL = int(os.getenv("EMBED_CACHE_TTL", 7 * 24 * 3600))
+# About 1.6 KB per 384-dim vector
+EMBED_CACHE_REDIS_MAX = int(os.getenv("EMBED_CACHE_REDIS_MAX", 100000))
+
+if Counter is not None:
+    cache_hits = Counter(
+        "embedding_cache_hits_total", "Embeddings served from cache", ["model", "tier"]
+    )
+    cache_misses = Counter("embedding_cache_misses_total", "Texts sent to the model", ["model"])
+else:  # pragma: no cover
+    cache_hits = cache_misses = None
+
+Encoder = Callable[[List[str]], Sequence[Any]]
+
+
+def cache_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{text}".encode()).hexdigest()
+
+
+class EmbeddingCache:
+    """LRU of ``max_entries`` vectors for one model, over an optional Redis tier
+    holding at most ``redis_max_entries`` vectors."""
+
+    INDEX = "emb:index"
+
+    def __init__(
+        self,
+        model: str,
+        max_entries: int = EMBED_CACHE_SIZE,
+        redis_client=None,
+        ttl: int = EMBED_CACHE_TTL,
+        redis_max_entries: int = EMBED_CACHE_REDIS_MAX,
+    ) -> None:
+        self.model = model
+        self.max_entries = max_entries
+        self.redis = redis_client
+        self.ttl = ttl
+        self.redis_max_entries = redis_max_entries
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get_local(self, key: str) -> Any:
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+            return vector
+
+    def _put_local(self, key: str, vector: Any) -> None:
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_remote(self, keys: List[str]) -> List[Optional[np.ndarray]]:
+        if self.redis is None or not keys:
+            return [None] * len(keys)
+        try:
+            values = self.redis.mget([f"emb:{key}" for key in keys])
+            used = {key: time.time() for key, value in zip(keys, values) if value}
+            if used:
+                self.redis.zadd(self.INDEX, used)
+        except Exception as e:
+            logger.error(f"[EMBED_CACHE] Redis read failed: {e}")
+            return [None] * len(keys)
+        # frombuffer over bytes gives read-only arrays
+        return [np.frombuffer(v, dtype="<f4") if v else None for v in values]
+
+    def _put_remote(self, items: Dict[str, Any]) -> None:
+        if self.redis is None or not items:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for key, vector in items.items():
+                pipe.set(f"emb:{key}", np.asarray(vector, dtype="<f4").tobytes(), ex=self.ttl)
+            pipe.zadd(self.INDEX, {key: time.time() for key in items})
+            pipe.execute()
+            self.evict()
+        except Exception as e:
+            logger.error(f"[EMBED_CACHE] Redis write failed: {e}")
+
+    def evict(self) -> int:
+        """Forget expired Redis keys, then delete the least recently used beyond the cap."""
+        self.redis.zremrangebyscore(self.INDEX, "-inf", time.time() - self.ttl)
+        excess = self.redis.zcard(self.INDEX) - self.redis_max_entries
+        if excess <= 0:
+            return 0
+        keys = self.redis.zrange(self.INDEX, 0, excess - 1)
+        if not keys:
+            return 0
+        # The Redis tier reads raw bytes
+        names = [key.decode() if isinstance(key, bytes) else key for key in keys]
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.delete(*(f"emb:{name}" for name in names))
+        pipe.zrem(self.INDEX, *keys)
+        pipe.execute()
+        return len(keys)
+
+    def _count_hits(self, tier: str, hits: int) -> None:
+        if cache_hits is not None and hits:
+            cache_hits.labels(self.model, tier).inc(hits)
+
+    def encode(self, texts: Sequence[str], encoder: Encoder) -> List[Any]:
+        """One vector per text, in order; only unseen texts reach ``encoder``.
+
+        ``encoder`` takes a list of texts and returns one vector per text
+        (``SentenceTransformer.encode`` does); it is called at most once,
+        with each missing text once.
+        """
+        keys = [cache_key(self.model, text) for text in texts]
+        found: Dict[str, Any] = {}
+        for key in keys:
+            vector = self._get_local(key)
+            if vector is not None:
+                found[key] = vector
+        self._count_hits("memory", sum(key in found for key in keys))
+
+        missing = list(dict.fromkeys(key for key in keys if key not in found))
+        for key, vector in zip(missing, self._get_remote(missing)):
+            if vector is not None:
+                found[key] = vector
+                self._put_local(key, vector)
+        self._count_hits("redis", sum(key in found for key in missing))
+
+        missing = [key for key in missing if key not in found]
+        if missing:
+            if cache_misses is not None:
+                cache_misses.labels(self.model).inc(len(missing))
+            text_for = dict(zip(keys, texts))
+            vectors = encoder([text_for[key] for key in missing])
+            encoded = dict(zip(missing, vectors))
+            for key, vector in encoded.items():
+                self._put_local(key, vector)
+            self._put_remote(encoded)
+            found.update(encoded)
+        return [found[key] for key in keys]
+
+    def encode_one(self, text: str, encoder: Callable[[str], Any]) -> Any:
+        """The vector for one text; ``encoder`` takes a single text."""
+        return self.encode([text], lambda texts: [encoder(texts[0])])[0]
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(model: str) -> EmbeddingCache:
+    """The process-wide cache for ``model``."""
+    cache = _caches.get(model)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(model)
+            if cache is None:
+                client = None
+                if EMBED_CACHE_REDIS:
+                    import redis
+
+                    # Vectors are stored as raw float32 bytes
+                    client = redis.Redis(
+                        host=REDIS_HOST, port=REDIS_PORT, decode_responses=False, socket_timeout=1
+                    )
+                cache = _caches[model] = EmbeddingCache(model, redis_client=client)
+    return cache
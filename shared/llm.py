@@ -0,0 +1,247 @@
+"""Chat completions behind a response cache shared by the services.
+
+Identical prompts are common (the same well files get reprocessed), so a
+completion is stored under the sha256 of the model and the normalized
+messages. ``LLM_CACHE`` picks the backend:
+
+- ``off`` (default): every call goes to the API
+- ``disk``: one JSON file per entry under ``LLM_CACHE_DIR``; entries expire
+  after ``LLM_CACHE_TTL`` seconds and the least recently used ones are
+  removed beyond ``LLM_CACHE_MAX_ENTRIES``
+- ``redis``: shared by every replica; entries expire after ``LLM_CACHE_TTL``
+  and a sorted set of keys by last use keeps at most ``LLM_CACHE_MAX_ENTRIES``
+
+Cache failures are logged and treated as misses.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from shared.config import REDIS_HOST, REDIS_PORT
+from shared.logger import logger
+
+try:  # pragma: no cover - metrics are optional
+    from prometheus_client import Counter
+except ImportError:  # pragma: no cover
+    Counter = None
+
+LLM_CACHE = os.getenv("LLM_CACHE", "off").lower()
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", os.path.join(tempfile.gettempdir(), "genio_llm_cache"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", 7 * 24 * 3600))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 10000))
+
+if Counter is not None:
+    cache_hits = Counter("llm_cache_hits_total", "LLM responses served from cache", ["model"])
+    cache_misses = Counter("llm_cache_misses_total", "LLM calls sent to the API", ["model"])
+else:  # pragma: no cover
+    cache_hits = cache_misses = None
+
+
+@dataclass
+class Completion:
+    content: str
+    # Tokens billed for this call; 0 when served from cache
+    total_tokens: Optional[int]
+    cached: bool
+
+
+def normalize_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Messages with runs of whitespace in their content collapsed."""
+    return [
+        {**m, "content": re.sub(r"\s+", " ", m.get("content", "")).strip()}
+        for m in messages
+    ]
+
+
+def cache_key(model: str, messages: List[Dict[str, Any]]) -> str:
+    payload = json.dumps(
+        {"model": model, "messages": normalize_messages(messages)}, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class DiskCache:
+    """JSON files named by key; file mtime doubles as the last-used time."""
+
+    def __init__(self, root: str = LLM_CACHE_DIR, ttl: float = LLM_CACHE_TTL, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.root = root
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._writes = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            if time.time() - os.stat(path).st_mtime > self.ttl:
+                os.remove(path)
+                return None
+            with open(path) as f:
+                value = json.load(f)["content"]
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"content": value}, f)
+        os.replace(tmp, path)
+        with self._lock:
+            self._writes += 1
+            # Listing the directory is the expensive part; do it now and then
+            due = self._writes % max(self.max_entries // 10, 1) == 0
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then the least recently used beyond the cap."""
+        entries = []
+        now = time.time()
+        removed = 0
+        for entry in os.scandir(self.root):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                mtime = entry.stat().st_mtime
+                if now - mtime > self.ttl:
+                    os.remove(entry.path)
+                    removed += 1
+                else:
+                    entries.append((mtime, entry.path))
+            except FileNotFoundError:
+                continue
+        entries.sort()
+        for _, path in entries[: max(len(entries) - self.max_entries, 0)]:
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+
+class RedisCache:
+    """Entries under ``llm:<key>`` with a TTL, shared across replicas.
+
+    ``llm:index`` scores every key by its last use; each ``set`` drops the
+    least recently used keys beyond ``max_entries``. Redis itself runs
+    without ``maxmemory`` since it also holds the pipeline streams.
+    """
+
+    INDEX = "llm:index"
+
+    def __init__(self, client=None, ttl: float = LLM_CACHE_TTL, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        if client is None:
+            import redis
+
+            client = redis.Redis(
+                host=REDIS_HOST, port=REDIS_PORT, decode_responses=True, socket_timeout=1
+            )
+        self.client = client
+        self.ttl = int(ttl)
+        self.max_entries = max_entries
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(f"llm:{key}")
+        if value is not None:
+            self.client.zadd(self.INDEX, {key: time.time()})
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(f"llm:{key}", value, ex=self.ttl)
+        pipe.zadd(self.INDEX, {key: time.time()})
+        pipe.execute()
+        self.evict()
+
+    def evict(self) -> int:
+        """Forget expired keys, then delete the least recently used beyond the cap."""
+        self.client.zremrangebyscore(self.INDEX, "-inf", time.time() - self.ttl)
+        excess = self.client.zcard(self.INDEX) - self.max_entries
+        if excess <= 0:
+            return 0
+        keys = self.client.zrange(self.INDEX, 0, excess - 1)
+        if not keys:
+            return 0
+        pipe = self.client.pipeline(transaction=False)
+        pipe.delete(*(f"llm:{key}" for key in keys))
+        pipe.zrem(self.INDEX, *keys)
+        pipe.execute()
+        return len(keys)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """The process-wide backend chosen by ``LLM_CACHE``, or ``None`` when off."""
+    global _cache
+    if _cache is None and LLM_CACHE in ("disk", "redis"):
+        with _cache_lock:
+            if _cache is None:
+                _cache = DiskCache() if LLM_CACHE == "disk" else RedisCache()
+    return _cache
+
+
+def _usage(resp: Any) -> Optional[int]:
+    usage = getattr(resp, "usage", None)
+    total = getattr(usage, "total_tokens", None)
+    if total is None and isinstance(usage, dict):
+        total = usage.get("total_tokens")
+    return int(total) if total is not None else None
+
+
+def complete(
+    create: Callable[..., Any],
+    model: str,
+    messages: List[Dict[str, Any]],
+    validate: Optional[Callable[[str], Any]] = None,
+    cache=None,
+) -> Completion:
+    """Content of a chat completion, from cache when the prompt was seen before.
+
+    ``create`` is the client call (``openai.ChatCompletion.create``).
+    Responses are stored only if ``validate(content)`` does not raise, so a
+    malformed answer is asked for again next time. Blocking; async callers
+    run it with ``asyncio.to_thread``.
+    """
+    cache = cache if cache is not None else get_cache()
+    key = cache_key(model, messages) if cache is not None else None
+    if cache is not None:
+        try:
+            content = cache.get(key)
+        except Exception as e:
+            logger.error(f"[LLM] Cache read failed: {e}")
+            content = None
+        if content is not None:
+            if cache_hits is not None:
+                cache_hits.labels(model).inc()
+            return Completion(content, 0, True)
+        if cache_misses is not None:
+            cache_misses.labels(model).inc()
+
+    resp = create(model=model, messages=messages)
+    content = resp.choices[0].message["content"]
+    if cache is not None:
+        try:
+            if validate is not None:
+                validate(content)
+            cache.set(key, content)
+        except Exception as e:
+            logger.warning(f"[LLM] Response not cached: {e}")
+    return Completion(content, _usage(resp), False)
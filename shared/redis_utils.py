@@ -1,7 +1,33 @@
 import redis
-import json
+import os
+import socket
 import time
-from datetime import datetime
+from typing import Any, Iterable, List, Optional, Tuple
+
+from shared.codec import decode_message, default_serializer, encode_message
+from shared.logger import logger
+
+# Messages per pipeline round-trip for bulk publishing
+PUBLISH_CHUNK_SIZE = int(os.getenv("PUBLISH_CHUNK_SIZE", 500))
+
+# "pubsub" keeps fire-and-forget PUBLISH/SUBSCRIBE; "streams" sends the
+# pipeline hops through Redis Streams read by consumer groups
+REDIS_TRANSPORT = os.getenv("REDIS_TRANSPORT", "pubsub").lower()
+STREAM_CHANNELS = set(
+    os.getenv(
+        "STREAM_CHANNELS",
+        "now_channel,express_channel,interpret_channel,reflect_channel,"
+        "truth_channel,embed_channel,ingest_channel,visualize_channel",
+    ).split(",")
+)
+# Approximate cap on entries kept per stream
+STREAM_MAXLEN = int(os.getenv("STREAM_MAXLEN", 100000))
+# Entries fetched per XREADGROUP call
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", 100))
+# Pending entries idle this long are taken over from crashed consumers
+STREAM_CLAIM_IDLE_MS = int(os.getenv("STREAM_CLAIM_IDLE_MS", 60000))
+STREAM_CLAIM_INTERVAL = float(os.getenv("STREAM_CLAIM_INTERVAL_SECONDS", 30))
+CONSUMER_NAME = os.getenv("STREAM_CONSUMER", socket.gethostname())
 
 # Retry connection logic
 def get_redis_connection():
@@ -14,19 +40,276 @@ def get_redis_connection():
             print("Redis not available yet, retrying...")
             time.sleep(1)
 
-r = get_redis_connection()
+_client: Optional[redis.Redis] = None
+
+def get_client() -> redis.Redis:
+    """Return the shared connection, waiting for Redis on first use."""
+    global _client
+    if _client is None:
+        _client = get_redis_connection()
+    return _client
+
+def __getattr__(name: str):
+    # ``from shared.redis_utils import r`` keeps working, but modules that
+    # only need the transport helpers no longer connect at import time
+    if name == "r":
+        return get_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def raw_client(client):
+    """A client like ``client`` that returns bytes, as binary frames need.
+
+    Shares the server settings but not the pool of ``client``; clients
+    already created with ``decode_responses=False`` are returned as is.
+    """
+    pool = getattr(client, "connection_pool", None)
+    kwargs = getattr(pool, "connection_kwargs", None)
+    if not isinstance(kwargs, dict) or not kwargs.get("decode_responses"):
+        return client
+    raw_pool = type(pool)(
+        connection_class=pool.connection_class,
+        max_connections=pool.max_connections,
+        **{**kwargs, "decode_responses": False},
+    )
+    return type(client)(connection_pool=raw_pool)
+
+def uses_streams(channel: str) -> bool:
+    # Shards of a channel ("interpret_channel:3") follow the base channel
+    return REDIS_TRANSPORT == "streams" and channel.split(":", 1)[0] in STREAM_CHANNELS
+
+def send(client, channel: str, message: dict):
+    """Send ``message`` on ``channel`` using ``client`` with the configured transport.
 
-# JSON serializer for datetime objects
-def default_serializer(obj):
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    raise TypeError(f"Type {type(obj)} not serializable")
+    Works with sync and async clients and with pipelines; the return value
+    is whatever the client returns (a coroutine for ``redis.asyncio``).
+    Messages carrying embeddings go out as binary frames (``shared.codec``).
+    """
+    data = encode_message(message)
+    if uses_streams(channel):
+        return client.xadd(channel, {"data": data}, maxlen=STREAM_MAXLEN, approximate=True)
+    return client.publish(channel, data)
 
 # Single correct publish function
 def publish(channel: str, message: dict):
-    r.publish(channel, json.dumps(message, default=default_serializer))
+    send(get_client(), channel, message)
+
+def publish_many(channel: str, messages: Iterable[dict], chunk_size: int = PUBLISH_CHUNK_SIZE) -> int:
+    """Publish messages in pipelined chunks and return how many were sent.
+
+    Pipelines are non-transactional (no MULTI/EXEC), so each chunk costs a
+    single network round-trip instead of one per message.
+    """
+    sent = 0
+    pipe = get_client().pipeline(transaction=False)
+    for message in messages:
+        send(pipe, channel, message)
+        if len(pipe) >= chunk_size:
+            sent += len(pipe.execute())
+    if len(pipe):
+        sent += len(pipe.execute())
+    return sent
 
 def subscribe(channel: str):
-    pubsub = r.pubsub()
+    pubsub = get_client().pubsub()
     pubsub.subscribe(channel)
     return pubsub
+
+Message = Tuple[Optional[str], Any]
+
+def _field(fields, name: str):
+    if not fields:
+        return None
+    return fields.get(name, fields.get(name.encode()))
+
+def _decode(raw: List[Tuple[Optional[str], Any]], channel: str) -> Tuple[List[Message], List[str]]:
+    """Parse payloads, returning messages and the stream ids to drop."""
+    messages, bad = [], []
+    for msg_id, data in raw:
+        if isinstance(msg_id, bytes):
+            msg_id = msg_id.decode()
+        try:
+            messages.append((msg_id, decode_message(data)))
+        except (TypeError, ValueError) as e:
+            logger.error(f"[REDIS] Dropping malformed message on {channel}: {e}")
+            if msg_id is not None:
+                bad.append(msg_id)
+    return messages, bad
+
+def _is_busygroup(exc: Exception) -> bool:
+    return "BUSYGROUP" in str(exc)
+
+class Subscription:
+    """Consume ``channel`` as a member of consumer ``group``.
+
+    ``read()`` returns ``(message_id, payload)`` pairs. With the streams
+    transport each id must be passed to ``ack()`` once handled; entries
+    that are never acked are redelivered after a restart (to the same
+    consumer) or claimed by another replica once idle for
+    ``STREAM_CLAIM_IDLE_MS``. With pub/sub the id is ``None`` and ``ack()``
+    does nothing, so callers are written the same way for both.
+
+    Payloads are decoded with :func:`shared.codec.decode_message`, so JSON
+    and binary frames can share a channel.
+    """
+
+    def __init__(
+        self,
+        client,
+        channel: str,
+        group: str,
+        consumer: str = CONSUMER_NAME,
+        batch_size: int = STREAM_BATCH_SIZE,
+    ) -> None:
+        # Reads bypass decode_responses so binary frames arrive intact
+        self.client = raw_client(client)
+        self.channel = channel
+        self.group = group
+        self.consumer = consumer
+        self.batch_size = batch_size
+        self.streams = uses_streams(channel)
+        self._backlog: Optional[str] = "0"
+        self._last_claim = 0.0
+        if self.streams:
+            try:
+                self.client.xgroup_create(channel, group, id="0", mkstream=True)
+            except redis.exceptions.ResponseError as e:
+                if not _is_busygroup(e):
+                    raise
+        else:
+            self.pubsub = self.client.pubsub()
+            self.pubsub.subscribe(channel)
+
+    def read(self, timeout: float = 1.0) -> List[Message]:
+        """Return up to ``batch_size`` messages, waiting at most ``timeout`` seconds."""
+        if not self.streams:
+            raw = []
+            message = self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+            while message:
+                raw.append((None, message["data"]))
+                if len(raw) >= self.batch_size:
+                    break
+                message = self.pubsub.get_message(ignore_subscribe_messages=True, timeout=0)
+            return _decode(raw, self.channel)[0]
+
+        entries = self._claim()
+        if not entries:
+            if self._backlog:
+                # Re-read our own unacked entries first, then switch to new ones
+                entries = self._xreadgroup(self._backlog, None)
+                self._backlog = entries[-1][0] if entries else None
+            if not self._backlog:
+                entries = self._xreadgroup(">", int(timeout * 1000))
+        return self._finish(entries)
+
+    def ack(self, ids: Iterable[Optional[str]]) -> int:
+        ids = [i for i in ids if i is not None]
+        if not self.streams or not ids:
+            return 0
+        return self.client.xack(self.channel, self.group, *ids)
+
+    def _xreadgroup(self, start: str, block: Optional[int]):
+        resp = self.client.xreadgroup(
+            self.group, self.consumer, {self.channel: start}, count=self.batch_size, block=block
+        )
+        return resp[0][1] if resp else []
+
+    def _claim(self):
+        now = time.monotonic()
+        if now - self._last_claim < STREAM_CLAIM_INTERVAL:
+            return []
+        self._last_claim = now
+        resp = self.client.xautoclaim(
+            self.channel, self.group, self.consumer, STREAM_CLAIM_IDLE_MS, count=self.batch_size
+        )
+        return resp[1]
+
+    def _finish(self, entries) -> List[Message]:
+        # Entries trimmed by MAXLEN while pending come back without fields
+        raw = [(msg_id, _field(fields, "data")) for msg_id, fields in entries]
+        gone = [msg_id for msg_id, data in raw if data is None]
+        messages, bad = _decode([e for e in raw if e[1] is not None], self.channel)
+        if gone or bad:
+            self.ack(gone + bad)
+        return messages
+
+class AsyncSubscription(Subscription):
+    """:class:`Subscription` for ``redis.asyncio`` clients."""
+
+    def __init__(self, client, channel: str, group: str, **kwargs) -> None:
+        self.client = raw_client(client)
+        self.channel = channel
+        self.group = group
+        self.consumer = kwargs.get("consumer", CONSUMER_NAME)
+        self.batch_size = kwargs.get("batch_size", STREAM_BATCH_SIZE)
+        self.streams = uses_streams(channel)
+        self._backlog: Optional[str] = "0"
+        self._last_claim = 0.0
+        self._ready = False
+
+    async def _setup(self) -> None:
+        if self.streams:
+            try:
+                await self.client.xgroup_create(self.channel, self.group, id="0", mkstream=True)
+            except redis.exceptions.ResponseError as e:
+                if not _is_busygroup(e):
+                    raise
+        else:
+            self.pubsub = self.client.pubsub()
+            await self.pubsub.subscribe(self.channel)
+        self._ready = True
+
+    async def read(self, timeout: float = 1.0) -> List[Message]:
+        if not self._ready:
+            await self._setup()
+        if not self.streams:
+            raw = []
+            message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+            while message:
+                raw.append((None, message["data"]))
+                if len(raw) >= self.batch_size:
+                    break
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=0)
+            return _decode(raw, self.channel)[0]
+
+        entries = await self._claim()
+        if not entries:
+            if self._backlog:
+                entries = await self._xreadgroup(self._backlog, None)
+                self._backlog = entries[-1][0] if entries else None
+            if not self._backlog:
+                entries = await self._xreadgroup(">", int(timeout * 1000))
+        return await self._finish(entries)
+
+    async def ack(self, ids: Iterable[Optional[str]]) -> int:
+        ids = [i for i in ids if i is not None]
+        if not self.streams or not ids:
+            return 0
+        return await self.client.xack(self.channel, self.group, *ids)
+
+    async def _xreadgroup(self, start: str, block: Optional[int]):
+        resp = await self.client.xreadgroup(
+            self.group, self.consumer, {self.channel: start}, count=self.batch_size, block=block
+        )
+        return resp[0][1] if resp else []
+
+    async def _claim(self):
+        now = time.monotonic()
+        if now - self._last_claim < STREAM_CLAIM_INTERVAL:
+            return []
+        self._last_claim = now
+        resp = await self.client.xautoclaim(
+            self.channel, self.group, self.consumer, STREAM_CLAIM_IDLE_MS, count=self.batch_size
+        )
+        return resp[1]
+
+    async def _finish(self, entries) -> List[Message]:
+        raw = [(msg_id, _field(fields, "data")) for msg_id, fields in entries]
+        gone = [msg_id for msg_id, data in raw if data is None]
+        messages, bad = _decode([e for e in raw if e[1] is not None], self.channel)
+        if gone or bad:
+            await self.ack(gone + bad)
+        return messages
+
+def consume(channel: str, group: str, **kwargs) -> Subscription:
+    """:class:`Subscription` on the shared connection."""
+    return Subscription(get_client(), channel, group, **kwargs)
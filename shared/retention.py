@@ -0,0 +1,103 @@
+import asyncio
+import bisect
+import os
+import shutil
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+
+from shared.logger import logger
+
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", 7))
+RETENTION_INTERVAL = int(os.getenv("RETENTION_INTERVAL_SECONDS", 3600))
+
+
+def parse_folder_time(name: str) -> Optional[datetime]:
+    """``20240507_010203`` style folders under STORAGE_ROOT."""
+    try:
+        return datetime.strptime(name, "%Y%m%d_%H%M%S")
+    except ValueError:
+        return None
+
+
+def parse_epoch_prefixed(name: str) -> Optional[datetime]:
+    """``{uuid}_{epoch}_{filename}`` files under DATA_ROOT."""
+    parts = name.split("_", 2)
+    if len(parts) < 3 or not parts[1].isdigit():
+        return None
+    return datetime.utcfromtimestamp(int(parts[1]))
+
+
+def parse_timestamp_prefixed(name: str) -> Optional[datetime]:
+    """``{%Y%m%dT%H%M%S}_{uuid}_{filename}`` files under RAW_DATA_ROOT."""
+    try:
+        return datetime.strptime(name.split("_", 1)[0], "%Y%m%dT%H%M%S")
+    except ValueError:
+        return None
+
+
+class RetentionIndex:
+    """Paths sorted by creation time, so a sweep only touches expired ones."""
+
+    def __init__(self, max_age: timedelta = timedelta(days=RETENTION_DAYS)) -> None:
+        self.max_age = max_age
+        self._entries: List[Tuple[datetime, str]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, ts: datetime, path: str) -> None:
+        with self._lock:
+            bisect.insort(self._entries, (ts, path))
+
+    def scan(
+        self, root: str, depth: int, parse: Callable[[str], Optional[datetime]]
+    ) -> int:
+        """Index entries ``depth`` levels below ``root`` whose name ``parse`` accepts."""
+        found = 0
+        if not os.path.isdir(root):
+            return found
+        level = [root]
+        for _ in range(depth - 1):
+            level = [e.path for d in level for e in os.scandir(d) if e.is_dir()]
+        for directory in level:
+            for entry in os.scandir(directory):
+                ts = parse(entry.name)
+                if ts is not None:
+                    self.add(ts, entry.path)
+                    found += 1
+        return found
+
+    def pop_expired(self, now: Optional[datetime] = None) -> List[str]:
+        cutoff = (now or datetime.utcnow()) - self.max_age
+        with self._lock:
+            idx = bisect.bisect_left(self._entries, (cutoff, ""))
+            expired = self._entries[:idx]
+            del self._entries[:idx]
+        return [path for _, path in expired]
+
+    def sweep(self, now: Optional[datetime] = None) -> int:
+        """Delete every expired path and return how many were removed."""
+        removed = 0
+        for path in self.pop_expired(now):
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.exists(path):
+                os.remove(path)
+            else:
+                continue
+            removed += 1
+        return removed
+
+
+async def run_retention(index: RetentionIndex, interval: int = RETENTION_INTERVAL) -> None:
+    """Sweep ``index`` every ``interval`` seconds."""
+    while True:
+        try:
+            removed = await asyncio.to_thread(index.sweep)
+            if removed:
+                logger.info(f"[RETENTION] Removed {removed} expired entries")
+        except Exception as e:
+            logger.error(f"[RETENTION] Sweep failed: {e}")
+        await asyncio.sleep(interval)
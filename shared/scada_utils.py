@@ -1,17 +1,37 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, List, Tuple
+import numpy as np
 import pandas as pd
 
+SCADA_TIMESTAMP_FORMAT = "%m/%d/%Y %H:%M"
+SIGNAL_COLUMNS = [
+    "diff_pressure_inH20",
+    "static_pressure_psia",
+    "temperature_degF",
+    "volume_mcf",
+    "flow_rate_mcf_day",
+    "energy_mmbtu",
+    "flow_time_pct",
+]
+
 
 def parse_scada_timestamp(value: str) -> str:
     """Convert SCADA DateTime string to ISO 8601 UTC string."""
     base = value.split("-")[0].strip()
-    dt = datetime.strptime(base, "%m/%d/%Y %H:%M")
+    dt = datetime.strptime(base, SCADA_TIMESTAMP_FORMAT)
     return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
 
 
+def parse_scada_timestamps(values: pd.Series) -> List[str]:
+    """Vectorized :func:`parse_scada_timestamp` over a whole column."""
+    base = [str(v).split("-")[0].strip() for v in values.tolist()]
+    parsed = pd.to_datetime(pd.Series(base), format=SCADA_TIMESTAMP_FORMAT)
+    seconds = parsed.to_numpy().astype("datetime64[s]")
+    return np.char.add(np.datetime_as_string(seconds, unit="s"), "Z").tolist()
+
+
 def row_to_memory(row: pd.Series | Dict[str, Any]) -> Dict[str, Any]:
     """Convert a SCADA CSV row into a memory dict."""
     if isinstance(row, dict):
@@ -38,3 +58,54 @@ def row_to_memory(row: pd.Series | Dict[str, Any]) -> Dict[str, Any]:
         "content": f"SCADA reading flow={signal['flow_rate_mcf_day']} at {ts_iso}",
     }
     return memory
+
+
+def frame_to_memories(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Convert a SCADA DataFrame into memory dicts in one columnar pass.
+
+    Produces the same dicts as calling :func:`row_to_memory` per row, but
+    parses the ``DateTime`` column and casts the signal columns in bulk.
+    Raises on the first malformed value anywhere in the frame.
+    """
+    timestamps = parse_scada_timestamps(df["DateTime"])
+    values = df[SIGNAL_COLUMNS].astype(float).values.tolist()
+    if "alarms" in df:
+        alarms = [str(v) for v in df["alarms"].tolist()]
+    else:
+        alarms = [""] * len(df)
+
+    memories: List[Dict[str, Any]] = []
+    for ts_iso, row, alarm in zip(timestamps, values, alarms):
+        signal = dict(zip(SIGNAL_COLUMNS, row))
+        signal["alarms"] = alarm
+        memories.append(
+            {
+                "timestamp": ts_iso,
+                "signal": signal,
+                "source": "scada",
+                "tags": ["scada", "automated", "sensor"],
+                "content": f"SCADA reading flow={signal['flow_rate_mcf_day']} at {ts_iso}",
+            }
+        )
+    return memories
+
+
+def convert_frame(df: pd.DataFrame) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Return memory dicts and per-row errors for a SCADA DataFrame.
+
+    Uses :func:`frame_to_memories` and only falls back to the per-row path
+    when the frame contains bad values, so errors stay attributable to rows.
+    """
+    try:
+        return frame_to_memories(df), []
+    except Exception:
+        pass
+
+    memories: List[Dict[str, Any]] = []
+    errors: List[str] = []
+    for idx, row in df.iterrows():
+        try:
+            memories.append(row_to_memory(row))
+        except Exception as exc:
+            errors.append(f"row {idx}: {exc}")
+    return memories, errors
@@ -0,0 +1,45 @@
+import os
+import zlib
+from typing import List, Optional
+
+# Stage events (interpret_ready, reflect_ready, truth_ready, embed_ready)
+# are partitioned by well_id into PIPELINE_SHARDS channels. Every replica
+# of a stage is told its position with SHARD_INDEX/SHARD_COUNT and consumes
+# only the shards it owns, so each well is handled by a single replica and
+# its events stay in order.
+PIPELINE_SHARDS = int(os.getenv("PIPELINE_SHARDS", 1))
+SHARD_INDEX = int(os.getenv("SHARD_INDEX", 0))
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", 1))
+
+
+def shard_of(well_id: Optional[str], shards: int = PIPELINE_SHARDS) -> int:
+    """Stable shard number for ``well_id`` (CRC32, not Python's salted hash)."""
+    return zlib.crc32(str(well_id).encode()) % shards
+
+
+def _shard_name(channel: str, shard: int, shards: int) -> str:
+    return channel if shards <= 1 else f"{channel}:{shard}"
+
+
+def shard_channel(channel: str, well_id: Optional[str], shards: int = PIPELINE_SHARDS) -> str:
+    """Channel carrying stage events for ``well_id``."""
+    if shards <= 1:
+        return channel
+    return _shard_name(channel, shard_of(well_id, shards), shards)
+
+
+def owned_channels(
+    channel: str,
+    index: int = SHARD_INDEX,
+    count: int = SHARD_COUNT,
+    shards: int = PIPELINE_SHARDS,
+) -> List[str]:
+    """Shard channels of ``channel`` consumed by replica ``index`` of ``count``.
+
+    Shards are dealt round-robin, so a replica may own none when there are
+    fewer shards than replicas.
+    """
+    if not 0 <= index < count:
+        raise ValueError(f"SHARD_INDEX {index} out of range for SHARD_COUNT {count}")
+    shards = max(shards, 1)
+    return [_shard_name(channel, s, shards) for s in range(shards) if s % count == index]
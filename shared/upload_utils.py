@@ -0,0 +1,42 @@
+import asyncio
+import hashlib
+import os
+from typing import Optional, Tuple
+
+# Bytes read from the upload per iteration
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the allowed size."""
+
+
+async def save_upload(
+    upload,
+    path: str,
+    max_size: Optional[int] = None,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> Tuple[int, str]:
+    """Stream an ``UploadFile`` to ``path`` and return its size and SHA-256.
+
+    The upload is copied in ``chunk_size`` pieces, so memory use does not
+    depend on the file size. Once more than ``max_size`` bytes have been
+    read, the partial file is deleted and :class:`UploadTooLarge` is raised.
+    """
+    await asyncio.to_thread(os.makedirs, os.path.dirname(path), exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    f = await asyncio.to_thread(open, path, "wb")
+    try:
+        while chunk := await upload.read(chunk_size):
+            size += len(chunk)
+            if max_size is not None and size > max_size:
+                raise UploadTooLarge(f"upload exceeds {max_size} bytes")
+            digest.update(chunk)
+            await asyncio.to_thread(f.write, chunk)
+    except BaseException:
+        f.close()
+        os.remove(path)
+        raise
+    f.close()
+    return size, digest.hexdigest()
@@ -1,14 +1,18 @@
 import os
-import json
+import threading
 import time
 import uuid
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
-import psycopg2
+import numpy as np
 import redis
 from qdrant_client import QdrantClient
 from qdrant_client.http.models import PointStruct
+from shared.database import get_pool
+from shared.embedding_cache import get_embedding_cache
 from shared.logger import logger
+from shared.redis_utils import Subscription, send
+from shared.sharding import owned_channels, shard_channel
 
 USE_OPENAI_EMBEDDING = os.getenv("USE_OPENAI_EMBEDDING", "false").lower() == "true"
 
@@ -45,36 +49,71 @@ BATCH_SIZE = int(os.getenv("BATCH_SIZE", "100"))
 
 redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
 qdrant = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+db = get_pool(**PG_OPTS)
+embedding_cache = get_embedding_cache(MODEL_NAME)
 
 
-def embed_text(text: str) -> List[float]:
-    """Return embedding for provided text using configured model."""
+def _encode(text: str) -> Any:
+    """Call the configured model; errors propagate so nothing bad is cached."""
     if USE_OPENAI_EMBEDDING:
         openai.api_key = OPENAI_API_KEY
-        try:
-            resp = openai.Embedding.create(model=MODEL_NAME, input=text)
-            vector = resp["data"][0]["embedding"]
-        except Exception as exc:  # pragma: no cover - network issues
-            logger.error("[TRUTH] OpenAI embedding failed: %s", exc)
-            vector = []
-    else:
-        vector = model.encode(text).tolist()
+        resp = openai.Embedding.create(model=MODEL_NAME, input=text)
+        return np.asarray(resp["data"][0]["embedding"], dtype=np.float32)
+    return model.encode(text)
+
+
+def _encode_many(texts: List[str]) -> List[Any]:
+    """:func:`_encode` for many texts in one model call or one API request."""
+    if USE_OPENAI_EMBEDDING:
+        openai.api_key = OPENAI_API_KEY
+        resp = openai.Embedding.create(model=MODEL_NAME, input=list(texts))
+        data = sorted(resp["data"], key=lambda d: d.get("index", 0))
+        return [np.asarray(d["embedding"], dtype=np.float32) for d in data]
+    return list(model.encode(list(texts)))
+
+
+def embed_text(text: str) -> List[float]:
+    """Return embedding for provided text using configured model."""
+    try:
+        vector = embedding_cache.encode_one(text, _encode).tolist()
+    except Exception as exc:  # pragma: no cover - network issues
+        if not USE_OPENAI_EMBEDDING:
+            raise
+        logger.error("[TRUTH] OpenAI embedding failed: %s", exc)
+        vector = []
     logger.info("[TRUTH] Embedded text using %s", MODEL_NAME)
     return vector
 
 
-def fetch_rows(cursor: Any, table: str) -> List[Tuple[Any, ...]]:
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    """Embeddings for ``texts`` in order, encoding the uncached ones together."""
+    try:
+        vectors = [v.tolist() for v in embedding_cache.encode(texts, _encode_many)]
+    except Exception as exc:  # pragma: no cover - network issues
+        if not USE_OPENAI_EMBEDDING:
+            raise
+        logger.error("[TRUTH] OpenAI embedding failed: %s", exc)
+        vectors = [[] for _ in texts]
+    logger.info("[TRUTH] Embedded %d texts using %s", len(texts), MODEL_NAME)
+    return vectors
+
+
+def fetch_rows(
+    cursor: Any, table: str, well_id: Optional[str] = None
+) -> List[Tuple[Any, ...]]:
     cursor.execute(
-        f"SELECT id, well_id, timestamp, text, noun_phrases, anomaly, source_file FROM {table} WHERE embedded = false LIMIT %s",
-        (BATCH_SIZE,),
+        f"SELECT id, well_id, timestamp, text, noun_phrases, anomaly, source_file FROM {table} "
+        "WHERE embedded = false AND (%s IS NULL OR well_id = %s) LIMIT %s",
+        (well_id, well_id, BATCH_SIZE),
     )
     return cursor.fetchall()
 
 
-def fetch_wellfile(cursor: Any) -> List[Tuple[Any, ...]]:
+def fetch_wellfile(cursor: Any, well_id: Optional[str] = None) -> List[Tuple[Any, ...]]:
     cursor.execute(
-        "SELECT id, well_id, page, text, noun_phrases, important, source_file FROM reflected_wellfile WHERE embedded = false LIMIT %s",
-        (BATCH_SIZE,),
+        "SELECT id, well_id, page, text, noun_phrases, important, source_file FROM reflected_wellfile "
+        "WHERE embedded = false AND (%s IS NULL OR well_id = %s) LIMIT %s",
+        (well_id, well_id, BATCH_SIZE),
     )
     return cursor.fetchall()
 
@@ -110,16 +149,16 @@ def store_sentence(sentence: str, metadata: Dict[str, Any]) -> str:
     return uid
 
 
-def embed_reflected_scada(conn: Any) -> None:
+def embed_reflected_scada(conn: Any, well_id: Optional[str] = None) -> None:
     with conn.cursor() as cur:
-        rows = fetch_rows(cur, "reflected_scada")
+        rows = fetch_rows(cur, "reflected_scada", well_id)
         if not rows:
             return
         points: List[PointStruct] = []
         ids: List[Any] = []
-        for row in rows:
+        vectors = embed_texts([row[3] for row in rows])
+        for row, vector in zip(rows, vectors):
             row_id, well_id, ts, text, phrases, anomaly, src_file = row
-            vector = embed_text(text)
             payload: Dict[str, Any] = {
                 "well_id": well_id,
                 "timestamp": ts.isoformat() if hasattr(ts, "isoformat") else ts,
@@ -138,24 +177,23 @@ def embed_reflected_scada(conn: Any) -> None:
         mark_embedded(cur, "reflected_scada", ids)
         conn.commit()
         logger.info("[TRUTH] Insert success=%s for scada", success)
-        redis_client.publish(
-            EMBED_CHANNEL,
-            json.dumps(
-                {"event": "embed_ready", "well_id": rows[0][1], "source": "scada"}
-            ),
+        send(
+            redis_client,
+            shard_channel(EMBED_CHANNEL, rows[0][1]),
+            {"event": "embed_ready", "well_id": rows[0][1], "source": "scada"},
         )
 
 
-def embed_reflected_wellfile(conn: Any) -> None:
+def embed_reflected_wellfile(conn: Any, well_id: Optional[str] = None) -> None:
     with conn.cursor() as cur:
-        rows = fetch_wellfile(cur)
+        rows = fetch_wellfile(cur, well_id)
         if not rows:
             return
         points: List[PointStruct] = []
         ids: List[Any] = []
-        for row in rows:
+        vectors = embed_texts([row[3] for row in rows])
+        for row, vector in zip(rows, vectors):
             row_id, well_id, page, text, phrases, important, src_file = row
-            vector = embed_text(text)
             payload: Dict[str, Any] = {
                 "well_id": well_id,
                 "page": page,
@@ -174,34 +212,66 @@ def embed_reflected_wellfile(conn: Any) -> None:
         mark_embedded(cur, "reflected_wellfile", ids)
         conn.commit()
         logger.info("[TRUTH] Insert success=%s for wellfile", success)
-        redis_client.publish(
-            EMBED_CHANNEL,
-            json.dumps(
-                {"event": "embed_ready", "well_id": rows[0][1], "source": "wellfile"}
-            ),
+        send(
+            redis_client,
+            shard_channel(EMBED_CHANNEL, rows[0][1]),
+            {"event": "embed_ready", "well_id": rows[0][1], "source": "wellfile"},
         )
 
 
-def listen() -> None:
-    conn = psycopg2.connect(**PG_OPTS)
-    pubsub = redis_client.pubsub()
-    pubsub.subscribe(TRUTH_CHANNEL)
-    for message in pubsub.listen():
-        if message["type"] != "message":
-            continue
-        try:
-            data = json.loads(message["data"])
-        except json.JSONDecodeError:
-            continue
-        if data.get("event") != "truth_ready":
-            continue
-        source = data.get("source")
+def handle_event(data: Dict[str, Any]) -> None:
+    if data.get("event") != "truth_ready":
+        return
+    source = data.get("source")
+    well_id = data.get("well_id")
+    with db.connection() as conn:
         if source == "scada":
-            embed_reflected_scada(conn)
+            embed_reflected_scada(conn, well_id)
         elif source == "wellfile":
-            embed_reflected_wellfile(conn)
-        time.sleep(0.1)
+            embed_reflected_wellfile(conn, well_id)
+
+
+def listen(channel: str = TRUTH_CHANNEL) -> None:
+    """Handle ``truth_ready`` events from one shard of the truth channel.
+
+    Failed events are logged and left unacked, so the stream redelivers
+    them once they have been idle for ``STREAM_CLAIM_IDLE_MS``; the thread
+    itself keeps running.
+    """
+    subscription = Subscription(redis_client, channel, "truth")
+    while True:
+        try:
+            messages = subscription.read(timeout=1)
+        except Exception as exc:
+            logger.error("[TRUTH] Read from %s failed: %s", channel, exc)
+            time.sleep(1)
+            continue
+        done = []
+        for msg_id, data in messages:
+            try:
+                handle_event(data)
+                done.append(msg_id)
+            except Exception as exc:
+                logger.error("[TRUTH] Failed to handle %s on %s: %s", data, channel, exc)
+        try:
+            subscription.ack(done)
+        except Exception as exc:
+            logger.error("[TRUTH] Ack on %s failed: %s", channel, exc)
+        if messages:
+            time.sleep(0.1)
+
+
+def main() -> None:
+    """Run one listener thread per owned shard."""
+    threads = [
+        threading.Thread(target=listen, args=(shard,), daemon=True)
+        for shard in owned_channels(TRUTH_CHANNEL)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
 
 
 if __name__ == "__main__":
-    listen()
+    main()
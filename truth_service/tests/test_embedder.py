@@ -81,3 +81,71 @@ def test_openai_embedding(monkeypatch):
     vec = mod.embed_text("hi")
     assert len(vec) == 1536
     os.environ.pop("USE_OPENAI_EMBEDDING")
+
+
+def test_reflected_rows_are_embedded_in_one_call():
+    mod = reload_truth()
+    calls = []
+
+    def encode(texts):
+        calls.append(list(texts))
+        return [DummyVector([float(len(t))] * 384) for t in texts]
+
+    class Cursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, *args):
+            pass
+
+        def fetchall(self):
+            return [
+                (i, "w1", "2024-01-01", f"row {i} pressure {1400 + i} psi", [], False, "f.csv")
+                for i in range(5)
+            ]
+
+    upserted = []
+    mod.model = types.SimpleNamespace(encode=encode)
+    mod.upsert_points = lambda points: upserted.extend(points) or True
+    mod.send = lambda *args: None
+    conn = types.SimpleNamespace(cursor=Cursor, commit=lambda: None)
+
+    mod.embed_reflected_scada(conn, "w1")
+    assert len(calls) == 1 and len(calls[0]) == 5
+    assert [p.vector[0] for p in upserted] == [float(len(t)) for t in calls[0]]
+
+
+def test_failed_events_stay_unacked_and_the_listener_keeps_going():
+    mod = reload_truth()
+    acked = []
+
+    class FakeSubscription:
+        reads = 0
+
+        def __init__(self, *args):
+            pass
+
+        def read(self, timeout):
+            FakeSubscription.reads += 1
+            if FakeSubscription.reads > 1:
+                raise KeyboardInterrupt  # stop the loop
+            return [("1-0", {"well_id": "bad"}), ("2-0", {"well_id": "ok"})]
+
+        def ack(self, ids):
+            acked.extend(ids)
+
+    def handle_event(data):
+        if data["well_id"] == "bad":
+            raise RuntimeError("postgres went away")
+
+    mod.Subscription = FakeSubscription
+    mod.handle_event = handle_event
+    mod.time = types.SimpleNamespace(sleep=lambda s: None)
+    try:
+        mod.listen("truth_channel:0")
+    except KeyboardInterrupt:
+        pass
+    assert acked == ["2-0"]
@@ -0,0 +1,70 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+from shared.embedding_cache import EmbeddingCache  # noqa: E402
+
+
+def make_encoder(calls):
+    def encode(texts):
+        calls.append(list(texts))
+        return np.array([[len(t), 1.0] for t in texts], dtype=np.float32)
+
+    return encode
+
+
+def test_only_unseen_texts_are_encoded_once_and_lru_is_bounded():
+    calls = []
+    cache = EmbeddingCache("m", max_entries=2)
+    encode = make_encoder(calls)
+
+    first = cache.encode(["aa", "bbb", "aa"], encode)
+    assert calls == [["aa", "bbb"]]
+    assert [v[0] for v in first] == [2, 3, 2]
+
+    cache.encode(["bbb", "c"], encode)
+    assert calls[-1] == ["c"]
+    assert len(cache) == 2
+    # "aa" was least recently used and has been evicted
+    cache.encode(["aa"], encode)
+    assert calls[-1] == ["aa"]
+
+    assert cache.encode_one("c", lambda text: 1 / 0)[0] == 1
+
+
+def test_redis_tier_is_shared_between_caches():
+    fakeredis = pytest.importorskip("fakeredis")
+    calls = []
+    redis = fakeredis.FakeRedis()
+    EmbeddingCache("m", redis_client=redis).encode(["pressure 1450 psi"], make_encoder(calls))
+
+    other = EmbeddingCache("m", redis_client=redis)
+    (vector,) = other.encode(["pressure 1450 psi"], make_encoder(calls))
+    assert len(calls) == 1
+    assert vector.dtype == np.float32 and vector.tolist() == [17.0, 1.0]
+    # A different model does not share entries
+    EmbeddingCache("other", redis_client=redis).encode(["pressure 1450 psi"], make_encoder(calls))
+    assert len(calls) == 2
+
+
+def test_redis_tier_keeps_the_most_recently_used_entries():
+    fakeredis = pytest.importorskip("fakeredis")
+    redis = fakeredis.FakeRedis()
+    cache = EmbeddingCache("m", max_entries=1, redis_client=redis, redis_max_entries=2)
+    encode = make_encoder([])
+
+    cache.encode(["a"], encode)
+    cache.encode(["bb"], encode)
+    cache.encode(["a"], encode)  # from Redis, which marks "a" as used
+    cache.encode(["ccc"], encode)
+
+    assert redis.zcard(EmbeddingCache.INDEX) == 2
+    assert len(redis.keys("emb:*")) == 3  # two vectors plus the index
+    calls = []
+    EmbeddingCache("m", redis_client=redis).encode(["a", "bb", "ccc"], make_encoder(calls))
+    assert calls == [["bb"]]
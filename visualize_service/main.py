@@ -5,10 +5,10 @@ from loguru import logger
 from schemas import VisualizeRequest, VisualizeResponse
 from visualization import generate_visualization
 import redis.asyncio as redis
+from shared.redis_utils import AsyncSubscription, send
 from prometheus_fastapi_instrumentator import Instrumentator
 from prometheus_client import Histogram, Counter
 import asyncio
-import json
 import os
 import uvicorn
 
@@ -60,7 +60,7 @@ async def process_message(data):
             "timestamp": datetime.utcnow().isoformat(),
             "anchored_embedding": req.anchored_embedding,
         }
-        await redis_client.publish(VISUALIZE_CHANNEL, json.dumps(response))
+        await send(redis_client, VISUALIZE_CHANNEL, response)
         logger.info("[VISUALIZE] Published visualization", uuid=req.uuid)
     except Exception as e:
         visualize_errors.inc()
@@ -68,19 +68,21 @@ async def process_message(data):
 
 
 async def listener():
-    pubsub = redis_client.pubsub()
-    await pubsub.subscribe(REFLECT_CHANNEL)
+    subscription = AsyncSubscription(redis_client, REFLECT_CHANNEL, "visualize")
     logger.info(f"[VISUALIZE] Subscribed to '{REFLECT_CHANNEL}'")
 
     while not shutdown_event.is_set():
-        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1)
-        if message:
-            try:
-                data = json.loads(message["data"])
-                asyncio.create_task(process_message(data))
-            except Exception as e:
+        messages = await subscription.read(timeout=1)
+        if not messages:
+            continue
+        results = await asyncio.gather(
+            *(process_message(data) for _, data in messages), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
                 visualize_errors.inc()
-                logger.error("[VISUALIZE] Failed to process message", error=str(e))
+                logger.error("[VISUALIZE] Failed to process message", error=str(result))
+        await subscription.ack(msg_id for msg_id, _ in messages)
 
 
 @app.on_event("startup")